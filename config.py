@@ -1,6 +1,122 @@
+import os
+
 EXTERNAL_API_BASE = "Removed keys"
 SUPPLIER_LIST_ENDPOINT = "Removed keys"
 SUPPLIER_DETAIL_ENDPOINT = "Removed keys"
 MODEL_NAME = "Removed keys"
 CHROMA_DB_PATH = "Removed keys"
-GOOGLE_API_KEY = "Removed keys"
\ No newline at end of file
+GOOGLE_API_KEY = "Removed keys"
+
+# Outbound HTTP (shared async client)
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 30.0
+HTTP_PER_HOST_CONCURRENCY = 16
+
+# MySQL connection pool (user_operations): DB_POOL_SIZE pooled connections plus up to
+# DB_POOL_MAX_OVERFLOW temporary ones; a checkout waits at most DB_POOL_TIMEOUT seconds
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+# Popularity ranking (favorite counters), cached per process for POPULARITY_CACHE_TTL seconds
+POPULAR_SUPPLIERS_LIMIT = int(os.getenv("POPULAR_SUPPLIERS_LIMIT", "100"))
+POPULARITY_CACHE_TTL = float(os.getenv("POPULARITY_CACHE_TTL", "30"))
+POPULARITY_CACHE_MAX_ENTRIES = int(os.getenv("POPULARITY_CACHE_MAX_ENTRIES", "10000"))
+
+# Local persistent caches (geocodes, translations, ...)
+CACHE_DB_PATH = "cache_database/cache.sqlite3"
+GEOCODE_CACHE_TTL = 90 * 24 * 3600  # supplier addresses rarely change
+GEOCODE_NEGATIVE_TTL = 3600
+TRANSLATION_CACHE_TTL = 30 * 24 * 3600
+CACHE_PURGE_INTERVAL = 600  # seconds between deletions of expired cache rows (main.py lifespan)
+
+# Routes API pre-ranking: only the ROUTES_TOP_K nearest suppliers (straight line) get driving routes
+ROUTES_TOP_K = 25
+ROUTES_MAX_ELEMENTS = 625  # computeRouteMatrix element limit per request
+ESTIMATED_SPEED_KMH = 40
+
+# Route/ETA cache: user positions are bucketed into geohash cells of this precision (7 ~ 150 m)
+ROUTE_CACHE_PRECISION = 7
+ROUTE_CACHE_TTL = 12 * 3600
+
+# Query embedding cache and micro-batching encoder
+EMBEDDING_CACHE_MAX_ENTRIES = 10000
+EMBEDDING_CACHE_MAX_BYTES = 64 * 1024 * 1024
+ENCODER_BATCH_WINDOW_MS = 5
+ENCODER_MAX_BATCH = 32
+
+# Inference worker pool for SentenceTransformer encodes
+# (workers > torch threads so concurrent queries can join one micro-batch)
+INFERENCE_WORKERS = 8
+INFERENCE_TORCH_THREADS = 4
+INFERENCE_MAX_QUEUE = 64
+INFERENCE_RETRY_AFTER = 1  # seconds, sent with 503 responses
+
+# Bilingual NACE index: Turkish queries are embedded with a multilingual model and searched
+# directly in NACE_TR_COLLECTION.
+MULTILINGUAL_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+NACE_TR_COLLECTION = "nace_codes_tr"
+# PROVISIONAL: copied from the English threshold and not yet calibrated on Turkish queries. The
+# multilingual model's cosine distances are distributed differently, so set TR_SCORE_THRESHOLD in
+# the environment once it has been tuned on labelled Turkish queries.
+TR_SCORE_THRESHOLD = float(os.getenv("TR_SCORE_THRESHOLD", "0.88"))
+
+# NACE search backend: "chroma" (HNSW through PersistentClient) or "numpy" (exact cosine
+# top-k over a memory-mapped matrix exported from the Chroma collection)
+SEARCH_BACKEND = "chroma"
+NUMPY_INDEX_PATH = "cache_database/nace_index"
+
+# NACE query encoder runtime: "torch" (PyTorch float32), "onnx" (ONNX Runtime) or "onnx-int8"
+# (dynamically quantized ONNX). ONNX backends are exported and checked against the torch model
+# with `python -m services.encoder_backends --backend ...`; until that check has passed with a
+# top-k agreement of at least ENCODER_MIN_AGREEMENT the torch model is used.
+ENCODER_BACKEND = "torch"
+ONNX_MODEL_DIR = "cache_database/onnx_encoder"
+ONNX_QUANTIZATION = "avx2"  # "avx512_vnni" / "arm64" on CPUs that support them
+ENCODER_MIN_AGREEMENT = 0.97
+
+# Search sidecar (python -m services.search_sidecar): one process owns the query models and the
+# Chroma index and answers the NACE searches of every uvicorn worker, so the workers load neither.
+# "" keeps the search in-process; "unix:/run/arabul/search.sock" or "http://127.0.0.1:8765"
+# sends it to the sidecar listening there.
+SEARCH_SIDECAR_URL = ""
+SEARCH_SIDECAR_TIMEOUT = 10.0  # seconds
+SEARCH_SIDECAR_STATUS_INTERVAL = 5.0  # seconds between background refreshes of the cached sidecar status
+
+# Batch NACE classification: queries per request, and per chunk (one encode + one query each)
+NACE_BATCH_MAX_QUERIES = 500
+NACE_BATCH_CHUNK_SIZE = 64
+TRANSLATION_BATCH_WORKERS = 8
+
+# Supplier list cache: "memory" (per worker), "sqlite" (CACHE_DB_PATH, shared by the workers
+# on a host) or "redis" (REDIS_URL). Entries are fresh for SUPPLIER_CACHE_TTL, then served
+# stale for up to SUPPLIER_CACHE_STALE_TTL while refreshed in the background.
+SUPPLIER_CACHE_BACKEND = "sqlite"
+SUPPLIER_CACHE_TTL = 600
+SUPPLIER_CACHE_STALE_TTL = 3600
+SUPPLIER_NEGATIVE_TTL = 30  # API errors
+SUPPLIER_CACHE_MAX_ENTRIES = 1024  # memory backend only
+REDIS_URL = "redis://localhost:6379/0"
+
+# Supplier details (favorites): cached per SupplierID in the SUPPLIER_CACHE_BACKEND store,
+# fetched in parallel; details not back within FAVORITES_DETAIL_BUDGET get a placeholder
+SUPPLIER_DETAIL_CACHE_TTL = 6 * 3600
+SUPPLIER_DETAIL_TIMEOUT = 10
+SUPPLIER_DETAIL_CONCURRENCY = 8
+FAVORITES_DETAIL_BUDGET = 3.0  # seconds
+
+# Logging (utils/log_utils.py): records go through a bounded queue to one writer thread.
+# LOG_SAMPLE_RATE keeps that share of DEBUG/INFO records; warnings and errors are always kept.
+LOG_LEVEL = "INFO"
+LOG_JSON = True
+LOG_SAMPLE_RATE = 1.0
+LOG_QUEUE_SIZE = 10000
+# Libraries that log every call at INFO: httpx/httpcore one line per upstream request, and
+# uvicorn.access a second access log next to RequestIdMiddleware's (which has the request id)
+LOG_QUIET_LOGGERS = {"httpx": "WARNING", "httpcore": "WARNING", "uvicorn.access": "WARNING"}
+
+# Startup (main.py lifespan): the query model and the NACE index are loaded and warmed up in the
+# background while the app already answers /healthz; /readyz returns 503 until they are ready.
+# A cold start (process import to warmed-up model) slower than the budget is logged as a warning.
+COLD_START_BUDGET_S = 30.0
@@ -1,14 +1,92 @@
+import time
+_IMPORT_START = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from routes import chat, location, user
-from user_operations import initialize_all_tables
+from config import COLD_START_BUDGET_S, CACHE_PURGE_INTERVAL
+from user_operations import initialize_all_tables, get_pool_stats, get_popularity_cache_stats, ping_db
+from services.chromadb_service import load_search_resources, search_status
+from services.http_client import close_async_client
+from services.cache_store import purge_all_expired
+from services.distance_duration_service import get_geocode_cache_stats, get_route_cache_stats
+from services.external_api_service import get_supplier_cache_stats
+from services.single_flight import get_single_flight_stats
+from services.embedding_service import get_embedding_stats
+from services.inference_executor import get_inference_stats
+from services.translation_service import get_translation_cache_stats
+from utils.log_utils import setup_logging, get_logger, get_logging_stats, RequestIdMiddleware
+from utils.metrics import MetricsMiddleware, register_stats, render_prometheus
+
+
+setup_logging()
+logger = get_logger(__name__)
+
+_startup = {"status": "starting", "budget_s": COLD_START_BUDGET_S}
+
+
+def get_startup_stats():
+    return dict(_startup)
+
+
+async def _load_search():
+    """Loads and warms up the NACE model and index off the event loop, then records the cold start"""
+    try:
+        timings = await asyncio.to_thread(load_search_resources)
+    except Exception:
+        _startup["status"] = "failed"
+        logger.exception("loading the NACE model and index failed")
+        return
+
+    _startup.update({name: round(seconds, 3) for name, seconds in timings.items()})
+    _startup["ready_s"] = round(time.perf_counter() - _IMPORT_START, 3)
+    _startup["status"] = "ready"
+    if _startup["ready_s"] > COLD_START_BUDGET_S:
+        logger.warning("cold start over budget", extra=get_startup_stats())
+    else:
+        logger.info("NACE model and index ready", extra=get_startup_stats())
+
+
+async def _purge_caches():
+    """Deletes expired geocode / route / translation / supplier cache rows every CACHE_PURGE_INTERVAL"""
+    while True:
+        try:
+            purged = await asyncio.to_thread(purge_all_expired)
+            logger.info("expired cache entries purged", extra={"purged": purged})
+        except Exception:
+            logger.exception("cache purge failed")
+        await asyncio.sleep(CACHE_PURGE_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _startup["import_s"] = round(time.perf_counter() - _IMPORT_START, 3)
+
+    logger.info("Initializing database tables...")
+    try:
+        await asyncio.to_thread(initialize_all_tables)
+        logger.info("Database initialization complete!")
+    except Exception:
+        # The app still starts; /readyz reports the database until it is reachable
+        logger.exception("database initialization failed")
 
+    # Not awaited: /healthz answers while the model loads, /readyz waits for it
+    search_task = asyncio.create_task(_load_search())
+    purge_task = asyncio.create_task(_purge_caches())
+    yield
 
-app = FastAPI()
+    search_task.cancel()
+    purge_task.cancel()
+    await close_async_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 from fastapi import APIRouter
-import time
 
 @app.get("/timeout-test")
 def simulate_timeout():
@@ -17,12 +95,49 @@ def simulate_timeout():
 
 
 
-# Initialize database tables on startup
-@app.on_event("startup")
-async def startup_db_client():
-    print("Initializing database tables...")
-    initialize_all_tables()
-    print("Database initialization complete!")
+STATS_SOURCES = {
+    "db_pool": get_pool_stats,
+    "geocode_cache": get_geocode_cache_stats,
+    "route_cache": get_route_cache_stats,
+    "embeddings": get_embedding_stats,
+    "inference": get_inference_stats,
+    "translation_cache": get_translation_cache_stats,
+    "supplier_cache": get_supplier_cache_stats,
+    "single_flight": get_single_flight_stats,
+    "popularity_cache": get_popularity_cache_stats,
+    "logging": get_logging_stats,
+    "startup": get_startup_stats,
+}
+
+# Cache hit ratios, pool usage and in-flight counts also go to /metrics as gauges
+for name, stats_fn in STATS_SOURCES.items():
+    register_stats(f"arabul_{name}", stats_fn)
+
+
+@app.get("/stats")
+def service_stats():
+    return {name: stats_fn() for name, stats_fn in STATS_SOURCES.items()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format: per-stage latency histograms plus the /stats gauges
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/healthz")
+def healthz():
+    # Liveness only: the process serves requests, whatever the model or the database are doing
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    checks = search_status()
+    checks["mysql"] = ping_db()
+    ready = all(checks.values())
+    return JSONResponse({"ready": ready, "checks": checks}, status_code=200 if ready else 503)
+
 
 # CORS Middleware
 app.add_middleware(
@@ -33,6 +148,12 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Request latency by route template
+app.add_middleware(MetricsMiddleware)
+
+# Request ids for log correlation (outermost, so the access log covers CORS handling too)
+app.add_middleware(RequestIdMiddleware)
+
 # Add routes
 app.include_router(chat.router, prefix="/chat", tags=["chat"])
 app.include_router(location.router, prefix="/location", tags=["Location"])
@@ -42,4 +163,5 @@ app.include_router(user.router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # RequestIdMiddleware writes the access log
+    uvicorn.run(app, host="0.0.0.0", port=8000, access_log=False)
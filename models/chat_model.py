@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from config import NACE_BATCH_MAX_QUERIES
 
 class CityModel(BaseModel):
     city: str  # ✅ Sadece şehir bilgisi tutuluyor
@@ -8,6 +9,10 @@ class ChatNaceCodeRequest(BaseModel):
     query: str
     language: str = "en"
 
+class ChatNaceCodeBatchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=NACE_BATCH_MAX_QUERIES)
+    language: str = "en"
+
 class ChatBusinessRequest(BaseModel):
     naceCode: str
     cities: List[CityModel]
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+class SidecarSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1)
+    top_k: int = Field(3, ge=1)
+    language: Literal["en", "tr"] = "en"
+    score_threshold: Optional[float] = None  # English only; Turkish searches use TR_SCORE_THRESHOLD
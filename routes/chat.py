@@ -1,53 +1,73 @@
+import json
+from typing import List
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from routes.location import router
-from models.chat_model import ChatBusinessRequest, ChatNaceCodeRequest
-from services.chromadb_service import semantic_search
-from services.external_api_service import fetch_suppliers
-from services.distance_duration_service import process_suppliers
-from services.translation_service import translate_to_english, translate_to_turkish
+from models.chat_model import ChatBusinessRequest, ChatNaceCodeRequest, ChatNaceCodeBatchRequest
+from services.chromadb_service import (
+    semantic_search,
+    semantic_search_batch,
+    semantic_search_turkish,
+    semantic_search_turkish_batch,
+    turkish_index_ready,
+)
+from services.external_api_service import fetch_suppliers_async
+from services.distance_duration_service import process_suppliers_async, process_suppliers_events
+from services.translation_service import translate_to_english, translate_many_to_english, translate_nace_description
+from services.inference_executor import run_inference, InferenceQueueFull
+from utils.language_utils import detect_language
+from utils.log_utils import get_logger
+from config import INFERENCE_RETRY_AFTER, NACE_BATCH_CHUNK_SIZE
+
+
+logger = get_logger(__name__)
+
+
+def ndjson_line(payload: dict) -> str:
+    return json.dumps(payload, ensure_ascii=False) + "\n"
 
 
 @router.post("/get_businesses")
-async def chat_business_endpoint(request: ChatBusinessRequest):
-    print(f"Incoming Data: {request.model_dump()}")  # Display the incoming data
+async def chat_business_endpoint(request: ChatBusinessRequest, stream: bool = False):
+    """
+    With ?stream=true the response is NDJSON: a "suppliers" event with the raw supplier list,
+    "distance"/"unresolved" events as geocodes and route matrix rows arrive, and a final
+    "sorted" event with the same data the non-streaming response returns.
+    """
+    logger.debug("get_businesses request", extra={"request": request.model_dump()})
 
     nace_code = [request.naceCode]
 
     # Format cities
     formatted_cities = [{"City": city.city, "Regions": []} for city in request.cities]
 
-    # Fetch suppliers
-    suppliers = fetch_suppliers(nace_code, formatted_cities)
-
-    # Calculate distance and duration
-    updated_suppliers = process_suppliers(request.latitude, request.longitude, suppliers)
-
-    print(f"Outgoing Data: {updated_suppliers}") # Display the outgoing data
+    # Fetch suppliers (non-blocking, shared async HTTP client)
+    suppliers = await fetch_suppliers_async(nace_code, formatted_cities)
 
-    return {"success": True, "data": updated_suppliers}
+    if stream:
+        async def events():
+            yield ndjson_line({"event": "suppliers", "data": suppliers})
+            async for event in process_suppliers_events(request.latitude, request.longitude, suppliers):
+                yield ndjson_line(event)
 
+        return StreamingResponse(events(), media_type="application/x-ndjson")
 
-@router.post("/get_nace_codes")
-async def chat_nace_code_endpoint(request: ChatNaceCodeRequest):
-    print(f"Incoming Data: {request.model_dump()}") # Display the incoming data
+    # Calculate distance and duration
+    updated_suppliers = await process_suppliers_async(request.latitude, request.longitude, suppliers)
 
-    # Translate the user query
-    translated_query = translate_to_english(request.query)
-    results, status = semantic_search(translated_query)
+    logger.debug("get_businesses response", extra={"response": updated_suppliers})
 
-    if status == "no_hits":
-        return {"success": False, "data": "Semantic search failed"}
+    return {"success": True, "data": updated_suppliers}
 
-    if status == "threshold":
-        return {"success": False, "data": "No results met the confidence threshold"}
 
-    # Form NACE codes with their descriptions, translate the descriptions to Turkish if the language is "tr"
+def format_nace_codes(results, language: str):
     nace_codes = []
     for result in results:
         desc_en = result["metadata"]["category"].strip('"')
 
-        if request.language.lower() == "tr":
-            desc_tr = translate_to_turkish(desc_en)
-            description = desc_tr
+        if language.lower() == "tr":
+            description = translate_nace_description(desc_en)
         else:
             description = desc_en
 
@@ -57,7 +77,104 @@ async def chat_nace_code_endpoint(request: ChatNaceCodeRequest):
                 "description": description,
             }
         )
+    return nace_codes
 
-    print(f"Outgoing Data: {nace_codes}") # Display the outgoing data
 
-    return {"success": True, "data": {"naceCodes": nace_codes}}
+@router.post("/get_nace_codes")
+async def chat_nace_code_endpoint(request: ChatNaceCodeRequest):
+    logger.debug("get_nace_codes request", extra={"request": request.model_dump()})
+
+    if detect_language(request.query) == "tr" and turkish_index_ready():
+        # Turkish queries are searched directly in the Turkish index
+        search, search_query = semantic_search_turkish, request.query
+    else:
+        # Translate the user query (cached; misses go to the translator off the event loop)
+        search, search_query = semantic_search, await run_in_threadpool(translate_to_english, request.query)
+
+    # Encode and search on the inference pool so the event loop stays free
+    try:
+        results, status = await run_inference(search, search_query)
+    except InferenceQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Search is busy, please retry",
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER)},
+        )
+
+    response = await run_in_threadpool(nace_response, results, status, request.language)
+
+    logger.debug("get_nace_codes response", extra={"response": response})
+
+    return response
+
+
+def nace_response(results, status: str, language: str) -> dict:
+    if status == "no_hits":
+        return {"success": False, "data": "Semantic search failed"}
+
+    if status == "threshold":
+        return {"success": False, "data": "No results met the confidence threshold"}
+
+    # Form NACE codes with their descriptions, Turkish descriptions come from the precomputed table
+    return {"success": True, "data": {"naceCodes": format_nace_codes(results, language)}}
+
+
+def nace_responses(outcomes, language: str) -> List[dict]:
+    return [nace_response(results, status, language) for results, status in outcomes]
+
+
+def search_nace_batch(english_queries: List[str], turkish_queries: List[str]) -> tuple:
+    """
+    Runs the two halves of a batch (one encode + one collection query each) on the inference pool.
+    """
+    english = semantic_search_batch(english_queries) if english_queries else []
+    turkish = semantic_search_turkish_batch(turkish_queries) if turkish_queries else []
+    return english, turkish
+
+
+async def classify_nace_chunk(queries: List[str], language: str) -> List[dict]:
+    # Turkish queries go to the Turkish index when it is built, the rest are translated in bulk
+    use_turkish_index = turkish_index_ready()
+    turkish_positions, english_positions = [], []
+    for i, query in enumerate(queries):
+        if use_turkish_index and detect_language(query) == "tr":
+            turkish_positions.append(i)
+        else:
+            english_positions.append(i)
+
+    english_queries = await run_in_threadpool(translate_many_to_english, [queries[i] for i in english_positions])
+    turkish_queries = [queries[i] for i in turkish_positions]
+
+    try:
+        english, turkish = await run_inference(search_nace_batch, english_queries, turkish_queries)
+    except InferenceQueueFull:
+        busy = {"success": False, "data": "Search is busy, please retry"}
+        return [dict(busy) for _ in queries]
+
+    outcomes = [None] * len(queries)
+    for positions, results in ((english_positions, english), (turkish_positions, turkish)):
+        for position, outcome in zip(positions, results):
+            outcomes[position] = outcome
+
+    return await run_in_threadpool(nace_responses, outcomes, language)
+
+
+@router.post("/get_nace_codes_batch")
+async def chat_nace_code_batch_endpoint(request: ChatNaceCodeBatchRequest):
+    """
+    Classifies many queries in one call. The response is NDJSON: one line per query, in
+    input order, with the same success/data body as /get_nace_codes plus its index and query.
+    Lines are flushed after every chunk of NACE_BATCH_CHUNK_SIZE queries.
+    """
+    logger.info("get_nace_codes_batch request", extra={"queries": len(request.queries), "language": request.language})
+
+    async def stream():
+        for start in range(0, len(request.queries), NACE_BATCH_CHUNK_SIZE):
+            chunk = request.queries[start:start + NACE_BATCH_CHUNK_SIZE]
+            responses = await classify_nace_chunk(chunk, request.language)
+            yield "".join(
+                ndjson_line({"index": start + offset, "query": query, **response})
+                for offset, (query, response) in enumerate(zip(chunk, responses))
+            )
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
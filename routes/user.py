@@ -4,7 +4,9 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional, Union, List
 import requests
 import json
-from services.external_api_service import fetch_supplier_detail_by_id
+from starlette.concurrency import run_in_threadpool
+from services.external_api_service import fetch_supplier_details_async
+from utils.log_utils import get_logger
 from user_operations import (
     UserData, 
     FavoriteData, 
@@ -16,6 +18,7 @@ from user_operations import (
     get_user_favorites, 
     check_is_favorite, 
     get_popular_suppliers,
+    get_favorite_counts,
     submit_complaint,
     get_user_complaints,
     get_supplier_details,
@@ -27,6 +30,8 @@ from user_operations import (
     RatingData
 )
 
+logger = get_logger(__name__)
+
 # Import GOOGLE_CLIENT_IDS directly
 try:
     from web_client_ids import GOOGLE_CLIENT_IDS
@@ -53,17 +58,21 @@ class UpdateProfileRequest(BaseModel):
 
 router = APIRouter(tags=["User"])
 
+# The user_operations calls block on the MySQL pool (up to DB_POOL_TIMEOUT when it is busy),
+# so they run in the thread pool, never on the event loop
+
 @router.post("/register")
 async def register(data: UserData):
-    return register_user(data)
+    return await run_in_threadpool(register_user, data)
 
 @router.post("/login")
 async def login(data: UserData):
-    return login_user(data)
+    return await run_in_threadpool(login_user, data)
 
 @router.post("/add-favourite")
 async def add_favourite(data: FavoriteData):
-    return toggle_favorite(
+    return await run_in_threadpool(
+        toggle_favorite,
         data.user_id,
         data.supplier_id,
         data.favorited_at,
@@ -73,29 +82,32 @@ async def add_favourite(data: FavoriteData):
 
 @router.get("/favorites/{user_id}")
 async def get_favorites(user_id: int):
-    return {"favorites": get_user_favorites(user_id)}
+    return {"favorites": await run_in_threadpool(get_user_favorites, user_id)}
 
 @router.get("/is-favorite")
 async def is_favorite(user_id: int, supplier_id: str):
-    return check_is_favorite(user_id, supplier_id)
+    return await run_in_threadpool(check_is_favorite, user_id, supplier_id)
 
 @router.get("/popular-suppliers")
 async def popular_suppliers():
-    return get_popular_suppliers()
+    return await run_in_threadpool(get_popular_suppliers)
 
 @router.post("/sort-suppliers")
 async def sort_suppliers(request: Request):
     data = await request.json()
     suppliers = data.get("suppliers", [])
-    popular_data = get_popular_suppliers()
-    popularity_map = {entry["supplier_id"]: entry["count"] for entry in popular_data}
+    # Only the given suppliers are looked up (cached per supplier)
+    supplier_ids = [str(s["SupplierID"]) for s in suppliers if s.get("SupplierID") is not None]
+    popularity_map = await run_in_threadpool(get_favorite_counts, supplier_ids) if supplier_ids else {}
     for s in suppliers:
-        s["popularity"] = popularity_map.get(s.get("SupplierID"), 0)
+        supplier_id = s.get("SupplierID")
+        s["popularity"] = popularity_map.get(str(supplier_id), 0) if supplier_id is not None else 0
     return sorted(suppliers, key=lambda s: s["popularity"], reverse=True)
 
 @router.post("/submit-complaint")
 async def add_complaint(data: ComplaintData):
-    return submit_complaint(
+    return await run_in_threadpool(
+        submit_complaint,
         data.user_id,
         data.complaint_text,
         data.supplier_id
@@ -103,11 +115,11 @@ async def add_complaint(data: ComplaintData):
 
 @router.get("/complaints/{user_id}")
 async def get_complaints(user_id: int):
-    return {"complaints": get_user_complaints(user_id)}
+    return {"complaints": await run_in_threadpool(get_user_complaints, user_id)}
 
 @router.get("/supplier/{supplier_id}")
 async def supplier_details(supplier_id: str):
-    return get_supplier_details(supplier_id)
+    return await run_in_threadpool(get_supplier_details, supplier_id)
 
 @router.get("/generate-test-token")
 async def generate_test_token():
@@ -160,7 +172,7 @@ async def generate_test_token():
 async def google_authenticate(request: GoogleAuthRequest):
     """Handle Google authentication (both registration and login)"""
     try:
-        result = google_register_or_login(request.token, request.platform)
+        result = await run_in_threadpool(google_register_or_login, request.token, request.platform)
         return JSONResponse(content=result)
     except HTTPException as e:
         raise e
@@ -220,23 +232,22 @@ async def exchange_code_for_token(data: GoogleCodeExchange):
 
 @router.get("/favorites-detailed/{user_id}")
 async def favorites_detailed(user_id: int):
-    print(f"[DEBUG] favorites_detailed called for user_id: {user_id}")
-    supplier_ids = get_user_favorites(user_id)
-    print(f"[DEBUG] Found supplier_ids: {supplier_ids}")
-    
+    supplier_ids = await run_in_threadpool(get_user_favorites, user_id)
+    logger.debug("favorites_detailed favorites", extra={"user_id": user_id, "supplier_ids": supplier_ids})
+
+    # Details are fetched in parallel (cached); whatever misses the latency budget gets a fallback
+    details = await fetch_supplier_details_async(supplier_ids)
+
     detailed_suppliers = []
 
     for supplier_id in supplier_ids:
-        print(f"[DEBUG] Fetching details for supplier_id: {supplier_id}")
-        supplier = fetch_supplier_detail_by_id(supplier_id)
+        supplier = details.get(str(supplier_id))
         
         if supplier:
-            print(f"[DEBUG] Successfully fetched supplier: {supplier.get('CompanyName', 'Unknown')}")
             supplier["distance_km"] = 0
             supplier["duration"] = "0 dakika"
             detailed_suppliers.append(supplier)
         else:
-            print(f"[DEBUG] Failed to fetch supplier details for: {supplier_id}")
             # Create a minimal supplier object with the saved ID
             fallback_supplier = {
                 "SupplierID": supplier_id,
@@ -251,9 +262,9 @@ async def favorites_detailed(user_id: int):
                 "Email": ""
             }
             detailed_suppliers.append(fallback_supplier)
-            print(f"[DEBUG] Added fallback supplier for: {supplier_id}")
 
-    print(f"[DEBUG] Returning {len(detailed_suppliers)} detailed suppliers")
+    logger.info("favorites_detailed", extra={"user_id": user_id, "favorites": len(supplier_ids),
+                                             "fallbacks": sum(1 for s in details.values() if not s)})
     return {"success": True, "data": detailed_suppliers}
 
 @router.post("/update-profile")
@@ -262,7 +273,8 @@ async def update_user_profile(data: UpdateProfileRequest):
     try:
         print(f"Received profile update request: {data.dict(exclude={'old_password', 'new_password'})}")
         
-        result = update_profile(
+        result = await run_in_threadpool(
+            update_profile,
             data.old_email,
             data.old_password,
             data.new_email,
@@ -283,22 +295,22 @@ async def update_user_profile(data: UpdateProfileRequest):
 
 @router.post("/rating")
 async def add_rating(data: RatingData):
-    return submit_rating(data)
+    return await run_in_threadpool(submit_rating, data)
 
 @router.get("/rating/user")
 async def fetch_user_rating(user_id: int, supplier_id: str):
     try:
-        return get_user_rating(user_id, supplier_id)
+        return await run_in_threadpool(get_user_rating, user_id, supplier_id)
     except HTTPException as e:
         if e.status_code == 404:
             return JSONResponse(status_code=404, content={"detail": "No rating found"})
         raise
     except Exception as e:
-        print(f"[UNEXPECTED ERROR] fetch_user_rating failed: {str(e)}")
+        logger.exception("fetch_user_rating failed", extra={"user_id": user_id, "supplier_id": supplier_id})
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.post("/rating/rankings")
 async def get_bulk_ratings(supplier_ids: List[str] = Body(...)):
-    return calculate_bulk_average_ratings(supplier_ids)
+    return await run_in_threadpool(calculate_bulk_average_ratings, supplier_ids)
 
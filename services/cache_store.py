@@ -0,0 +1,427 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Every store created in this process, for purge_all_expired
+_stores: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def purge_all_expired() -> int:
+    """
+    Drops expired entries from every store of this process; run periodically by the app lifespan.
+    """
+    return sum(store.purge_expired() for store in list(_stores))
+
+
+class SQLiteTTLStore:
+    """
+    Small persistent key/value store with per-entry expiry, backed by a SQLite file.
+    The file is shared by every process that opens it (uvicorn workers, warm-up scripts).
+    Values are stored as JSON, so None can be cached as a negative result.
+    Expired rows are only deleted by purge_expired; "entries" in stats() is the row count
+    as of the last purge, so scraping stats never scans the table.
+    """
+
+    def __init__(self, path: str, table: str):
+        self.path = path
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.purged = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_expires_at ON {self.table} (expires_at)")
+        conn.commit()
+        self.entries = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        _stores.add(self)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads, keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Returns (found, value). Expired entries count as misses.
+        """
+        row = self._connection().execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+
+        found = row is not None and (row[1] is None or row[1] > time.time())
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return (True, json.loads(row[0])) if found else (False, None)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Stores a value; ttl=None keeps it until it is overwritten or deleted.
+        """
+        expires_at = time.time() + ttl if ttl is not None else None
+        conn = self._connection()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), expires_at),
+        )
+        conn.commit()
+        with self._lock:
+            self.writes += 1
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Values of the given keys that are present and not expired, one query per 500 keys.
+        """
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, value, expires_at FROM {self.table} WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for key, value, expires_at in rows:
+                if expires_at is None or expires_at > now:
+                    found[key] = json.loads(value)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None):
+        """
+        Stores several values with the same ttl in a single transaction.
+        """
+        if not items:
+            return
+        expires_at = time.time() + ttl if ttl is not None else None
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), expires_at) for key, value in items.items()],
+            )
+        with self._lock:
+            self.writes += len(items)
+
+    def contains(self, key: str) -> bool:
+        row = self._connection().execute(
+            f"SELECT 1 FROM {self.table} WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key: str):
+        conn = self._connection()
+        conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        conn.commit()
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.commit()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def purge_expired(self) -> int:
+        conn = self._connection()
+        cursor = conn.execute(
+            f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        )
+        conn.commit()
+        entries = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        with self._lock:
+            self.purged += cursor.rowcount
+            self.entries = entries
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses, writes, purged, entries = self.hits, self.misses, self.writes, self.purged, self.entries
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+            "entries": entries,
+            "writes": writes,
+            "purged": purged,
+        }
+
+
+class MemoryTTLStore:
+    """
+    In-process counterpart of SQLiteTTLStore with the same interface, bounded to
+    `max_entries` (least recently used entries are dropped first). Values are kept as
+    JSON so callers always get their own copy, as with the other stores.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        _stores.add(self)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return True, json.loads(entry[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (json.dumps(value), expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found = {}
+        for key in dict.fromkeys(keys):
+            hit, value = self.get(key)
+            if hit:
+                found[key] = value
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None):
+        for key, value in items.items():
+            self.set(key, value, ttl=ttl)
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.time())
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, expires_at) in self._entries.items() if expires_at is not None and expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses, entries = self.hits, self.misses, len(self._entries)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+
+class RedisTTLStore:
+    """
+    SQLiteTTLStore interface over any client speaking the redis-py subset used here
+    (get, set with ex=, exists, delete, scan_iter), e.g. redis.Redis or a local stand-in.
+    Keys are namespaced as "<namespace>:<key>"; expiry is left to the server, and stats()
+    reports this process's counters only (no key scan per scrape).
+    """
+
+    def __init__(self, client, namespace: str):
+        self.client = client
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        raw = self.client.get(self._key(key))
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return (False, None) if raw is None else (True, json.loads(raw))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ex = max(1, math.ceil(ttl)) if ttl is not None else None
+        self.client.set(self._key(key), json.dumps(value), ex=ex)
+        with self._lock:
+            self.writes += 1
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found = {}
+        for key in dict.fromkeys(keys):
+            hit, value = self.get(key)
+            if hit:
+                found[key] = value
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None):
+        for key, value in items.items():
+            self.set(key, value, ttl=ttl)
+
+    def contains(self, key: str) -> bool:
+        return bool(self.client.exists(self._key(key)))
+
+    def delete(self, key: str):
+        self.client.delete(self._key(key))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f"{self.namespace}:*"))
+        if keys:
+            self.client.delete(*keys)
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def purge_expired(self) -> int:
+        return 0  # the server drops expired keys itself
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses, writes = self.hits, self.misses, self.writes
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+            "writes": writes,
+        }
+
+
+def create_store(backend: str, table: str, path: Optional[str] = None, redis_url: Optional[str] = None, max_entries: int = 1024):
+    """
+    Builds a TTL store by name: "memory" (per process), "sqlite" (file shared by all
+    workers on the host) or "redis" (shared across hosts, needs the redis package).
+    """
+    if backend == "memory":
+        return MemoryTTLStore(max_entries=max_entries)
+    if backend == "sqlite":
+        return SQLiteTTLStore(path, table=table)
+    if backend == "redis":
+        import redis  # optional dependency, only needed for this backend
+        return RedisTTLStore(redis.Redis.from_url(redis_url), namespace=table)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+class StaleWhileRevalidateCache:
+    """
+    Freshness layer over a TTL store. An entry is fresh for `ttl` seconds, then served as
+    stale for up to `stale_ttl` more while one caller refreshes it. Negative results
+    (the caller's error fallback) are kept for `negative_ttl` only and never served stale.
+    """
+
+    def __init__(self, store, ttl: float, stale_ttl: float, negative_ttl: float):
+        self.store = store
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._counts = {"fresh": 0, "stale": 0, "negative": 0, "miss": 0, "refreshes": 0}
+
+    def lookup(self, key: str) -> Tuple[str, Any]:
+        """
+        Returns (state, value) with state "fresh", "stale", "negative" or "miss".
+        """
+        found, entry = self.store.get(key)
+        if not found:
+            state, value = "miss", None
+        elif entry["negative"]:
+            state, value = "negative", entry["value"]
+        elif entry["fresh_until"] > time.time():
+            state, value = "fresh", entry["value"]
+        else:
+            state, value = "stale", entry["value"]
+
+        with self._lock:
+            self._counts[state] += 1
+        return state, value
+
+    def put(self, key: str, value: Any):
+        entry = {"value": value, "fresh_until": time.time() + self.ttl, "negative": False}
+        self.store.set(key, entry, ttl=self.ttl + self.stale_ttl)
+
+    def put_negative(self, key: str, value: Any):
+        # A stale positive entry is better than a fresh error: keep it
+        found, entry = self.store.get(key)
+        if found and not entry["negative"]:
+            return
+        self.store.set(key, {"value": value, "fresh_until": 0, "negative": True}, ttl=self.negative_ttl)
+
+    def begin_refresh(self, key: str) -> bool:
+        """
+        True if the caller should refresh `key`; False if another caller already is.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._counts["refreshes"] += 1
+            return True
+
+    def end_refresh(self, key: str):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        self.store.clear()
+        with self._lock:
+            self._refreshing.clear()
+            self._counts = dict.fromkeys(self._counts, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        served = counts["fresh"] + counts["stale"] + counts["negative"]
+        total = served + counts["miss"]
+        store_stats = self.store.stats()
+        stats = {**counts, "hit_ratio": served / total if total else 0.0}
+        if "entries" in store_stats:  # not tracked by the Redis store
+            stats["entries"] = store_stats["entries"]
+        return stats
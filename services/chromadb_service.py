@@ -1,39 +1,188 @@
-import chromadb
-from typing import List, Tuple, Literal
-from config import CHROMA_DB_PATH, MODEL_NAME
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Tuple, Literal
+from config import (
+    CHROMA_DB_PATH,
+    MODEL_NAME,
+    MULTILINGUAL_MODEL_NAME,
+    NACE_TR_COLLECTION,
+    TR_SCORE_THRESHOLD,
+    SEARCH_BACKEND,
+    NUMPY_INDEX_PATH,
+)
+from services.embedding_service import get_encoder
+from services.search_client import sidecar_enabled, sidecar_search, sidecar_status, cached_sidecar_status
+from services.encoder_backends import load_encoder_model
+from services.search_backends import load_or_build_numpy_index
+from utils.log_utils import get_logger
+from utils.metrics import timed
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
-# ChromaDB Collection
-client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
-collection = client.get_or_create_collection(name="nace_codes", metadata={"hnsw:space": "cosine"})
 
-model = SentenceTransformer(MODEL_NAME)
+logger = get_logger(__name__)
 
+# The Chroma client, the collections and the query model are created on first use, normally
+# by load_search_resources() from the app lifespan, so importing this module stays cheap
+# (no torch, no Chroma) for the tests, the CLI tools and the other routes.
+_client = None
+_collection = None
+_search_collection = None
+_tr_collection = None
+_model = None
+_load_lock = threading.RLock()
+_model_lock = threading.Lock()
+_ready = False
 
-def semantic_search(query: str,
-                    top_k: int = 3,
-                    *,
-                    _model = model,
-                    _collection = collection,
-                    score_threshold: float = 0.88,
-                    )-> Tuple[List[dict], Literal["no_hits","threshold","ok"]]:
-    # Create the query embedding
-    query_embedding = _model.encode(query).tolist()
-    # Return top_k * 4 matches
-    raw = _collection.query(
-        query_embeddings=[query_embedding],
-        n_results=top_k * 4,
-    )
+# The multilingual model is only loaded once a Turkish query needs it
+_multilingual_model = None
+_multilingual_lock = threading.Lock()
+_tr_index_ready = False
+
+# Encoded at startup in both batch and single-query shapes
+WARMUP_QUERIES = [
+    "plumber",
+    "car repair and maintenance",
+    "someone to fix the air conditioning in my office before the weekend",
+]
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        with _load_lock:
+            if _client is None:
+                import chromadb
+                _client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
+    return _client
+
+
+def get_collection():
+    """
+    The English NACE collection in Chroma.
+    """
+    global _collection
+    if _collection is None:
+        with _load_lock:
+            if _collection is None:
+                _collection = _get_client().get_or_create_collection(name="nace_codes", metadata={"hnsw:space": "cosine"})
+    return _collection
+
+
+def get_search_collection():
+    """
+    Backend that answers NACE queries: "chroma" (HNSW) or "numpy" (exact, in-process, memory-mapped).
+    """
+    global _search_collection
+    if _search_collection is None:
+        with _load_lock:
+            if _search_collection is None:
+                if SEARCH_BACKEND == "numpy":
+                    _search_collection = load_or_build_numpy_index(get_collection(), NUMPY_INDEX_PATH)
+                else:
+                    _search_collection = get_collection()
+    return _search_collection
+
+
+def get_tr_collection(create: bool = False):
+    """
+    Turkish embeddings of the same NACE descriptions. Only services/nace_index_builder.py
+    creates the collection (`create=True`); otherwise a missing collection raises.
+    """
+    global _tr_collection
+    if _tr_collection is None:
+        with _load_lock:
+            if _tr_collection is None:
+                if create:
+                    _tr_collection = _get_client().get_or_create_collection(name=NACE_TR_COLLECTION, metadata={"hnsw:space": "cosine"})
+                else:
+                    _tr_collection = _get_client().get_collection(name=NACE_TR_COLLECTION)
+    return _tr_collection
+
+
+def _open_turkish_index() -> bool:
+    """
+    True when the Turkish collection exists and has entries.
+    """
+    from chromadb.errors import ChromaError
+
+    try:
+        return get_tr_collection().count() > 0
+    except (ChromaError, ValueError) as e:
+        # Not built yet (NotFoundError, or ValueError on older Chroma releases)
+        logger.info("Turkish NACE index not built, Turkish queries are translated", extra={"error": str(e)})
+        return False
+
+
+def get_model():
+    """
+    The NACE query model: torch or the exported ONNX / int8 model, depending on ENCODER_BACKEND.
+    """
+    global _model
+    if _model is None:
+        # Own lock: a slow model load never holds up the collection accessors. Callers wait here
+        # on a worker thread (startup warm-up, inference pool), never on the event loop.
+        with _model_lock:
+            if _model is None:
+                model = load_encoder_model(MODEL_NAME)
+                get_encoder(model, name="nace")
+                _model = model
+    return _model
+
+
+def _warm_up(model, collection):
+    vectors = model.encode(WARMUP_QUERIES)
+    for query in WARMUP_QUERIES:
+        model.encode(query)
+    collection.query(query_embeddings=[vectors[0].tolist()], n_results=12)
+
+
+def load_search_resources() -> Dict[str, float]:
+    """
+    Loads the query model and the NACE indexes, then runs warm-up encodes and searches so the
+    first request does not pay for kernel selection, allocator growth or loading HNSW segments.
+    Warm-up calls the model directly, leaving the query embedding cache empty.
+    Returns the seconds spent per step.
+    With a search sidecar configured nothing is loaded here: the sidecar owns the model and index.
+    """
+    global _ready, _tr_index_ready
+    if sidecar_enabled():
+        return {}
+
+    timings = {}
+
+    start = time.perf_counter()
+    model = get_model()
+    timings["model_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    collection = get_search_collection()
+    turkish_index = _open_turkish_index()
+    timings["index_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _warm_up(model, collection)
+    if turkish_index:
+        _warm_up(get_multilingual_model(), get_tr_collection())
+        _tr_index_ready = True
+    timings["warmup_s"] = time.perf_counter() - start
+
+    _ready = True
+    return timings
 
-    # Store metadata for processing
-    ids, dists, docs, metas = (
-        raw["ids"][0],
-        raw["distances"][0],
-        raw["documents"][0],
-        raw["metadatas"][0],
-    )
 
+def search_status() -> Dict[str, bool]:
+    """
+    Readiness of the NACE search: model and index loaded, and warm-up finished.
+    """
+    if sidecar_enabled():
+        status = sidecar_status()
+        return {key: bool(status.get(key)) for key in ("model", "index", "warm")}
+    return {"model": _model is not None, "index": _search_collection is not None, "warm": _ready}
+
+
+def _filter_hits(ids, dists, docs, metas, top_k: int, score_threshold: float) -> Tuple[List[dict], Literal["no_hits","threshold","ok"]]:
     if not ids:
         return [], "no_hits"
 
@@ -49,6 +198,125 @@ def semantic_search(query: str,
     if not results:
         return [], "threshold"
 
-    print(results) # Display the results
-
     return results, "ok"
+
+
+def semantic_search(query: str,
+                    top_k: int = 3,
+                    *,
+                    _model = None,
+                    _collection = None,
+                    score_threshold: float = 0.88,
+                    )-> Tuple[List[dict], Literal["no_hits","threshold","ok"]]:
+    if _model is None and _collection is None and sidecar_enabled():
+        return sidecar_search([query], top_k, "en", score_threshold)[0]
+
+    _model = _model if _model is not None else get_model()
+    _collection = _collection if _collection is not None else get_search_collection()
+    # Create the query embedding (cached per normalized query, micro-batched with concurrent requests)
+    query_embedding = get_encoder(_model).encode(query).tolist()
+    # Return top_k * 4 matches
+    with timed("chroma_query", "single"):
+        raw = _collection.query(
+            query_embeddings=[query_embedding],
+            n_results=top_k * 4,
+        )
+
+    # Keep up to top_k hits within the threshold
+    results, status = _filter_hits(
+        raw["ids"][0],
+        raw["distances"][0],
+        raw["documents"][0],
+        raw["metadatas"][0],
+        top_k,
+        score_threshold,
+    )
+
+    if status == "ok":
+        logger.debug("semantic_search results", extra={"query": query, "results": results})
+
+    return results, status
+
+
+def semantic_search_batch(queries: List[str],
+                          top_k: int = 3,
+                          *,
+                          _model = None,
+                          _collection = None,
+                          score_threshold: float = 0.88,
+                          ) -> List[Tuple[List[dict], Literal["no_hits","threshold","ok"]]]:
+    """
+    semantic_search for many queries at once: one encode batch and one collection.query
+    with all embeddings. Returns a (results, status) pair per query, in input order.
+    """
+    if not queries:
+        return []
+    if _model is None and _collection is None and sidecar_enabled():
+        return sidecar_search(queries, top_k, "en", score_threshold)
+
+    _model = _model if _model is not None else get_model()
+    _collection = _collection if _collection is not None else get_search_collection()
+    embeddings = [vector.tolist() for vector in get_encoder(_model).encode_many(queries)]
+    with timed("chroma_query", "batch"):
+        raw = _collection.query(
+            query_embeddings=embeddings,
+            n_results=top_k * 4,
+        )
+
+    return [
+        _filter_hits(ids, dists, docs, metas, top_k, score_threshold)
+        for ids, dists, docs, metas in zip(raw["ids"], raw["distances"], raw["documents"], raw["metadatas"])
+    ]
+
+
+def get_multilingual_model() -> "SentenceTransformer":
+    global _multilingual_model
+    if _multilingual_model is None:
+        with _multilingual_lock:
+            if _multilingual_model is None:
+                from sentence_transformers import SentenceTransformer
+                _multilingual_model = SentenceTransformer(MULTILINGUAL_MODEL_NAME)
+                get_encoder(_multilingual_model, name="nace_tr")
+    return _multilingual_model
+
+
+def turkish_index_ready() -> bool:
+    """
+    True once load_search_resources has found and warmed up a built Turkish index (a Turkish
+    index built later is used after a restart). Never waits on I/O: routes call this on the event
+    loop, and with a sidecar the last status it reported is used.
+    """
+    global _tr_index_ready
+    if not _tr_index_ready and sidecar_enabled():
+        _tr_index_ready = bool(cached_sidecar_status().get("turkish_index"))
+    return _tr_index_ready
+
+
+def semantic_search_turkish(query: str, top_k: int = 3) -> Tuple[List[dict], Literal["no_hits","threshold","ok"]]:
+    """
+    Searches a Turkish query directly against the Turkish NACE collection, no translation needed.
+    Result metadata keeps the English "category", like the English collection.
+    """
+    if sidecar_enabled():
+        return sidecar_search([query], top_k, "tr")[0]
+    return semantic_search(
+        query,
+        top_k,
+        _model=get_multilingual_model(),
+        _collection=get_tr_collection(),
+        score_threshold=TR_SCORE_THRESHOLD,
+    )
+
+
+def semantic_search_turkish_batch(queries: List[str], top_k: int = 3) -> List[Tuple[List[dict], Literal["no_hits","threshold","ok"]]]:
+    if not queries:
+        return []
+    if sidecar_enabled():
+        return sidecar_search(queries, top_k, "tr")
+    return semantic_search_batch(
+        queries,
+        top_k,
+        _model=get_multilingual_model(),
+        _collection=get_tr_collection(),
+        score_threshold=TR_SCORE_THRESHOLD,
+    )
@@ -1,46 +1,113 @@
+import asyncio
 import requests
+import httpx
 import concurrent.futures
 import time
-from typing import List, Dict, Union
-from functools import lru_cache
-from config import GOOGLE_API_KEY
+from typing import AsyncIterator, List, Dict, Union, Optional
+from config import (
+    GOOGLE_API_KEY,
+    CACHE_DB_PATH,
+    GEOCODE_CACHE_TTL,
+    GEOCODE_NEGATIVE_TTL,
+    ROUTES_TOP_K,
+    ROUTES_MAX_ELEMENTS,
+    ESTIMATED_SPEED_KMH,
+    ROUTE_CACHE_PRECISION,
+    ROUTE_CACHE_TTL,
+)
+from services import http_client
+from services.cache_store import SQLiteTTLStore
+from services.external_api_service import fetch_suppliers
+from services.single_flight import get_single_flight
+from utils.geo_utils import haversine_km, nearest_indices, geohash
+from utils.log_utils import get_logger, setup_logging
+from utils.metrics import timed
 import re
 
 
-@lru_cache(maxsize=1000)
-def get_lat_lng(address: str) -> Dict[str, float]:
-    address = re.sub(r"[^a-zA-Z0-9 ]", "", address.strip().lower())  # normalize for caching
-    start = time.time()
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search"
+ROUTES_MATRIX_URL = "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix"
+OSM_HEADERS = {"User-Agent": "AraBul-Location-Service"}
+
+logger = get_logger(__name__)
+
+# Durable geocode cache shared by all workers; failed lookups are cached for GEOCODE_NEGATIVE_TTL only
+geocode_store = SQLiteTTLStore(CACHE_DB_PATH, table="geocode")
+
+# Driving distance/duration per (user geohash cell, supplier coordinates)
+route_store = SQLiteTTLStore(CACHE_DB_PATH, table="route_eta")
+
+# Cache misses for the same address in flight at the same time share one lookup
+geocode_flight = get_single_flight("geocode")
 
-    geocode_url = "https://maps.googleapis.com/maps/api/geocode/json"
-    params = {
+
+def _normalize_address(address: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9 ]", "", address.strip().lower())
+
+
+def _geocode_params(address: str) -> Dict[str, str]:
+    return {
         "address": address,
         "key": GOOGLE_API_KEY,
         "region": "cy",
         "components": "country:CY",
     }
 
+
+# Statuses that say the address does not resolve; anything else but OK is a transient failure
+GEOCODE_CACHEABLE_STATUSES = ("OK", "ZERO_RESULTS")
+
+
+def _parse_geocode(data: Dict) -> Optional[Dict[str, float]]:
+    if data.get("status") == "OK":
+        location = data["results"][0]["geometry"]["location"]
+        return {"latitude": location["lat"], "longitude": location["lng"]}
+    return None
+
+
+def _store_geocode(address: str, coords: Optional[Dict[str, float]]):
+    ttl = GEOCODE_CACHE_TTL if coords else GEOCODE_NEGATIVE_TTL
+    geocode_store.set(address, coords, ttl=ttl)
+
+
+def get_lat_lng(address: str) -> Dict[str, float]:
+    address = _normalize_address(address)  # normalize for caching
+    found, cached = geocode_store.get(address)
+    if found:
+        return cached
+
+    # Concurrent lookups of the same address share one Google request
+    return geocode_flight.do(address, _resolve_lat_lng, address)
+
+
+def _resolve_lat_lng(address: str) -> Optional[Dict[str, float]]:
     try:
-        response = requests.get(geocode_url, params=params, timeout=5)
+        with timed("geocode", "google"):
+            response = requests.get(GEOCODE_URL, params=_geocode_params(address), timeout=5)
         response.raise_for_status()
         data = response.json()
+        if data.get("status") not in GEOCODE_CACHEABLE_STATUSES:
+            # OVER_QUERY_LIMIT, REQUEST_DENIED, UNKNOWN_ERROR... are not cached
+            logger.warning("Google geocoding failed", extra={"address": address, "status": data.get("status")})
+            return None
+        coords = _parse_geocode(data)
 
-        if data.get("status") == "OK":
-            location = data["results"][0]["geometry"]["location"]
-            print(f"get_lat_lng resolved '{address}' via Google in {round(time.time() - start, 2)} sec")
-            return {"latitude": location["lat"], "longitude": location["lng"]}
+        if coords:
+            logger.debug("geocoded via Google", extra={"address": address})
         else:
-            print(f"Google Geocoding returned no results for: '{address}', falling back to OSM.")
-            fallback = get_location_osm_backup(address)
-            if fallback:
-                return fallback
-            else:
-                print(f"OSM fallback also failed for address: {address}")
-                return None
+            logger.info("Google geocoding returned no results, falling back to OSM", extra={"address": address})
+            coords = get_location_osm_backup(address)
+            if not coords:
+                logger.warning("OSM fallback also failed", extra={"address": address})
     except requests.exceptions.RequestException as e:
-        print(f"Google Geocoding API Error: {e}")
+        # Transient errors (Google or OSM) are not cached
+        logger.warning("geocoding request failed", extra={"address": address, "error": str(e)})
         return None
 
+    _store_geocode(address, coords)
+    return coords
+
 """
 Dummy Function for test purposes
 @lru_cache(maxsize=1000)
@@ -49,39 +116,249 @@ def get_lat_lng(address: str) -> Dict[str, float]:
 """
 
 
-@lru_cache(maxsize=1000)
+@timed("geocode", "osm")
 def get_location_osm_backup(address: str) -> Dict[str, float]:
     """
     Resolves an address to latitude and longitude using OpenStreetMap Nominatim API.
-    Uses cache to prevent repeated external calls.
+    Returns None when OSM has no result and raises RequestException when the request fails,
+    so get_lat_lng (the only caller) caches the first and not the second.
     """
-    start = time.time()
-    url = f"https://nominatim.openstreetmap.org/search?q={address}&format=json&limit=1"
-    headers = {"User-Agent": "AraBul-Location-Service"}
+    url = f"{NOMINATIM_SEARCH_URL}?q={address}&format=json&limit=1"
 
+    response = requests.get(url, headers=OSM_HEADERS, timeout=5)
+    response.raise_for_status()
+    data = response.json()
+    if data:
+        logger.debug("geocoded via OSM", extra={"address": address})
+        return {"latitude": float(data[0]["lat"]), "longitude": float(data[0]["lon"])}
+
+    return None
+
+
+async def get_lat_lng_async(address: str) -> Optional[Dict[str, float]]:
+    """
+    Non-blocking variant of get_lat_lng that goes through the shared async HTTP client.
+    """
+    address = _normalize_address(address)
+    # SQLite is blocking I/O, keep it off the event loop
+    found, cached = await asyncio.to_thread(geocode_store.get, address)
+    if found:
+        return cached
+
+    return await geocode_flight.do_async(address, _resolve_lat_lng_async, address)
+
+
+async def _resolve_lat_lng_async(address: str) -> Optional[Dict[str, float]]:
     try:
-        response = requests.get(url, headers=headers, timeout=5)
+        with timed("geocode", "google"):
+            response = await http_client.request("GET", GEOCODE_URL, params=_geocode_params(address), timeout=5)
         response.raise_for_status()
         data = response.json()
-        if data:
-            print(f"get_location_osm_backup resolved '{address}' via OSM in {round(time.time() - start, 2)} sec")
-            return {"latitude": float(data[0]["lat"]), "longitude": float(data[0]["lon"])}
-    except requests.exceptions.RequestException as e:
-        print(f"OSM API Error: {e}")
+        if data.get("status") not in GEOCODE_CACHEABLE_STATUSES:
+            logger.warning("Google geocoding failed", extra={"address": address, "status": data.get("status")})
+            return None
+        coords = _parse_geocode(data)
 
-    return None
+        if coords:
+            logger.debug("geocoded via Google", extra={"address": address})
+        else:
+            logger.info("Google geocoding returned no results, falling back to OSM", extra={"address": address})
+            coords = await get_location_osm_backup_async(address)
+            if not coords:
+                logger.warning("OSM fallback also failed", extra={"address": address})
+    except httpx.HTTPError as e:
+        logger.warning("geocoding request failed", extra={"address": address, "error": str(e)})
+        return None
 
+    await asyncio.to_thread(_store_geocode, address, coords)
+    return coords
 
-def get_distance_matrix(user_lat: float, user_lng: float, suppliers: List[Dict]) -> List[Dict]:
-    start = time.time()
 
-    base_url = "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix"
-    headers = {
+@timed("geocode", "osm")
+async def get_location_osm_backup_async(address: str) -> Optional[Dict[str, float]]:
+    """
+    Non-blocking variant of get_location_osm_backup; raises httpx.HTTPError when the request fails.
+    """
+    params = {"q": address, "format": "json", "limit": 1}
+
+    response = await http_client.request("GET", NOMINATIM_SEARCH_URL, params=params,
+                                         headers=OSM_HEADERS, timeout=5)
+    response.raise_for_status()
+    data = response.json()
+    if data:
+        logger.debug("geocoded via OSM", extra={"address": address})
+        return {"latitude": float(data[0]["lat"]), "longitude": float(data[0]["lon"])}
+
+    return None
+
+
+def _route_matrix_headers() -> Dict[str, str]:
+    return {
         "Content-Type": "application/json",
         "X-Goog-Api-Key": GOOGLE_API_KEY,
         "X-Goog-FieldMask": "originIndex,destinationIndex,distanceMeters,duration"
     }
 
+
+def _route_matrix_payload(user_lat: float, user_lng: float, suppliers: List[Dict]) -> Dict:
+    destinations = [
+        {"waypoint": {"location": {"latLng": {"latitude": s["latitude"], "longitude": s["longitude"]}}}}
+        for s in suppliers
+    ]
+    return {
+        "origins": [{"waypoint": {"location": {"latLng": {"latitude": user_lat, "longitude": user_lng}}}}],
+        "destinations": destinations,
+        "travelMode": "DRIVE"
+    }
+
+
+def _apply_route_rows(suppliers: List[Dict], data) -> bool:
+    """
+    Writes distance_km/duration from a computeRouteMatrix response onto the suppliers.
+    Returns False when the response is an API error.
+    """
+    if "error" in data or not isinstance(data, list):
+        logger.warning("Google Routes API returned an error", extra={"response": data})
+        return False
+
+    for row in data:
+        if "destinationIndex" in row and row["destinationIndex"] < len(suppliers):
+            suppliers[row["destinationIndex"]].update({
+                "distance_km": row.get("distanceMeters", 0) / 1000,
+                "duration": format_duration(int(row.get("duration", "0s").replace("s", "")))
+            })
+    return True
+
+
+def _select_for_routing(user_lat: float, user_lng: float, suppliers: List[Dict]) -> List[Dict]:
+    """
+    Ranks geocoded suppliers by straight-line distance and returns the ROUTES_TOP_K nearest,
+    which are the only ones sent to the Routes API. The others get a great-circle
+    distance_km, a duration estimated at ESTIMATED_SPEED_KMH and distance_estimated=True.
+    """
+    if user_lat is None or user_lng is None or len(suppliers) <= ROUTES_TOP_K:
+        return suppliers
+
+    distances = haversine_km(
+        user_lat, user_lng,
+        [s["latitude"] for s in suppliers],
+        [s["longitude"] for s in suppliers],
+    )
+    nearest = nearest_indices(distances, ROUTES_TOP_K)
+    nearest_set = set(nearest.tolist())
+
+    for i, supplier in enumerate(suppliers):
+        if i not in nearest_set:
+            supplier.update({
+                "distance_km": round(float(distances[i]), 2),
+                "duration": format_duration(int(distances[i] / ESTIMATED_SPEED_KMH * 3600)),
+                "distance_estimated": True,
+            })
+
+    return [suppliers[i] for i in nearest]
+
+
+def _supplier_key(supplier: Dict) -> str:
+    """
+    Identity of a destination across sectors: the SupplierID, or the normalized address.
+    """
+    supplier_id = supplier.get("SupplierID")
+    return str(supplier_id) if supplier_id not in (None, "") else _normalize_address(supplier.get("Address", ""))
+
+
+def _unique_suppliers(sector_lists: List[List[Dict]]) -> Dict[str, Dict]:
+    unique = {}
+    for suppliers in sector_lists:
+        for s in suppliers:
+            unique.setdefault(_supplier_key(s), s)
+    return unique
+
+
+def _with_coordinates(sector_lists: List[List[Dict]], unique: Dict[str, Dict]) -> List[List[Dict]]:
+    """
+    Copies the resolved coordinates to every occurrence of a supplier and drops the
+    suppliers that could not be geocoded.
+    """
+    result = []
+    for suppliers in sector_lists:
+        located = []
+        for s in suppliers:
+            resolved = unique[_supplier_key(s)]
+            if "latitude" in resolved and "longitude" in resolved:
+                s.update({"latitude": resolved["latitude"], "longitude": resolved["longitude"]})
+                located.append(s)
+        result.append(located)
+    return result
+
+
+def _routing_plan(user_lat: float, user_lng: float, sector_lists: List[List[Dict]]) -> Dict[str, Dict]:
+    """
+    Pre-ranks each sector and returns the deduplicated destinations to send to the Routes API.
+    """
+    routed = {}
+    for suppliers in sector_lists:
+        for s in _select_for_routing(user_lat, user_lng, suppliers):
+            routed.setdefault(_supplier_key(s), s)
+    return routed
+
+
+def _route_chunks(destinations: List[Dict]) -> List[List[Dict]]:
+    # One origin, so each destination is one matrix element
+    return [destinations[i:i + ROUTES_MAX_ELEMENTS] for i in range(0, len(destinations), ROUTES_MAX_ELEMENTS)]
+
+
+def _route_cache_key(user_cell: str, supplier: Dict) -> str:
+    return f"{user_cell}|{supplier['latitude']:.5f},{supplier['longitude']:.5f}"
+
+
+def _apply_cached_routes(user_lat: float, user_lng: float, destinations: List[Dict]) -> List[Dict]:
+    """
+    Fills distance_km/duration from the route cache and returns the destinations
+    that still need a Routes API lookup.
+    """
+    if user_lat is None or user_lng is None:
+        return destinations
+
+    user_cell = geohash(user_lat, user_lng, ROUTE_CACHE_PRECISION)
+    cached = route_store.get_many([_route_cache_key(user_cell, s) for s in destinations])
+    missing = []
+    for s in destinations:
+        key = _route_cache_key(user_cell, s)
+        if key in cached:
+            s.update(cached[key])
+        else:
+            missing.append(s)
+    return missing
+
+
+def _store_routes(user_lat: float, user_lng: float, destinations: List[Dict]):
+    if user_lat is None or user_lng is None:
+        return
+
+    # One transaction for all rows
+    user_cell = geohash(user_lat, user_lng, ROUTE_CACHE_PRECISION)
+    route_store.set_many({
+        _route_cache_key(user_cell, s): {"distance_km": s["distance_km"], "duration": s["duration"]}
+        for s in destinations
+        if "distance_km" in s and not s.get("distance_estimated")
+    }, ttl=ROUTE_CACHE_TTL)
+
+
+def _fan_out(sector_lists: List[List[Dict]], routed: Dict[str, Dict]):
+    """
+    Copies the driving distance of every routed destination to all its occurrences,
+    replacing straight-line estimates where a sector ranked the supplier lower.
+    """
+    for suppliers in sector_lists:
+        for s in suppliers:
+            resolved = routed.get(_supplier_key(s))
+            if resolved is None or resolved is s or "distance_km" not in resolved:
+                continue
+            s.update({"distance_km": resolved["distance_km"], "duration": resolved["duration"]})
+            s.pop("distance_estimated", None)
+
+
+def _geocode_suppliers(suppliers: List[Dict]):
     # Resolve coordinates in parallel
     with concurrent.futures.ThreadPoolExecutor(max_workers=60) as executor:
         future_results = {executor.submit(get_lat_lng, s["Address"]): s for s in suppliers}
@@ -90,43 +367,179 @@ def get_distance_matrix(user_lat: float, user_lng: float, suppliers: List[Dict])
             if coords:
                 future_results[future].update(coords)
 
-    # Remove suppliers with missing coordinates
-    suppliers = [s for s in suppliers if "latitude" in s and "longitude" in s]
-    if not suppliers:
-        print("No valid suppliers found with latitude/longitude.")
-        return []
 
-    # Prepare Google Routes API request
-    destinations = [
-        {"waypoint": {"location": {"latLng": {"latitude": s["latitude"], "longitude": s["longitude"]}}}}
-        for s in suppliers
-    ]
+async def _cached_geocodes(suppliers: List[Dict]) -> Dict[str, Optional[Dict[str, float]]]:
+    # One query in a worker thread for all the addresses, instead of one per supplier on the loop
+    return await asyncio.to_thread(geocode_store.get_many, [_normalize_address(s["Address"]) for s in suppliers])
 
-    payload = {
-        "origins": [{"waypoint": {"location": {"latLng": {"latitude": user_lat, "longitude": user_lng}}}}],
-        "destinations": destinations,
-        "travelMode": "DRIVE"
-    }
 
+async def _geocode_async(supplier: Dict, cached: Dict[str, Optional[Dict[str, float]]]) -> Dict:
+    address = _normalize_address(supplier["Address"])
+    coords = cached[address] if address in cached else await get_lat_lng_async(supplier["Address"])
+    if coords:
+        supplier.update(coords)
+    return supplier
+
+
+async def _geocode_suppliers_async(suppliers: List[Dict]):
+    cached = await _cached_geocodes(suppliers)
+    await asyncio.gather(*(_geocode_async(s, cached) for s in suppliers))
+
+
+def _request_route_matrix(user_lat: float, user_lng: float, destinations: List[Dict]):
+    for chunk in _route_chunks(destinations):
+        payload = _route_matrix_payload(user_lat, user_lng, chunk)
+        try:
+            with timed("route_matrix"):
+                response = requests.post(ROUTES_MATRIX_URL, headers=_route_matrix_headers(), json=payload, timeout=10)
+            response.raise_for_status()
+            _apply_route_rows(chunk, response.json())
+        except requests.exceptions.RequestException as e:
+            logger.warning("Google Routes API request failed", extra={"error": str(e)})
+
+
+async def _request_route_chunk_async(user_lat: float, user_lng: float, chunk: List[Dict]) -> List[Dict]:
+    payload = _route_matrix_payload(user_lat, user_lng, chunk)
     try:
-        response = requests.post(base_url, headers=headers, json=payload, timeout=10)
+        with timed("route_matrix"):
+            response = await http_client.request("POST", ROUTES_MATRIX_URL, headers=_route_matrix_headers(),
+                                                 json=payload, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        _apply_route_rows(chunk, response.json())
+    except httpx.HTTPError as e:
+        logger.warning("Google Routes API request failed", extra={"error": str(e)})
+    return chunk
 
-        if "error" in data or not isinstance(data, list):
-            print("Google Routes API Error:", data)
-            return suppliers
 
-        for i, row in enumerate(data):
-            if "destinationIndex" in row and row["destinationIndex"] < len(suppliers):
-                suppliers[row["destinationIndex"]].update({
-                    "distance_km": row.get("distanceMeters", 0) / 1000,
-                    "duration": format_duration(int(row.get("duration", "0s").replace("s", "")))
-                })
-    except requests.exceptions.RequestException as e:
-        print(f"Google Routes API Error: {e}")
+async def _request_route_matrix_async(user_lat: float, user_lng: float, destinations: List[Dict]):
+    await asyncio.gather(*(_request_route_chunk_async(user_lat, user_lng, chunk)
+                           for chunk in _route_chunks(destinations)))
+
+
+def enrich_sectors(user_lat: float, user_lng: float, sector_lists: List[List[Dict]]) -> List[List[Dict]]:
+    """
+    Geocodes and routes the suppliers of several sectors at once: each distinct supplier is
+    geocoded once and all sectors share a single (chunked) Routes API matrix request.
+    Returns the sector lists without the suppliers that could not be geocoded.
+    """
+    start = time.time()
+
+    unique = _unique_suppliers(sector_lists)
+    _geocode_suppliers(list(unique.values()))
+    sector_lists = _with_coordinates(sector_lists, unique)
+
+    routed = _routing_plan(user_lat, user_lng, sector_lists)
+    pending = _apply_cached_routes(user_lat, user_lng, list(routed.values()))
+    if pending:
+        _request_route_matrix(user_lat, user_lng, pending)
+        _store_routes(user_lat, user_lng, pending)
+    _fan_out(sector_lists, routed)
+
+    logger.info("enrich_sectors", extra={"suppliers": len(unique), "routed": len(routed),
+                                         "routes_requested": len(pending), "duration_s": round(time.time() - start, 2)})
+    return sector_lists
+
+
+async def enrich_sectors_async(user_lat: float, user_lng: float, sector_lists: List[List[Dict]]) -> List[List[Dict]]:
+    """
+    Non-blocking variant of enrich_sectors using the shared async HTTP client.
+    """
+    start = time.time()
+
+    unique = _unique_suppliers(sector_lists)
+    await _geocode_suppliers_async(list(unique.values()))
+    sector_lists = _with_coordinates(sector_lists, unique)
+
+    routed = _routing_plan(user_lat, user_lng, sector_lists)
+    pending = await asyncio.to_thread(_apply_cached_routes, user_lat, user_lng, list(routed.values()))
+    if pending:
+        await _request_route_matrix_async(user_lat, user_lng, pending)
+        await asyncio.to_thread(_store_routes, user_lat, user_lng, pending)
+    _fan_out(sector_lists, routed)
+
+    logger.info("enrich_sectors_async", extra={"suppliers": len(unique), "routed": len(routed),
+                                               "routes_requested": len(pending), "duration_s": round(time.time() - start, 2)})
+    return sector_lists
+
+
+def _distance_event(supplier: Dict, distance_km: float, duration: str, estimated: bool) -> Dict:
+    return {
+        "event": "distance",
+        "SupplierID": supplier.get("SupplierID"),
+        "Address": supplier.get("Address"),
+        "distance_km": distance_km,
+        "duration": duration,
+        "distance_estimated": estimated,
+    }
+
+
+def _straight_line_event(user_lat: float, user_lng: float, supplier: Dict) -> Dict:
+    distance = float(haversine_km(user_lat, user_lng, [supplier["latitude"]], [supplier["longitude"]])[0])
+    return _distance_event(supplier, round(distance, 2),
+                           format_duration(int(distance / ESTIMATED_SPEED_KMH * 3600)), True)
+
+
+async def enrich_sectors_events(user_lat: float, user_lng: float, sector_lists: List[List[Dict]]) -> AsyncIterator[Dict]:
+    """
+    Streaming variant of enrich_sectors_async that yields progress events while it works:
+
+    - {"event": "distance", ...} with a straight-line estimate as soon as a supplier is geocoded,
+      then with the driving distance once it comes from the route cache or a matrix chunk
+    - {"event": "unresolved", ...} for a supplier that could not be geocoded
+    - {"event": "enriched", "data": sector_lists} once, with the same lists enrich_sectors_async returns
+
+    Suppliers are identified by SupplierID and Address; each distinct supplier is reported once per stage.
+    """
+    start = time.time()
+    has_origin = user_lat is not None and user_lng is not None
+
+    unique = _unique_suppliers(sector_lists)
+    cached = await _cached_geocodes(list(unique.values()))
 
-    print("get_distance_matrix latency:", round(time.time() - start, 2), "sec")
+    for next_geocoded in asyncio.as_completed([_geocode_async(s, cached) for s in unique.values()]):
+        supplier = await next_geocoded
+        if "latitude" not in supplier or "longitude" not in supplier:
+            yield {"event": "unresolved", "SupplierID": supplier.get("SupplierID"), "Address": supplier.get("Address")}
+        elif has_origin:
+            yield _straight_line_event(user_lat, user_lng, supplier)
+
+    sector_lists = _with_coordinates(sector_lists, unique)
+
+    routed = _routing_plan(user_lat, user_lng, sector_lists)
+    pending = await asyncio.to_thread(_apply_cached_routes, user_lat, user_lng, list(routed.values()))
+    pending_keys = {_supplier_key(s) for s in pending}
+    for s in routed.values():
+        if _supplier_key(s) not in pending_keys and "distance_km" in s:
+            yield _distance_event(s, s["distance_km"], s["duration"], False)
+
+    if pending:
+        chunks = [_request_route_chunk_async(user_lat, user_lng, chunk) for chunk in _route_chunks(pending)]
+        for next_chunk in asyncio.as_completed(chunks):
+            for s in await next_chunk:
+                if "distance_km" in s:
+                    yield _distance_event(s, s["distance_km"], s["duration"], False)
+        await asyncio.to_thread(_store_routes, user_lat, user_lng, pending)
+    _fan_out(sector_lists, routed)
+
+    logger.info("enrich_sectors_events", extra={"suppliers": len(unique), "routed": len(routed),
+                                                "routes_requested": len(pending), "duration_s": round(time.time() - start, 2)})
+    yield {"event": "enriched", "data": sector_lists}
+
+
+def get_distance_matrix(user_lat: float, user_lng: float, suppliers: List[Dict]) -> List[Dict]:
+    suppliers = enrich_sectors(user_lat, user_lng, [suppliers])[0]
+    if not suppliers:
+        logger.info("no suppliers with coordinates")
+    return suppliers
+
+
+async def get_distance_matrix_async(user_lat: float, user_lng: float, suppliers: List[Dict]) -> List[Dict]:
+    """
+    Non-blocking variant of get_distance_matrix.
+    """
+    suppliers = (await enrich_sectors_async(user_lat, user_lng, [suppliers]))[0]
+    if not suppliers:
+        logger.info("no suppliers with coordinates")
     return suppliers
 
 """
@@ -159,12 +572,97 @@ def sort_suppliers(suppliers: List[Dict]) -> List[Dict]:
 def process_suppliers(user_lat: float, user_lng: float, supplier_data: Union[Dict, List]) -> Dict:
     """
     Enriches and sorts supplier data by computing distances from the user.
+    All sectors are resolved together, with one Routes API round trip per request.
+    """
+    if isinstance(supplier_data, list):
+        supplier_data = {"data": supplier_data}
+
+    sectors = supplier_data.get("data", [])
+    enriched = enrich_sectors(user_lat, user_lng, [sector["Suppliers"] for sector in sectors])
+    for sector, suppliers in zip(sectors, enriched):
+        sector["Suppliers"] = sort_suppliers(suppliers)
+
+    return supplier_data
+
+
+async def process_suppliers_async(user_lat: float, user_lng: float, supplier_data: Union[Dict, List]) -> Dict:
+    """
+    Non-blocking variant of process_suppliers.
     """
     if isinstance(supplier_data, list):
         supplier_data = {"data": supplier_data}
 
-    for sector in supplier_data.get("data", []):
-        sector["Suppliers"] = get_distance_matrix(user_lat, user_lng, sector["Suppliers"])
-        sector["Suppliers"] = sort_suppliers(sector["Suppliers"])
+    sectors = supplier_data.get("data", [])
+    enriched = await enrich_sectors_async(user_lat, user_lng, [sector["Suppliers"] for sector in sectors])
+    for sector, suppliers in zip(sectors, enriched):
+        sector["Suppliers"] = sort_suppliers(suppliers)
 
     return supplier_data
+
+
+async def process_suppliers_events(user_lat: float, user_lng: float, supplier_data: Union[Dict, List]) -> AsyncIterator[Dict]:
+    """
+    Streaming variant of process_suppliers_async: yields the enrich_sectors_events progress
+    events, then {"event": "sorted", "data": ...} with the same payload process_suppliers_async returns.
+    """
+    if isinstance(supplier_data, list):
+        supplier_data = {"data": supplier_data}
+
+    sectors = supplier_data.get("data", [])
+    async for event in enrich_sectors_events(user_lat, user_lng, [sector["Suppliers"] for sector in sectors]):
+        if event["event"] != "enriched":
+            yield event
+            continue
+        for sector, suppliers in zip(sectors, event["data"]):
+            sector["Suppliers"] = sort_suppliers(suppliers)
+
+    yield {"event": "sorted", "data": supplier_data}
+
+
+def get_geocode_cache_stats() -> Dict:
+    return geocode_store.stats()
+
+
+def get_route_cache_stats() -> Dict:
+    stats = route_store.stats()
+    stats.update({"precision": ROUTE_CACHE_PRECISION, "ttl": ROUTE_CACHE_TTL})
+    return stats
+
+
+def warm_geocode_cache(nace_codes: List[str], cities: List[dict], max_workers: int = 8) -> Dict:
+    """
+    Pre-resolves every supplier address returned by the supplier list API so that
+    live requests hit the geocode cache. Addresses that are already cached are skipped.
+    """
+    supplier_data = fetch_suppliers(nace_codes, cities)
+    if isinstance(supplier_data, list):
+        supplier_data = {"data": supplier_data}
+    addresses = {
+        s["Address"]
+        for sector in supplier_data.get("data", [])
+        for s in sector.get("Suppliers", [])
+        if s.get("Address")
+    }
+    pending = [a for a in addresses if not geocode_store.contains(_normalize_address(a))]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        resolved = sum(1 for coords in executor.map(get_lat_lng, pending) if coords)
+
+    logger.info("warm_geocode_cache", extra={"addresses": len(addresses), "looked_up": len(pending), "resolved": resolved})
+    return {"addresses": len(addresses), "looked_up": len(pending), "resolved": resolved}
+
+
+if __name__ == "__main__":
+    # python -m services.distance_duration_service --nace I56.1 F43.2 --city Lefkoşa Girne
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Warm up the persistent geocode cache")
+    parser.add_argument("--nace", nargs="+", required=True)
+    parser.add_argument("--city", nargs="+", required=True)
+    args = parser.parse_args()
+
+    setup_logging()
+    for nace_code in args.nace:
+        for city in args.city:
+            warm_geocode_cache([nace_code], [{"City": city, "Regions": []}])
+    print(get_geocode_cache_stats())
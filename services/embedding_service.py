@@ -0,0 +1,252 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from config import (
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_MAX_BYTES,
+    ENCODER_BATCH_WINDOW_MS,
+    ENCODER_MAX_BATCH,
+)
+from utils.metrics import timed
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key for a query: case and whitespace differences map to the same embedding.
+    """
+    return " ".join(query.lower().split())
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU of query embeddings, bounded by entry count and by memory
+    (vector bytes plus key length).
+    """
+
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(key: str, vector: np.ndarray) -> int:
+        return vector.nbytes + len(key)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector: np.ndarray) -> np.ndarray:
+        """
+        Stores a read-only float32 copy of the vector and returns it.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._size(key, self._entries.pop(key))
+            self._entries[key] = vector
+            self._bytes += self._size(key, vector)
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                old_key, old_vector = self._entries.popitem(last=False)
+                self._bytes -= self._size(old_key, old_vector)
+                self.evictions += 1
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class _PendingEncode:
+    __slots__ = ("key", "text", "done", "result", "error", "finished", "promoted")
+
+    def __init__(self, key: str, text: str):
+        self.key = key
+        self.text = text
+        self.done = threading.Event()  # set when finished, or when promoted to leader
+        self.result = None
+        self.error = None
+        self.finished = False
+        self.promoted = False
+
+
+class BatchingEncoder:
+    """
+    Micro-batching front end for model.encode.
+
+    Concurrent callers that miss the cache are collected for up to `window_ms`; the first
+    of them (the leader) then encodes the whole batch in a single forward pass on its own
+    thread and hands every caller its vector. Identical queries in a batch are encoded once.
+    The leader returns as soon as its own query is encoded and hands leadership of whatever
+    is still pending to the oldest waiting caller.
+    """
+
+    def __init__(self, model, cache: Optional[EmbeddingCache] = None,
+                 window_ms: float = ENCODER_BATCH_WINDOW_MS, max_batch: int = ENCODER_MAX_BATCH,
+                 name: str = "encoder"):
+        self.model = model
+        self.name = name
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending: List[_PendingEncode] = []
+        self._leader_active = False
+        self.batches = 0
+        self.encoded = 0
+
+    def encode(self, query: str) -> np.ndarray:
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        request = _PendingEncode(key, query)
+        with self._lock:
+            self._pending.append(request)
+            is_leader = not self._leader_active
+            self._leader_active = True
+
+        if is_leader:
+            time.sleep(self.window)
+            self._lead(request)
+
+        while True:
+            request.done.wait()
+            if request.finished:
+                break
+            # Promoted: the previous leader is done with its own batch, this caller takes over
+            request.done.clear()
+            request.promoted = False
+            self._lead(request)
+
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def encode_many(self, queries: List[str]) -> List[np.ndarray]:
+        """
+        Encodes a list of queries in one pass (cache hits and duplicates excluded).
+        """
+        keys = [normalize_query(q) for q in queries]
+        vectors = {}
+        missing = {}
+        for key, query in zip(keys, queries):
+            if key in vectors or key in missing:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                missing[key] = query
+
+        if missing:
+            vectors.update(self._encode_texts(missing))
+        return [vectors[key] for key in keys]
+
+    def _lead(self, request: _PendingEncode):
+        # FIFO batches: the leader's own request is encoded after at most the requests queued before it
+        while not request.finished:
+            with self._lock:
+                batch = self._pending[:self.max_batch]
+                self._pending = self._pending[self.max_batch:]
+            self._run_batch(batch)
+
+        with self._lock:
+            successor = self._pending[0] if self._pending else None
+            if successor is None:
+                self._leader_active = False
+            else:
+                successor.promoted = True
+        if successor is not None:
+            successor.done.set()
+
+    def _run_batch(self, batch: List[_PendingEncode]):
+        texts = {}
+        for request in batch:
+            texts.setdefault(request.key, request.text)
+
+        try:
+            vectors = self._encode_texts(texts)
+            for request in batch:
+                request.result = vectors[request.key]
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        finally:
+            for request in batch:
+                request.finished = True
+                request.done.set()
+
+    def _encode_texts(self, texts: Dict[str, str]) -> Dict[str, np.ndarray]:
+        keys = list(texts)
+        with timed("encode", self.name):
+            if len(keys) == 1:
+                encoded = [self.model.encode(texts[keys[0]])]
+            else:
+                encoded = self.model.encode([texts[k] for k in keys])
+
+        with self._lock:
+            self.batches += 1
+            self.encoded += len(keys)
+
+        return {key: self.cache.put(key, vector) for key, vector in zip(keys, encoded)}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            batches, encoded, pending = self.batches, self.encoded, len(self._pending)
+        return {
+            "batches": batches,
+            "encoded": encoded,
+            "avg_batch_size": encoded / batches if batches else 0.0,
+            "pending": pending,
+            "cache": self.cache.stats(),
+        }
+
+
+# One encoder (and cache) per model instance
+_encoders: Dict[int, BatchingEncoder] = {}
+_encoders_lock = threading.Lock()
+
+
+def get_encoder(model, name: Optional[str] = None) -> BatchingEncoder:
+    with _encoders_lock:
+        encoder = _encoders.get(id(model))
+        if encoder is None or encoder.model is not model:
+            encoder = BatchingEncoder(model, name=name or f"{type(model).__name__}-{len(_encoders)}")
+            _encoders[id(model)] = encoder
+        return encoder
+
+
+def get_embedding_stats() -> Dict:
+    with _encoders_lock:
+        encoders = list(_encoders.values())
+    return {e.name: e.stats() for e in encoders}
@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import (
+    MODEL_NAME,
+    CHROMA_DB_PATH,
+    ENCODER_BACKEND,
+    ONNX_MODEL_DIR,
+    ONNX_QUANTIZATION,
+    ENCODER_MIN_AGREEMENT,
+    INFERENCE_TORCH_THREADS,
+)
+from utils.log_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+REPORT_FILE = "agreement_{backend}.json"
+
+
+def _onnx_file(model_dir: str, backend: str) -> Optional[str]:
+    """
+    Path of the exported ONNX file for `backend`, relative to `model_dir` (None if not exported).
+    """
+    name = "model.onnx" if backend == "onnx" else f"model_qint8_{ONNX_QUANTIZATION}.onnx"
+    for root, _, files in os.walk(model_dir):
+        if name in files:
+            return os.path.relpath(os.path.join(root, name), model_dir).replace(os.sep, "/")
+    return None
+
+
+def _load_onnx(model_dir: str, file_name: str):
+    import onnxruntime
+    from sentence_transformers import SentenceTransformer
+
+    session_options = onnxruntime.SessionOptions()
+    if INFERENCE_TORCH_THREADS:
+        # Same per-encode thread budget as the torch backend (see inference_executor)
+        session_options.intra_op_num_threads = INFERENCE_TORCH_THREADS
+    return SentenceTransformer(model_dir, backend="onnx", model_kwargs={
+        "file_name": file_name,
+        "provider": "CPUExecutionProvider",
+        "session_options": session_options,
+    })
+
+
+def read_agreement_report(backend: str, model_dir: str = ONNX_MODEL_DIR) -> Optional[Dict]:
+    path = os.path.join(model_dir, REPORT_FILE.format(backend=backend))
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_encoder_model(model_name: str = MODEL_NAME, backend: str = ENCODER_BACKEND, model_dir: str = ONNX_MODEL_DIR):
+    """
+    Loads the NACE query encoder for `backend`. ONNX backends are only used once they have been
+    exported and their top-k agreement with the torch model (measured by `export_and_check`)
+    reaches ENCODER_MIN_AGREEMENT; otherwise the torch model is loaded. Nothing is exported
+    here, so uvicorn workers never race on the export.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown encoder backend {backend!r}, expected one of {BACKENDS}")
+
+    if backend != "torch":
+        file_name = _onnx_file(model_dir, backend)
+        report = read_agreement_report(backend, model_dir)
+        if file_name is None or report is None:
+            logger.warning("ONNX encoder not exported, using torch",
+                           extra={"backend": backend, "model_dir": model_dir})
+        elif report.get("model") != model_name or report["topk_agreement"] < ENCODER_MIN_AGREEMENT:
+            logger.warning("ONNX encoder failed the agreement check, using torch",
+                           extra={"backend": backend, "topk_agreement": report["topk_agreement"],
+                                  "required": ENCODER_MIN_AGREEMENT})
+        else:
+            return _load_onnx(model_dir, file_name)
+
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def export_onnx(model_name: str, model_dir: str, quantize: bool) -> str:
+    """
+    Exports `model_name` to ONNX in `model_dir` (plus a dynamically int8-quantized copy when
+    `quantize`) and returns the path of the file to load, relative to `model_dir`.
+    """
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.backend import export_dynamic_quantized_onnx_model
+
+    # Export next to the target and swap it in at the end, so a running server never sees a partial export
+    parent = os.path.dirname(os.path.abspath(model_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix="onnx-export-", dir=parent)
+    try:
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save(staging)
+        if quantize:
+            export_dynamic_quantized_onnx_model(model, ONNX_QUANTIZATION, staging)
+        # Earlier agreement reports describe the old export and are dropped with it
+        if os.path.exists(model_dir):
+            shutil.rmtree(model_dir)
+        os.replace(staging, model_dir)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    file_name = _onnx_file(model_dir, "onnx-int8" if quantize else "onnx")
+    if file_name is None:
+        raise RuntimeError(f"export finished but no ONNX file was found in {model_dir}")
+    return file_name
+
+
+def _unit(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def topk_agreement(reference_model, candidate_model, collection, queries: List[str], top_k: int = 3,
+                   batch_size: int = 64) -> Dict:
+    """
+    Compares a candidate encoder with the reference (torch) model on the NACE collection:
+    the share of the reference top-k ids the candidate also returns, how often the top-1 id
+    matches, and the cosine similarity between the two encodings of each query.
+    """
+    reference = _unit(reference_model.encode(queries, batch_size=batch_size))
+    candidate = _unit(candidate_model.encode(queries, batch_size=batch_size))
+
+    overlap, top1 = [], []
+    for start in range(0, len(queries), batch_size):
+        ref_ids = collection.query(query_embeddings=reference[start:start + batch_size].tolist(), n_results=top_k)["ids"]
+        cand_ids = collection.query(query_embeddings=candidate[start:start + batch_size].tolist(), n_results=top_k)["ids"]
+        for expected, got in zip(ref_ids, cand_ids):
+            if expected:
+                overlap.append(len(set(expected) & set(got)) / len(expected))
+                top1.append(bool(got) and got[0] == expected[0])
+
+    cosine = np.sum(reference * candidate, axis=1)
+    return {
+        "queries": len(queries),
+        "top_k": top_k,
+        "topk_agreement": float(np.mean(overlap)) if overlap else 0.0,
+        "top1_agreement": float(np.mean(top1)) if top1 else 0.0,
+        "query_cosine_mean": float(cosine.mean()),
+        "query_cosine_min": float(cosine.min()),
+    }
+
+
+def stored_embedding_similarity(candidate_model, collection, limit: int = 500, batch_size: int = 64) -> Dict:
+    """
+    Re-encodes stored NACE documents with the candidate and compares them with the embeddings
+    already in the collection (which the torch model produced when the index was built).
+    """
+    data = collection.get(include=["embeddings", "documents"], limit=limit)
+    pairs = [(doc, emb) for doc, emb in zip(data["documents"], data["embeddings"]) if doc]
+    if not pairs:
+        return {"documents": 0}
+    stored = _unit([emb for _, emb in pairs])
+    encoded = _unit(candidate_model.encode([doc for doc, _ in pairs], batch_size=batch_size))
+    cosine = np.sum(stored * encoded, axis=1)
+    return {"documents": len(pairs), "stored_cosine_mean": float(cosine.mean()), "stored_cosine_min": float(cosine.min())}
+
+
+def _sample_queries(collection, sample: int, queries_file: Optional[str]) -> List[str]:
+    queries = []
+    if queries_file:
+        with open(queries_file, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    # Stored NACE descriptions and their categories stand in for real queries
+    data = collection.get(include=["documents", "metadatas"], limit=sample)
+    for doc, meta in zip(data["documents"], data["metadatas"]):
+        if doc:
+            queries.append(doc)
+        category = (meta or {}).get("category", "").strip('"')
+        if category:
+            queries.append(category)
+    return list(dict.fromkeys(queries))
+
+
+def export_and_check(backend: str, model_name: str = MODEL_NAME, model_dir: str = ONNX_MODEL_DIR,
+                     sample: int = 500, top_k: int = 3, queries_file: Optional[str] = None,
+                     export: bool = True) -> Tuple[Dict, bool]:
+    """
+    Exports the ONNX model for `backend`, measures it against the torch model on the stored
+    NACE collection and writes the report that load_encoder_model requires before it switches.
+    Returns (report, passed).
+    """
+    import chromadb
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        raise ValueError("the torch backend is the reference, there is nothing to export")
+
+    if export or _onnx_file(model_dir, backend) is None:
+        export_onnx(model_name, model_dir, quantize=backend == "onnx-int8")
+
+    collection = chromadb.PersistentClient(path=CHROMA_DB_PATH).get_collection("nace_codes")
+    reference = SentenceTransformer(model_name)
+    candidate = _load_onnx(model_dir, _onnx_file(model_dir, backend))
+
+    queries = _sample_queries(collection, sample, queries_file)
+    if not queries:
+        raise ValueError("the NACE collection is empty and no queries file was given")
+    report = {
+        "model": model_name,
+        "backend": backend,
+        "quantization": ONNX_QUANTIZATION if backend == "onnx-int8" else None,
+        **topk_agreement(reference, candidate, collection, queries, top_k),
+        **stored_embedding_similarity(candidate, collection, limit=sample),
+        "required": ENCODER_MIN_AGREEMENT,
+    }
+    with open(os.path.join(model_dir, REPORT_FILE.format(backend=backend)), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report, report["topk_agreement"] >= ENCODER_MIN_AGREEMENT
+
+
+if __name__ == "__main__":
+    # python -m services.encoder_backends --backend onnx-int8
+    #   exports MODEL_NAME to ONNX_MODEL_DIR, checks top-k agreement with the torch model and
+    #   writes the report; set ENCODER_BACKEND afterwards to switch
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["onnx", "onnx-int8"], default="onnx-int8")
+    parser.add_argument("--sample", type=int, default=500, help="stored NACE entries used as queries")
+    parser.add_argument("--queries-file", help="extra queries, one per line (e.g. from the request logs)")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--skip-export", action="store_true", help="re-check an existing export")
+    args = parser.parse_args()
+
+    report, passed = export_and_check(args.backend, sample=args.sample, top_k=args.top_k,
+                                      queries_file=args.queries_file, export=not args.skip_export)
+    print(json.dumps(report, indent=2))
+    print("PASSED" if passed else f"FAILED: top-k agreement below {ENCODER_MIN_AGREEMENT}, the torch model stays in use")
@@ -1,8 +1,58 @@
+import asyncio
+import copy
 import json
-from functools import lru_cache
+import threading
 import requests
-from typing import List
-from config import SUPPLIER_LIST_ENDPOINT, SUPPLIER_DETAIL_ENDPOINT
+import httpx
+from typing import Dict, List, Optional
+from config import (
+    SUPPLIER_LIST_ENDPOINT,
+    SUPPLIER_DETAIL_ENDPOINT,
+    CACHE_DB_PATH,
+    SUPPLIER_CACHE_BACKEND,
+    SUPPLIER_CACHE_TTL,
+    SUPPLIER_CACHE_STALE_TTL,
+    SUPPLIER_NEGATIVE_TTL,
+    SUPPLIER_CACHE_MAX_ENTRIES,
+    REDIS_URL,
+    SUPPLIER_DETAIL_CACHE_TTL,
+    SUPPLIER_DETAIL_TIMEOUT,
+    SUPPLIER_DETAIL_CONCURRENCY,
+    FAVORITES_DETAIL_BUDGET,
+)
+from services import http_client
+from services.cache_store import create_store, StaleWhileRevalidateCache
+from services.single_flight import get_single_flight
+from utils.json_utils import loads_lenient
+from utils.log_utils import get_logger
+from utils.metrics import timed
+
+
+logger = get_logger(__name__)
+
+
+# Supplier lists keyed by flatten_key, shared by the sync and async paths
+# (and by all workers with the sqlite / redis backends)
+supplier_cache = StaleWhileRevalidateCache(
+    create_store(SUPPLIER_CACHE_BACKEND, "supplier_list", path=CACHE_DB_PATH,
+                 redis_url=REDIS_URL, max_entries=SUPPLIER_CACHE_MAX_ENTRIES),
+    ttl=SUPPLIER_CACHE_TTL,
+    stale_ttl=SUPPLIER_CACHE_STALE_TTL,
+    negative_ttl=SUPPLIER_NEGATIVE_TTL,
+)
+
+# Supplier details keyed by SupplierID; failed lookups are not cached
+supplier_detail_store = create_store(SUPPLIER_CACHE_BACKEND, "supplier_detail", path=CACHE_DB_PATH,
+                                     redis_url=REDIS_URL, max_entries=SUPPLIER_CACHE_MAX_ENTRIES)
+
+# Background work started from the event loop (stale refreshes, slow detail lookups),
+# kept referenced until done
+_refresh_tasks = set()
+
+# Concurrent misses for the same key share one upstream request; callers mutate the
+# returned dicts (distances, sorting), so coalesced callers get their own copy
+supplier_list_flight = get_single_flight("supplier_list", copy_result=copy.deepcopy)
+supplier_detail_flight = get_single_flight("supplier_detail", copy_result=copy.deepcopy)
 
 
 def flatten_key(nace_codes: List[str], cities: List[dict]) -> str:
@@ -11,26 +61,88 @@ def flatten_key(nace_codes: List[str], cities: List[dict]) -> str:
     return f"{nace_str}__{city_str}"
 
 
-@lru_cache(maxsize=1024)
-def fetch_suppliers_cached(flat_key: str):
-    # optional mock loader
-    # with open("suppliers_mock.json") as f:
-    #     return json.load(f)
-
-    payload = {
+def supplier_list_payload(flat_key: str) -> dict:
+    return {
         "NaceCodes": [{"NaceCode": code} for code in flat_key.split("__")[0].split("_")],
         "Cities": [{"City": city, "Regions": []} for city in flat_key.split("__")[1].split("_")],
         "NoofResults": 3,
         "Page": 1
     }
 
+
+@timed("supplier_api", "list")
+def _request_supplier_list(flat_key: str) -> Optional[dict]:
+    # optional mock loader
+    # with open("suppliers_mock.json") as f:
+    #     return json.load(f)
+
+    payload = supplier_list_payload(flat_key)
+
     try:
         response = requests.post(SUPPLIER_LIST_ENDPOINT, json=payload, timeout=5)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"[fetch_suppliers_cached] External API error: {e}")
+        logger.warning("supplier list request failed", extra={"flat_key": flat_key, "error": str(e)})
+        return None
+
+
+@timed("supplier_api", "list")
+async def _request_supplier_list_async(flat_key: str) -> Optional[dict]:
+    try:
+        response = await http_client.request("POST", SUPPLIER_LIST_ENDPOINT,
+                                             json=supplier_list_payload(flat_key), timeout=5)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        logger.warning("supplier list request failed", extra={"flat_key": flat_key, "error": str(e)})
+        return None
+
+
+def _store_supplier_list(flat_key: str, data: Optional[dict]) -> dict:
+    # Errors fall back to an empty list, cached for SUPPLIER_NEGATIVE_TTL only
+    if data is None:
+        supplier_cache.put_negative(flat_key, {"data": []})
         return {"data": []}
+    supplier_cache.put(flat_key, data)
+    return data
+
+
+def _load_supplier_list(flat_key: str) -> dict:
+    return _store_supplier_list(flat_key, _request_supplier_list(flat_key))
+
+
+async def _load_supplier_list_async(flat_key: str) -> dict:
+    data = await _request_supplier_list_async(flat_key)
+    return await asyncio.to_thread(_store_supplier_list, flat_key, data)
+
+
+def _refresh_supplier_list(flat_key: str):
+    try:
+        _load_supplier_list(flat_key)
+    finally:
+        supplier_cache.end_refresh(flat_key)
+
+
+async def _refresh_supplier_list_async(flat_key: str):
+    try:
+        await _load_supplier_list_async(flat_key)
+    finally:
+        supplier_cache.end_refresh(flat_key)
+
+
+def fetch_suppliers_cached(flat_key: str):
+    """
+    Supplier list for a flatten_key. Stale entries are returned immediately and
+    refreshed on a background thread.
+    """
+    state, value = supplier_cache.lookup(flat_key)
+    if state == "stale" and supplier_cache.begin_refresh(flat_key):
+        threading.Thread(target=_refresh_supplier_list, args=(flat_key,), daemon=True).start()
+    if state != "miss":
+        return value
+
+    return supplier_list_flight.do(flat_key, _load_supplier_list, flat_key)
 
 
 def fetch_suppliers(nace_codes: List[str], cities: List[dict]):
@@ -38,52 +150,152 @@ def fetch_suppliers(nace_codes: List[str], cities: List[dict]):
     return fetch_suppliers_cached(flat_key)
 
 
-import requests
-import json
+async def fetch_suppliers_async(nace_codes: List[str], cities: List[dict]):
+    """
+    Non-blocking variant of fetch_suppliers using the shared async HTTP client.
+    Stale entries are refreshed in a background task.
+    """
+    flat_key = flatten_key(nace_codes, cities)
+    # The sqlite / redis backends block, keep them off the event loop
+    state, value = await asyncio.to_thread(supplier_cache.lookup, flat_key)
+    if state == "stale" and supplier_cache.begin_refresh(flat_key):
+        task = asyncio.create_task(_refresh_supplier_list_async(flat_key))
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+    if state != "miss":
+        return value
+
+    return await supplier_list_flight.do_async(flat_key, _load_supplier_list_async, flat_key)
+
+
+def get_supplier_cache_stats() -> Dict:
+    return supplier_cache.stats()
+
+
+def _parse_supplier_detail(raw: bytes) -> Optional[dict]:
+    """
+    Parses a detail response body. Control characters the API sometimes leaves in
+    the payload are only stripped when the strict parse fails.
+    """
+    try:
+        data = loads_lenient(raw)
+    except ValueError as e:
+        logger.warning("supplier detail is not valid JSON", extra={"error": str(e)})
+        logger.debug("invalid supplier detail payload", extra={"payload": raw[:500]})
+        return None
+
+    if not isinstance(data, dict):
+        logger.warning("unexpected supplier detail payload", extra={"payload_type": type(data).__name__})
+        return None
+    return data
+
+
+def _store_supplier_detail(supplier_id: str, data: Optional[dict]) -> Optional[dict]:
+    if data is not None:
+        supplier_detail_store.set(str(supplier_id), data, ttl=SUPPLIER_DETAIL_CACHE_TTL)
+    return data
 
-import json
-import re
 
 def fetch_supplier_detail_by_id(supplier_id: str):
+    found, cached = supplier_detail_store.get(str(supplier_id))
+    if found:
+        return cached
+
+    return supplier_detail_flight.do(str(supplier_id), _load_supplier_detail, supplier_id)
+
+
+def _load_supplier_detail(supplier_id: str):
+    return _store_supplier_detail(supplier_id, _request_supplier_detail(supplier_id))
+
+
+@timed("supplier_api", "detail")
+def _request_supplier_detail(supplier_id: str):
     try:
         payload = {"SupplierID": str(supplier_id)}
         headers = {"Content-Type": "application/json"}
-        print(f"[DEBUG] Requesting supplier details for ID: {supplier_id}")
-        print(f"[DEBUG] Using endpoint: {SUPPLIER_DETAIL_ENDPOINT}")
-        print(f"[DEBUG] Payload: {payload}")
-        
-        response = requests.post(SUPPLIER_DETAIL_ENDPOINT, json=payload, headers=headers, timeout=10)
-        
-        print(f"[DEBUG] Response status code: {response.status_code}")
-        
+
+        response = requests.post(SUPPLIER_DETAIL_ENDPOINT, json=payload, headers=headers, timeout=SUPPLIER_DETAIL_TIMEOUT)
+
         if response.status_code != 200:
-            print(f"[DEBUG] API returned error status: {response.status_code}")
-            print(f"[DEBUG] Response text: {response.text}")
+            logger.warning("supplier detail request failed",
+                           extra={"supplier_id": supplier_id, "status": response.status_code})
+            logger.debug("supplier detail error body", extra={"payload": response.text})
             return None
-            
-        raw_text = response.text
-        print(f"[DEBUG] Raw response length: {len(raw_text)}")
-        print(f"[DEBUG] Raw response preview: {raw_text[:200]}...")
-        
-        # Clean the response
-        cleaned = re.sub(r'[\x00-\x1f\x7f]', '', raw_text)
-        
-        # Try to parse JSON
-        data = json.loads(cleaned)
-        print(f"[DEBUG] Successfully parsed JSON. Company: {data.get('CompanyName', 'Unknown')}")
-        return data
-
-    except json.decoder.JSONDecodeError as e:
-        print(f"[fetch_supplier_detail_by_id] JSON decode error: {e}")
-        print(f"[fetch_supplier_detail_by_id] Raw text that caused error: {raw_text[:500]}")
-        return None
+
+        logger.debug("supplier detail response", extra={"supplier_id": supplier_id, "payload": response.content[:200]})
+
+        # Parse the undecoded body: no str copy, no regex pass over valid payloads
+        return _parse_supplier_detail(response.content)
+
     except requests.exceptions.RequestException as e:
-        print(f"[fetch_supplier_detail_by_id] Request error: {e}")
+        logger.warning("supplier detail request failed", extra={"supplier_id": supplier_id, "error": str(e)})
         return None
     except Exception as e:
-        print(f"[fetch_supplier_detail_by_id] Unexpected error: {e}")
+        logger.exception("supplier detail lookup failed", extra={"supplier_id": supplier_id})
+        return None
+
+
+@timed("supplier_api", "detail")
+async def _request_supplier_detail_async(supplier_id: str) -> Optional[dict]:
+    try:
+        response = await http_client.request("POST", SUPPLIER_DETAIL_ENDPOINT,
+                                             json={"SupplierID": str(supplier_id)},
+                                             timeout=SUPPLIER_DETAIL_TIMEOUT)
+    except httpx.HTTPError as e:
+        logger.warning("supplier detail request failed", extra={"supplier_id": supplier_id, "error": str(e)})
         return None
 
+    if response.status_code != 200:
+        logger.warning("supplier detail request failed",
+                       extra={"supplier_id": supplier_id, "status": response.status_code})
+        return None
+    return _parse_supplier_detail(response.content)
+
+
+async def _load_supplier_detail_async(supplier_id: str) -> Optional[dict]:
+    data = await _request_supplier_detail_async(supplier_id)
+    return await asyncio.to_thread(_store_supplier_detail, supplier_id, data)
+
+
+async def fetch_supplier_detail_async(supplier_id: str) -> Optional[dict]:
+    """
+    Non-blocking variant of fetch_supplier_detail_by_id using the shared async HTTP client.
+    """
+    found, cached = await asyncio.to_thread(supplier_detail_store.get, str(supplier_id))
+    if found:
+        return cached
 
+    return await supplier_detail_flight.do_async(str(supplier_id), _load_supplier_detail_async, supplier_id)
 
 
+async def fetch_supplier_details_async(supplier_ids: List[str],
+                                       budget: float = FAVORITES_DETAIL_BUDGET,
+                                       concurrency: int = SUPPLIER_DETAIL_CONCURRENCY) -> Dict[str, Optional[dict]]:
+    """
+    Details for many suppliers, at most `concurrency` upstream requests at a time
+    (the detail API has no bulk call). Returns what is available after `budget` seconds,
+    keyed by str(SupplierID); failed and unfinished lookups map to None. Unfinished ones
+    keep running in the background so the next request finds them cached.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(supplier_id: str):
+        async with semaphore:
+            return await fetch_supplier_detail_async(supplier_id)
+
+    tasks = {sid: asyncio.create_task(fetch_one(sid)) for sid in dict.fromkeys(str(s) for s in supplier_ids)}
+    if not tasks:
+        return {}
+
+    done, pending = await asyncio.wait(tasks.values(), timeout=budget)
+    for task in pending:
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+    if pending:
+        logger.info("supplier details missed the latency budget",
+                    extra={"pending": len(pending), "requested": len(tasks), "budget_s": budget})
+
+    return {
+        sid: task.result() if task in done and task.exception() is None else None
+        for sid, task in tasks.items()
+    }
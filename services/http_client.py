@@ -0,0 +1,61 @@
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+from config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_PER_HOST_CONCURRENCY,
+)
+
+
+# One keep-alive client per event loop, shared by every outbound call
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns the shared AsyncClient, creating it for the running event loop if needed.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        _client_loop = loop
+        _host_semaphores.clear()
+    return _client
+
+
+async def close_async_client():
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _host_semaphores.clear()
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    if host not in _host_semaphores:
+        _host_semaphores[host] = asyncio.Semaphore(HTTP_PER_HOST_CONCURRENCY)
+    return _host_semaphores[host]
+
+
+async def request(method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Sends a request through the shared client, limited to HTTP_PER_HOST_CONCURRENCY
+    in-flight requests per upstream host.
+    """
+    client = get_async_client()
+    async with _host_semaphore(url):
+        return await client.request(method, url, **kwargs)
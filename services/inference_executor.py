@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict
+from config import (
+    INFERENCE_WORKERS,
+    INFERENCE_TORCH_THREADS,
+    INFERENCE_MAX_QUEUE,
+)
+
+
+class InferenceQueueFull(Exception):
+    """Raised when INFERENCE_MAX_QUEUE requests are already waiting for a worker."""
+
+
+def _init_worker():
+    from services.search_client import sidecar_enabled
+
+    # torch's intra-op pool is process wide; cap it so the inference workers don't oversubscribe the CPU.
+    # Workers that send their searches to the sidecar never load torch.
+    if INFERENCE_TORCH_THREADS and not sidecar_enabled():
+        import torch
+        torch.set_num_threads(INFERENCE_TORCH_THREADS)
+
+
+# Torch releases the GIL during inference, so a thread pool keeps one copy of the model
+# while still running encodes in parallel with the event loop.
+_executor = ThreadPoolExecutor(
+    max_workers=INFERENCE_WORKERS,
+    thread_name_prefix="inference",
+    initializer=_init_worker,
+)
+_lock = threading.Lock()
+_stats = {
+    "submitted": 0,   # accepted and not finished yet (running + queued)
+    "running": 0,
+    "completed": 0,
+    "failed": 0,
+    "rejected": 0,
+}
+
+
+def _run(fn: Callable, *args, **kwargs):
+    with _lock:
+        _stats["running"] += 1
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        with _lock:
+            _stats["running"] -= 1
+
+
+async def run_inference(fn: Callable, *args, **kwargs):
+    """
+    Runs a blocking inference call on the dedicated inference pool and awaits its result.
+    Raises InferenceQueueFull instead of queueing when the backlog is at INFERENCE_MAX_QUEUE.
+    """
+    with _lock:
+        if _stats["submitted"] >= INFERENCE_WORKERS + INFERENCE_MAX_QUEUE:
+            _stats["rejected"] += 1
+            raise InferenceQueueFull()
+        _stats["submitted"] += 1
+
+    future = _executor.submit(partial(_run, fn, *args, **kwargs))
+    # Accounted when the job itself ends: a cancelled caller does not stop a job that is already running
+    future.add_done_callback(_finished)
+    return await asyncio.wrap_future(future)
+
+
+def _finished(future: Future):
+    with _lock:
+        _stats["submitted"] -= 1
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            _stats["failed"] += 1
+        else:
+            _stats["completed"] += 1
+
+
+def get_inference_stats() -> Dict:
+    with _lock:
+        stats = dict(_stats)
+    stats["queue_depth"] = max(0, stats["submitted"] - stats["running"])
+    stats["workers"] = INFERENCE_WORKERS
+    stats["max_queue"] = INFERENCE_MAX_QUEUE
+    return stats
@@ -0,0 +1,46 @@
+"""
+Builds the Turkish NACE collection used by semantic_search_turkish.
+
+    python -m services.nace_index_builder
+
+Every entry of the English "nace_codes" collection is copied with the same id and
+metadata; the document is the Turkish description (from the translation table) and
+the embedding comes from the multilingual model.
+"""
+from typing import Dict
+from services.chromadb_service import get_collection, get_tr_collection, get_multilingual_model
+from services.translation_service import translate_nace_description
+
+BATCH_SIZE = 128
+
+
+def build_turkish_index(batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    source = get_collection().get(include=["metadatas"])
+    ids, metadatas = source["ids"], source["metadatas"]
+    multilingual_model = get_multilingual_model()
+
+    built = 0
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        batch_metas = metadatas[start:start + batch_size]
+
+        documents = []
+        for meta in batch_metas:
+            category = (meta or {}).get("category", "").strip('"')
+            documents.append(translate_nace_description(category) if category else "")
+
+        embeddings = multilingual_model.encode(documents, batch_size=batch_size).tolist()
+        get_tr_collection(create=True).upsert(
+            ids=batch_ids,
+            embeddings=embeddings,
+            documents=documents,
+            metadatas=[dict(meta or {}, category_tr=doc) for meta, doc in zip(batch_metas, documents)],
+        )
+        built += len(batch_ids)
+        print(f"build_turkish_index: {built}/{len(ids)}")
+
+    return {"source": len(ids), "built": built}
+
+
+if __name__ == "__main__":
+    print(build_turkish_index())
@@ -0,0 +1,170 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional
+import numpy as np
+from utils.log_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class NumpyCollection:
+    """
+    Exact cosine search over all NACE embeddings held in one contiguous float32 matrix.
+
+    Drop-in replacement for the Chroma collection in semantic_search: query() takes the same
+    arguments and returns the same shape, with distances as 1 - cosine similarity (Chroma's
+    "cosine" space). The matrix is memory-mapped when loaded from disk, so every worker
+    shares the same pages.
+    """
+
+    EMBEDDINGS_FILE = "embeddings.npy"
+    RECORDS_FILE = "records.json"
+
+    def __init__(self, embeddings: np.ndarray, ids: List[str], documents: List[Optional[str]], metadatas: List[Optional[dict]]):
+        if len(embeddings) != len(ids):
+            raise ValueError("embeddings and ids must have the same length")
+        self.embeddings = embeddings
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @classmethod
+    def from_chroma(cls, chroma_collection) -> "NumpyCollection":
+        data = chroma_collection.get(include=["embeddings", "documents", "metadatas"])
+        embeddings = np.ascontiguousarray(cls._normalize(np.asarray(data["embeddings"])))
+        return cls(embeddings, list(data["ids"]), list(data["documents"]), list(data["metadatas"]))
+
+    def save(self, directory: str):
+        """
+        Writes the export to its own version directory next to `directory` and points the
+        `directory` symlink at it with an atomic os.replace. Readers see either the previous
+        or the new export, never a mix; concurrent saves all succeed and the last one wins.
+        """
+        directory = os.path.abspath(directory)
+        parent, name = os.path.split(directory)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{name}-staging-", dir=parent)
+        try:
+            np.save(os.path.join(staging, self.EMBEDDINGS_FILE), np.ascontiguousarray(self.embeddings, dtype=np.float32))
+            with open(os.path.join(staging, self.RECORDS_FILE), "w", encoding="utf-8") as f:
+                json.dump({"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas}, f, ensure_ascii=False)
+            version = f"{name}-v{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+            os.rename(staging, os.path.join(parent, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if os.path.isdir(directory) and not os.path.islink(directory):
+            # Index written by an older release as a plain directory; replaced once
+            shutil.rmtree(directory, ignore_errors=True)
+        link = os.path.join(parent, f".{name}-{uuid.uuid4().hex}.link")
+        os.symlink(version, link)
+        os.replace(link, directory)
+        _prune_versions(parent, name)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "NumpyCollection":
+        while True:
+            # Resolve the symlink once so both files come from the same export
+            version = os.path.realpath(directory)
+            try:
+                embeddings = np.load(os.path.join(version, cls.EMBEDDINGS_FILE), mmap_mode="r" if mmap else None)
+                with open(os.path.join(version, cls.RECORDS_FILE), encoding="utf-8") as f:
+                    records = json.load(f)
+            except FileNotFoundError:
+                # The export was pruned after newer saves: follow the link again
+                if os.path.realpath(directory) == version:
+                    raise
+                continue
+            return cls(embeddings, records["ids"], records["documents"], records["metadatas"])
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def query(self, *, query_embeddings, n_results: int = 10, **_) -> Dict[str, list]:
+        """
+        Top-n exact search for a batch of query embeddings, nearest first.
+        """
+        queries = self._normalize(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        n = min(n_results, len(self.ids))
+
+        result = {"ids": [], "distances": [], "documents": [], "metadatas": []}
+        if n == 0:
+            for key in result:
+                result[key] = [[] for _ in range(len(queries))]
+            return result
+
+        # One matrix product for the whole batch: (queries x dim) @ (dim x entries)
+        similarities = queries @ self.embeddings.T
+        if n < len(self.ids):
+            top = np.argpartition(-similarities, n - 1, axis=1)[:, :n]
+        else:
+            top = np.tile(np.arange(len(self.ids)), (len(queries), 1))
+
+        for row, candidates in zip(similarities, top):
+            ordered = candidates[np.argsort(-row[candidates])]
+            result["ids"].append([self.ids[i] for i in ordered])
+            result["distances"].append([float(1.0 - row[i]) for i in ordered])
+            result["documents"].append([self.documents[i] for i in ordered])
+            result["metadatas"].append([self.metadatas[i] for i in ordered])
+        return result
+
+
+def _prune_versions(parent: str, name: str, keep: int = 2):
+    """
+    Deletes old exports, keeping the linked one and the `keep` newest (a worker may still be
+    opening the one it resolved just before the last swap). Open memory maps stay valid.
+    """
+    current = os.path.basename(os.path.realpath(os.path.join(parent, name)))
+    versions = sorted(entry for entry in os.listdir(parent) if entry.startswith(f"{name}-v"))
+    for version in versions[:-keep]:
+        if version != current:
+            shutil.rmtree(os.path.join(parent, version), ignore_errors=True)
+
+
+def load_or_build_numpy_index(chroma_collection, directory: str, rebuild: bool = False) -> NumpyCollection:
+    """
+    Loads the memory-mapped index from `directory`, exporting it from Chroma first if it is
+    missing, stale (different entry count) or a rebuild is requested.
+    """
+    embeddings_path = os.path.join(directory, NumpyCollection.EMBEDDINGS_FILE)
+    if not rebuild and os.path.exists(embeddings_path):
+        index = NumpyCollection.load(directory)
+        if index.count() == chroma_collection.count():
+            return index
+        logger.info("NumPy index entry count changed, rebuilding", extra={"directory": directory})
+
+    try:
+        NumpyCollection.from_chroma(chroma_collection).save(directory)
+    except OSError as e:
+        # Fine if another worker published a complete index in the meantime
+        if os.path.exists(embeddings_path):
+            index = NumpyCollection.load(directory)
+            if index.count() == chroma_collection.count():
+                logger.warning("NumPy index export failed, using the one already published",
+                               extra={"directory": directory, "error": str(e)})
+                return index
+        raise
+    logger.info("NumPy index exported", extra={"entries": chroma_collection.count(), "directory": directory})
+    return NumpyCollection.load(directory)
+
+
+if __name__ == "__main__":
+    # python -m services.search_backends  -> re-exports the NACE collection for SEARCH_BACKEND = "numpy"
+    from config import NUMPY_INDEX_PATH
+    from services.chromadb_service import get_collection
+
+    index = load_or_build_numpy_index(get_collection(), NUMPY_INDEX_PATH, rebuild=True)
+    print(f"{index.count()} entries, dim {index.embeddings.shape[1]}")
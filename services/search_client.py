@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Dict, List, Literal, Optional, Tuple
+import httpx
+from config import SEARCH_SIDECAR_URL, SEARCH_SIDECAR_TIMEOUT, SEARCH_SIDECAR_STATUS_INTERVAL
+from services.inference_executor import InferenceQueueFull
+from utils.log_utils import get_logger
+from utils.metrics import timed
+
+
+logger = get_logger(__name__)
+
+# Client side of services/search_sidecar.py. Blocking on purpose: semantic_search is called
+# from the inference pool and the thread pool, never on the event loop.
+_url = SEARCH_SIDECAR_URL
+_client: Optional[httpx.Client] = None
+_lock = threading.Lock()
+
+_UNREACHABLE = {"model": False, "index": False, "warm": False, "turkish_index": False}
+_status: Dict[str, bool] = dict(_UNREACHABLE)
+_status_checked = 0.0
+_status_refreshing = False
+
+
+def sidecar_enabled() -> bool:
+    return bool(_url)
+
+
+def set_sidecar_url(url: Optional[str]):
+    """
+    Sends the NACE search to the sidecar at `url`, or keeps it in-process with None.
+    The sidecar calls this with None so it never forwards to itself.
+    """
+    global _url, _client, _status, _status_checked
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _url = url or ""
+        _status, _status_checked = dict(_UNREACHABLE), 0.0
+
+
+def split_url(url: str) -> Tuple[str, Optional[str]]:
+    """
+    "unix:/path/search.sock" -> (base URL, socket path); HTTP URLs are returned without a socket.
+    """
+    if url.startswith("unix:"):
+        return "http://search-sidecar", url[len("unix:"):]
+    return url.rstrip("/"), None
+
+
+def _get_client() -> httpx.Client:
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                base_url, uds = split_url(_url)
+                _client = httpx.Client(
+                    base_url=base_url,
+                    transport=httpx.HTTPTransport(uds=uds) if uds else None,
+                    timeout=SEARCH_SIDECAR_TIMEOUT,
+                )
+    return _client
+
+
+def sidecar_search(queries: List[str],
+                   top_k: int,
+                   language: Literal["en", "tr"],
+                   score_threshold: Optional[float] = None,
+                   ) -> List[Tuple[List[dict], Literal["no_hits", "threshold", "ok"]]]:
+    """
+    Runs semantic_search (one query) or semantic_search_batch (several) in the sidecar.
+    Raises InferenceQueueFull when the sidecar's inference queue is full, like a local search.
+    """
+    payload = {"queries": queries, "top_k": top_k, "language": language, "score_threshold": score_threshold}
+    with timed("search_sidecar", "single" if len(queries) == 1 else "batch"):
+        response = _get_client().post("/search", json=payload)
+    if response.status_code == 503:
+        raise InferenceQueueFull()
+    response.raise_for_status()
+    return [(results, status) for results, status in response.json()["results"]]
+
+
+def sidecar_status() -> Dict[str, bool]:
+    """
+    Readiness of the sidecar's model and index; everything False while it is unreachable.
+    Blocking: call it from a worker thread, see cached_sidecar_status for the event loop.
+    """
+    global _status, _status_checked
+    try:
+        response = _get_client().get("/status")
+        response.raise_for_status()
+        status = response.json()
+    except httpx.HTTPError as e:
+        logger.warning("search sidecar unavailable", extra={"url": _url, "error": str(e)})
+        status = dict(_UNREACHABLE)
+    with _lock:
+        _status, _status_checked = status, time.monotonic()
+    return status
+
+
+def _refresh_status():
+    global _status_refreshing
+    try:
+        sidecar_status()
+    finally:
+        with _lock:
+            _status_refreshing = False
+
+
+def cached_sidecar_status() -> Dict[str, bool]:
+    """
+    Last status the sidecar answered, without waiting on I/O (safe on the event loop). Once it is
+    older than SEARCH_SIDECAR_STATUS_INTERVAL, a background thread fetches a fresh one.
+    """
+    global _status_refreshing
+    with _lock:
+        refresh = not _status_refreshing and time.monotonic() - _status_checked > SEARCH_SIDECAR_STATUS_INTERVAL
+        if refresh:
+            _status_refreshing = True
+        status = dict(_status)
+    if refresh:
+        threading.Thread(target=_refresh_status, name="sidecar-status", daemon=True).start()
+    return status
@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from config import INFERENCE_RETRY_AFTER, SEARCH_SIDECAR_URL
+from models.search_model import SidecarSearchRequest
+from services import search_client
+from services.chromadb_service import (
+    load_search_resources,
+    search_status,
+    semantic_search,
+    semantic_search_batch,
+    semantic_search_turkish,
+    semantic_search_turkish_batch,
+    turkish_index_ready,
+)
+from services.embedding_service import get_embedding_stats
+from services.inference_executor import run_inference, InferenceQueueFull, get_inference_stats
+from utils.log_utils import setup_logging, get_logger, get_logging_stats, RequestIdMiddleware
+from utils.metrics import MetricsMiddleware, register_stats, render_prometheus
+
+
+# The sidecar answers searches itself, whatever SEARCH_SIDECAR_URL says
+search_client.set_sidecar_url(None)
+
+logger = get_logger(__name__)
+
+STATS_SOURCES = {
+    "embeddings": get_embedding_stats,
+    "inference": get_inference_stats,
+    "logging": get_logging_stats,
+}
+
+for name, stats_fn in STATS_SOURCES.items():
+    register_stats(f"arabul_sidecar_{name}", stats_fn)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Loaded before the socket is bound, so a worker that can connect gets a warm model
+    timings = await asyncio.to_thread(load_search_resources)
+    logger.info("search sidecar ready", extra={name: round(seconds, 3) for name, seconds in timings.items()})
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def _search(request: SidecarSearchRequest):
+    queries, top_k = request.queries, request.top_k
+    if request.language == "tr":
+        if len(queries) == 1:
+            return [semantic_search_turkish(queries[0], top_k)]
+        return semantic_search_turkish_batch(queries, top_k)
+
+    threshold = {} if request.score_threshold is None else {"score_threshold": request.score_threshold}
+    # Single queries from all workers are micro-batched together by the query encoder
+    if len(queries) == 1:
+        return [semantic_search(queries[0], top_k, **threshold)]
+    return semantic_search_batch(queries, top_k, **threshold)
+
+
+@app.post("/search")
+async def search(request: SidecarSearchRequest):
+    try:
+        results = await run_inference(_search, request)
+    except InferenceQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Search sidecar is busy",
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER)},
+        )
+    return {"results": results}
+
+
+@app.get("/status")
+def status():
+    return {**search_status(), "turkish_index": turkish_index_ready()}
+
+
+@app.get("/stats")
+def service_stats():
+    return {name: stats_fn() for name, stats_fn in STATS_SOURCES.items()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
+
+if __name__ == "__main__":
+    # python -m services.search_sidecar --url unix:/run/arabul/search.sock
+    #   loads the query models and the NACE index once and serves the searches of every
+    #   uvicorn worker started with the same SEARCH_SIDECAR_URL
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=SEARCH_SIDECAR_URL, help="unix:/path/to.sock or http://127.0.0.1:8765")
+    args = parser.parse_args()
+    if not args.url:
+        parser.error("set SEARCH_SIDECAR_URL in config.py or pass --url")
+
+    import uvicorn
+    from urllib.parse import urlsplit
+
+    setup_logging()
+    base_url, uds = search_client.split_url(args.url)
+    if uds:
+        uvicorn.run(app, uds=uds, log_level="warning", access_log=False)
+    else:
+        address = urlsplit(base_url)
+        uvicorn.run(app, host=address.hostname, port=address.port or 80, log_level="warning", access_log=False)
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical upstream calls: while a call for `key` is in flight,
+    other callers for the same key wait for its outcome instead of issuing their own.
+
+    Sync callers (threads) and async callers (one event loop) are coalesced separately.
+    `copy_result` is applied to the value handed to waiting callers, for results the
+    callers go on to mutate.
+    """
+
+    def __init__(self, name: str, copy_result: Optional[Callable[[Any], Any]] = None):
+        self.name = name
+        self.copy_result = copy_result
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[Tuple[int, str], asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def _shared(self, value):
+        return self.copy_result(value) if self.copy_result is not None else value
+
+    def do(self, key: str, fn: Callable, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                is_leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                is_leader = True
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return self._shared(call.result)
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable, *args, **kwargs):
+        """
+        Async counterpart of do: `fn` is a coroutine function.
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            self.calls += 1
+            task = self._async_calls.get(flight_key)
+            is_leader = task is None
+            if is_leader:
+                # The call runs in a task owned by the flight, not by the first caller
+                task = self._async_calls[flight_key] = loop.create_task(fn(*args, **kwargs))
+                task.add_done_callback(lambda t: self._finish_async(flight_key, t))
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        # shield: a cancelled caller, the first one included, must not cancel the shared call
+        result = await asyncio.shield(task)
+        return result if is_leader else self._shared(result)
+
+    def _finish_async(self, flight_key: Tuple[int, str], task: asyncio.Task):
+        with self._lock:
+            if self._async_calls.get(flight_key) is task:
+                del self._async_calls[flight_key]
+        # Nobody may be waiting: mark the outcome as retrieved
+        task.cancelled() or task.exception()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._async_calls),
+            }
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(name: str, copy_result: Optional[Callable[[Any], Any]] = None) -> SingleFlight:
+    """
+    Named SingleFlight shared by every module that asks for the same name.
+    """
+    with _flights_lock:
+        flight = _flights.get(name)
+        if flight is None:
+            flight = _flights[name] = SingleFlight(name, copy_result)
+        return flight
+
+
+def get_single_flight_stats() -> Dict:
+    with _flights_lock:
+        flights = list(_flights.values())
+    return {f.name: f.stats() for f in flights}
@@ -1,33 +1,172 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Dict, List
 from deep_translator import GoogleTranslator, MyMemoryTranslator
+from config import CACHE_DB_PATH, TRANSLATION_CACHE_TTL, TRANSLATION_BATCH_WORKERS
+from services.cache_store import SQLiteTTLStore
+from utils.log_utils import get_logger, setup_logging
+from utils.metrics import timed
 
 
-def translate_to_english(query: str) -> str:
+logger = get_logger(__name__)
+
+# deep_translator keeps the text being translated in instance state (_url_params), so an
+# instance must never be shared between threads: each thread creates and reuses its own.
+TRANSLATORS = {
+    "mymemory_en": lambda: MyMemoryTranslator(source="tr-TR", target="en-US"),
+    "google_en": lambda: GoogleTranslator(source="auto", target="en"),
+    "google_tr": lambda: GoogleTranslator(source="auto", target="tr"),
+    "mymemory_tr": lambda: MyMemoryTranslator(source="en-US", target="tr-TR"),
+}
+_local = threading.local()
+
+
+def _translator(name: str):
+    translators = _local.__dict__.setdefault("translators", {})
+    if name not in translators:
+        translators[name] = TRANSLATORS[name]()
+    return translators[name]
+
+# Persistent translation cache keyed by (direction, text). Query translations ("en", "tr") expire
+# after TRANSLATION_CACHE_TTL; NACE category descriptions have their own "nace" keys, stored
+# without expiry, so a query translating the same text never makes them expire.
+translation_store = SQLiteTTLStore(CACHE_DB_PATH, table="translation")
+
+
+def _cache_key(direction: str, text: str) -> str:
+    return f"{direction}:{text.strip()}"
+
+
+@timed("translation", "to_en")
+def _translate_to_english_remote(query: str):
     try:
-        mymemory_en = MyMemoryTranslator(source="tr-TR", target="en-US")
-        result = mymemory_en.translate(query)
-        return result
+        return _translator("mymemory_en").translate(query)
     except Exception as mymemory_err:
-        print("MyMemory→EN failed:", mymemory_err)
+        logger.warning("MyMemory translation to English failed", extra={"error": str(mymemory_err)})
 
     try:
-        google_en = GoogleTranslator(source="auto", target="en")
-        result = google_en.translate(query)
-        return result
+        return _translator("google_en").translate(query)
     except Exception as google_err:
-        print("Google→EN failed:", google_err)
+        logger.warning("Google translation to English failed", extra={"error": str(google_err)})
 
-    return query
+    return None
 
 
-def translate_to_turkish(query):
+@timed("translation", "to_tr")
+def _translate_to_turkish_remote(query: str):
     try:
-        google_tr = GoogleTranslator(source="auto", target="tr")
-        return google_tr.translate(query)
+        return _translator("google_tr").translate(query)
     except Exception as google_err:
-        print(google_err)
+        logger.warning("Google translation to Turkish failed", extra={"error": str(google_err)})
         try:
-            mymemory_tr = MyMemoryTranslator(source="en-US", target="tr-TR")
-            return mymemory_tr.translate(query)
+            return _translator("mymemory_tr").translate(query)
         except Exception as mymemory_err:
-            print(mymemory_err)
-            return query
+            logger.warning("MyMemory translation to Turkish failed", extra={"error": str(mymemory_err)})
+            return None
+
+
+def translate_to_english(query: str) -> str:
+    key = _cache_key("en", query)
+    found, cached = translation_store.get(key)
+    if found:
+        return cached
+
+    result = _translate_to_english_remote(query)
+    if result is None:
+        # Failures fall back to the original text and are not cached
+        return query
+
+    translation_store.set(key, result, ttl=TRANSLATION_CACHE_TTL)
+    return result
+
+
+def translate_many_to_english(queries: List[str]) -> List[str]:
+    """
+    translate_to_english for a list: each distinct text is looked up once and the cache
+    misses are translated concurrently. Results are in input order.
+    """
+    unique = list(dict.fromkeys(q.strip() for q in queries))
+    translations = {}
+    missing = []
+    for text in unique:
+        found, cached = translation_store.get(_cache_key("en", text))
+        if found:
+            translations[text] = cached
+        else:
+            missing.append(text)
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(TRANSLATION_BATCH_WORKERS, len(missing))) as executor:
+            for text, result in zip(missing, executor.map(_translate_to_english_remote, missing)):
+                if result is None:
+                    translations[text] = text
+                else:
+                    translation_store.set(_cache_key("en", text), result, ttl=TRANSLATION_CACHE_TTL)
+                    translations[text] = result
+
+    return [translations[q.strip()] for q in queries]
+
+
+def translate_to_turkish(query):
+    key = _cache_key("tr", query)
+    found, cached = translation_store.get(key)
+    if found:
+        return cached
+
+    result = _translate_to_turkish_remote(query)
+    if result is None:
+        return query
+
+    translation_store.set(key, result, ttl=TRANSLATION_CACHE_TTL)
+    return result
+
+
+def translate_nace_description(description: str) -> str:
+    """
+    Turkish text of a NACE category description. Served from the precomputed table;
+    a description missing from it is translated once and added permanently.
+    """
+    key = _cache_key("nace", description)
+    found, cached = translation_store.get(key)
+    if found:
+        return cached
+
+    result = _translate_to_turkish_remote(description)
+    if result is None:
+        return description
+
+    translation_store.set(key, result, ttl=None)
+    return result
+
+
+def preload_nace_translations(descriptions: Iterable[str]) -> Dict[str, int]:
+    """
+    Builds the Turkish table for the given NACE descriptions, translating only the missing ones.
+    """
+    descriptions = {d.strip('"') for d in descriptions if d}
+    missing = [d for d in descriptions if not translation_store.contains(_cache_key("nace", d))]
+
+    translated = 0
+    for description in missing:
+        result = _translate_to_turkish_remote(description)
+        if result is not None:
+            translation_store.set(_cache_key("nace", description), result, ttl=None)
+            translated += 1
+
+    logger.info("preload_nace_translations",
+                extra={"descriptions": len(descriptions), "missing": len(missing), "translated": translated})
+    return {"descriptions": len(descriptions), "missing": len(missing), "translated": translated}
+
+
+def get_translation_cache_stats() -> Dict:
+    return translation_store.stats()
+
+
+if __name__ == "__main__":
+    # python -m services.translation_service  -> builds the Turkish NACE description table
+    from services.chromadb_service import get_collection
+
+    setup_logging()
+    metadatas = get_collection().get(include=["metadatas"])["metadatas"]
+    preload_nace_translations(meta["category"] for meta in metadatas if meta and meta.get("category"))
+    print(get_translation_cache_stats())
@@ -2,6 +2,15 @@
 import axios from 'axios';
 import CONFIG from "../../config.ts";
 
+export type BusinessDistanceEvent = {
+  event: 'distance' | 'unresolved';
+  SupplierID: string | number | null;
+  Address: string | null;
+  distance_km?: number;
+  duration?: string;
+  distance_estimated?: boolean;
+};
+
 
 export const chatService = {  
   getBusinesses: async (data: any, endpoint: string = '/chat/get_businesses') => {
@@ -62,6 +71,73 @@ export const chatService = {
     }
   },
   
+  // Streaming variant of getBusinesses (POST ...?stream=true, NDJSON response).
+  // Events arrive in order: "suppliers" (raw list), "distance" / "unresolved" per supplier
+  // as they are geocoded and routed, then "sorted" with the same data getBusinesses returns.
+  // Resolves with the final sorted response.
+  getBusinessesStream: (
+    data: any,
+    handlers: {
+      onSuppliers?: (suppliers: any) => void;
+      onDistance?: (event: BusinessDistanceEvent) => void;
+      onUnresolved?: (event: BusinessDistanceEvent) => void;
+    } = {},
+    endpoint: string = '/chat/get_businesses'
+  ): Promise<{ success: boolean; data?: any }> => {
+    return new Promise((resolve) => {
+      const xhr = new XMLHttpRequest();
+      let consumed = 0;
+      let buffer = '';
+      let sorted: any = null;
+
+      const handleLine = (line: string) => {
+        if (!line.trim()) return;
+        try {
+          const event = JSON.parse(line);
+          if (event.event === 'suppliers') handlers.onSuppliers?.(event.data);
+          else if (event.event === 'distance') handlers.onDistance?.(event);
+          else if (event.event === 'unresolved') handlers.onUnresolved?.(event);
+          else if (event.event === 'sorted') sorted = event.data;
+        } catch (parseError) {
+          console.error("Failed to parse stream line:", parseError);
+        }
+      };
+
+      // responseText grows as chunks arrive; only complete lines are handled
+      const readNewLines = () => {
+        buffer += xhr.responseText.slice(consumed);
+        consumed = xhr.responseText.length;
+        const lines = buffer.split('\n');
+        buffer = lines.pop() ?? '';
+        lines.forEach(handleLine);
+      };
+
+      xhr.open('POST', `${CONFIG.API_BASE_URL}${endpoint}?stream=true`);
+      xhr.setRequestHeader('Content-Type', 'application/json');
+      xhr.onprogress = readNewLines;
+      xhr.onload = () => {
+        readNewLines();
+        handleLine(buffer);
+        if (xhr.status >= 200 && xhr.status < 300 && sorted !== null) {
+          resolve({ success: true, data: sorted });
+        } else {
+          console.error(`Error streaming ${endpoint}: status ${xhr.status}`);
+          resolve({ success: false });
+        }
+      };
+      xhr.onerror = () => {
+        console.error(`Error streaming ${endpoint}`);
+        resolve({ success: false });
+      };
+
+      const processedData = { ...data };
+      if (processedData.naceCode && typeof processedData.naceCode === 'object') {
+        processedData.naceCode = processedData.naceCode.code || "";
+      }
+      xhr.send(JSON.stringify(processedData));
+    });
+  },
+
   getNaceCodes: async (query: string, language: string, endpoint: string = '/chat/get_nace_codes') => {
     try {
       const response = await axios.post(`${CONFIG.API_BASE_URL}${endpoint}`, { query, language });
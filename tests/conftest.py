@@ -39,6 +39,10 @@ def client(monkeypatch):
         user_routes, "get_popular_suppliers",
         lambda: [{"supplier_id": "SUP123", "count": 10}],
     )
+    monkeypatch.setattr(
+        user_routes, "get_favorite_counts",
+        lambda ids: {sid: 10 if sid == "SUP123" else 0 for sid in ids},
+    )
     monkeypatch.setattr(
         user_routes, "submit_complaint",
         lambda *_, **__: {"message": "Complaint submitted successfully",
@@ -0,0 +1,146 @@
+# tests/performanceTest/encoder_backend_benchmark.py
+#
+# Compares the NACE query encoder backends (ENCODER_BACKEND = torch / onnx / onnx-int8) on
+# load time, resident memory and encode latency. Each backend runs in its own process, so
+# the RSS numbers are not mixed. The top-k agreement of an ONNX backend is read from the
+# report written by `python -m services.encoder_backends`, so export and check first:
+#   python -m services.encoder_backends --backend onnx
+#   python -m services.encoder_backends --backend onnx-int8
+#   python tests/performanceTest/encoder_backend_benchmark.py --rounds 300 --output encoder_backends.json
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+QUERIES = [
+    "plumber", "car repair", "hair salon", "electrician", "bakery", "dentist", "restaurant",
+    "furniture maker", "painter", "computer repair", "pharmacy", "tailor", "locksmith",
+    "someone to fix my leaking kitchen tap", "wedding photographer for a beach ceremony",
+    "repair of household appliances and washing machines", "sale of new and used cars",
+    "private english lessons for children", "roof insulation and waterproofing",
+    "veterinary clinic open on sunday", "mobile phone screen replacement",
+    "air conditioning installation and maintenance", "printing of business cards and banners",
+    "construction of residential buildings", "renting of construction machinery with operator",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(backend: str, queries, rounds: int, batch_size: int) -> dict:
+    from config import MODEL_NAME
+    from services.encoder_backends import load_encoder_model
+
+    rss_start = rss_mb()
+    start = time.perf_counter()
+    model = load_encoder_model(MODEL_NAME, backend=backend)
+    load_s = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    model.encode(queries[:8])  # warm-up
+
+    single = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        model.encode(queries[i % len(queries)])
+        single.append((time.perf_counter() - start) * 1000)
+
+    batch = (queries * (batch_size // len(queries) + 1))[:batch_size]
+    batch_runs = max(1, rounds // batch_size)
+    start = time.perf_counter()
+    for _ in range(batch_runs):
+        model.encode(batch, batch_size=batch_size)
+    batch_s = time.perf_counter() - start
+
+    return {
+        "requested_backend": backend,
+        # load_encoder_model falls back to torch when the ONNX export is missing or failed its check
+        "loaded_backend": getattr(model, "backend", "torch"),
+        "load_s": round(load_s, 2),
+        "rss_model_mb": round(rss_loaded - rss_start, 1),
+        "rss_peak_mb": round(peak_rss_mb(), 1),
+        "single_ms": {
+            "p50": round(percentile(single, 50), 2),
+            "p95": round(percentile(single, 95), 2),
+            "p99": round(percentile(single, 99), 2),
+        },
+        "batch_size": batch_size,
+        "batch_queries_per_s": round(batch_runs * batch_size / batch_s, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--rounds", type=int, default=200, help="single-query encodes per backend")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--queries-file", help="queries to encode, one per line")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    queries = QUERIES
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    if args.child:
+        print(json.dumps(measure(args.child, queries, args.rounds, args.batch_size)))
+        return
+
+    from services.encoder_backends import read_agreement_report
+
+    results = []
+    for backend in args.backends.split(","):
+        command = [sys.executable, __file__, "--child", backend, "--rounds", str(args.rounds),
+                   "--batch-size", str(args.batch_size)]
+        if args.queries_file:
+            command += ["--queries-file", args.queries_file]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"{backend}: failed\n{completed.stderr[-2000:]}")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        report = read_agreement_report(backend) if backend != "torch" else None
+        result["topk_agreement"] = report["topk_agreement"] if report else None
+        results.append(result)
+
+    print(f"{'backend':<12}{'loaded':<10}{'load s':>8}{'model MB':>10}{'peak MB':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'batch q/s':>11}{'top-k agr':>11}")
+    for r in results:
+        agreement = f"{r['topk_agreement']:.3f}" if r["topk_agreement"] is not None else "-"
+        print(f"{r['requested_backend']:<12}{r['loaded_backend']:<10}{r['load_s']:>8.2f}{r['rss_model_mb']:>10.1f}"
+              f"{r['rss_peak_mb']:>9.1f}{r['single_ms']['p50']:>9.2f}{r['single_ms']['p95']:>9.2f}"
+              f"{r['batch_queries_per_s']:>11.1f}{agreement:>11}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
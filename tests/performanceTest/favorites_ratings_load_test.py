@@ -0,0 +1,59 @@
+# tests/performanceTest/favorites_ratings_load_test.py
+#
+# Exercises the MySQL-backed user routes. Run it headless with --csv against the
+# server before and after a change and compare the "95%" column of the *_stats.csv files:
+#   locust -f tests/performanceTest/favorites_ratings_load_test.py --headless -u 50 -r 10 -t 2m --csv=favorites
+
+from locust import HttpUser, between, task
+import random
+from datetime import datetime
+
+SUPPLIER_IDS = [str(i) for i in range(1000, 1050)]
+
+
+class FavoritesRatingsUser(HttpUser):
+    host = "http://localhost:8000"
+    wait_time = between(0.5, 1.5)
+
+    def on_start(self):
+        # Use an existing test user id range; the routes only need the FK to resolve
+        self.user_id = random.randint(1, 20)
+
+    @task(3)
+    def toggle_favorite(self):
+        now = datetime.now().isoformat()
+        payload = {
+            "user_id": self.user_id,
+            "supplier_id": random.choice(SUPPLIER_IDS),
+            "screen_opened_at": now,
+            "favorited_at": now,
+            "is_valid_favorite": True
+        }
+        self.client.post("/add-favourite", json=payload, name="/add-favourite")
+
+    @task(5)
+    def get_favorites(self):
+        self.client.get(f"/favorites/{self.user_id}", name="/favorites/[user_id]")
+
+    @task(5)
+    def is_favorite(self):
+        self.client.get(
+            "/is-favorite",
+            params={"user_id": self.user_id, "supplier_id": random.choice(SUPPLIER_IDS)},
+            name="/is-favorite"
+        )
+
+    @task(2)
+    def submit_rating(self):
+        payload = {
+            "user_id": self.user_id,
+            "supplier_id": random.choice(SUPPLIER_IDS),
+            "rating": random.randint(1, 5),
+            "rated_at": datetime.now().isoformat()
+        }
+        self.client.post("/rating", json=payload, name="/rating")
+
+    @task(4)
+    def rating_rankings(self):
+        self.client.post("/rating/rankings", json=random.sample(SUPPLIER_IDS, 10), name="/rating/rankings")
+
@@ -0,0 +1,283 @@
+# tests/performanceTest/mock_upstreams.py
+#
+# Local stand-in for every external API the backend calls: supplier list and detail,
+# Google Geocoding and Routes (computeRouteMatrix), Nominatim, Google Translate and MyMemory.
+# Responses are deterministic (same request, same answer) and every endpoint has configurable
+# latency and error injection, so benchmark runs are reproducible without network access.
+# Started by offline_benchmark.py; can also be run alone:
+#   python tests/performanceTest/mock_upstreams.py --port 8900 --latency geocode=40:10 --latency supplier_list=150 --error-rate routes=0.02
+#
+# Settings can be changed while running (POST /_mock/config with the same fields as the CLI)
+# and GET /_mock/stats returns the number of calls and injected errors per endpoint.
+
+import argparse
+import asyncio
+import hashlib
+import html
+import math
+import random
+import threading
+from typing import Dict, List
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse
+
+ENDPOINTS = ("supplier_list", "supplier_detail", "geocode", "routes", "nominatim", "google_translate", "mymemory")
+
+# Rough bounding box of Northern Cyprus, where the generated suppliers live
+LAT_RANGE = (35.05, 35.45)
+LNG_RANGE = (32.80, 34.20)
+
+app = FastAPI()
+
+_settings = {
+    "latency_ms": {name: 0.0 for name in ENDPOINTS},
+    "jitter_ms": {name: 0.0 for name in ENDPOINTS},
+    "error_rate": {name: 0.0 for name in ENDPOINTS},
+    "suppliers_per_sector": 25,
+    "address_pool": 400,
+    "seed": 0,
+}
+_counts = {name: {"calls": 0, "errors": 0} for name in ENDPOINTS}
+_lock = threading.Lock()
+_rng = random.Random(0)
+
+
+def _stable_int(*parts) -> int:
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _stable_unit(*parts) -> float:
+    return _stable_int(*parts) / 2 ** 64
+
+
+async def _inject(endpoint: str):
+    """
+    Sleeps for the configured latency and returns an error response if one is injected, else None.
+    """
+    with _lock:
+        _counts[endpoint]["calls"] += 1
+        latency = _settings["latency_ms"][endpoint]
+        jitter = _settings["jitter_ms"][endpoint]
+        delay = max(0.0, _rng.gauss(latency, jitter) if jitter else latency) / 1000
+        failed = _rng.random() < _settings["error_rate"][endpoint]
+        if failed:
+            _counts[endpoint]["errors"] += 1
+
+    if delay:
+        await asyncio.sleep(delay)
+    if failed:
+        return JSONResponse({"error": "injected failure", "endpoint": endpoint}, status_code=500)
+    return None
+
+
+def _address(index: int) -> str:
+    return f"Mock Sokak No:{index}, Lefkoşa"
+
+
+def _coordinates(address: str):
+    lat = LAT_RANGE[0] + _stable_unit("lat", address) * (LAT_RANGE[1] - LAT_RANGE[0])
+    lng = LNG_RANGE[0] + _stable_unit("lng", address) * (LNG_RANGE[1] - LNG_RANGE[0])
+    return round(lat, 6), round(lng, 6)
+
+
+def _supplier(supplier_id: int, nace_code: str, city: str) -> Dict:
+    return {
+        "SupplierID": str(supplier_id),
+        "CompanyName": f"Mock Supplier {supplier_id}",
+        "Address": _address(supplier_id % _settings["address_pool"]),
+        "City": city,
+        "NaceCode": nace_code,
+        "PhoneNumber": "+90 392 000 00 00",
+    }
+
+
+# ──────────── supplier API ────────────
+@app.post("/supplier/list")
+async def supplier_list(request: Request):
+    error = await _inject("supplier_list")
+    if error:
+        return error
+
+    payload = await request.json()
+    per_sector = _settings["suppliers_per_sector"]
+    cities = [c["City"] for c in payload.get("Cities", [])]
+    sectors = []
+    for nace in payload.get("NaceCodes", []):
+        code = nace["NaceCode"]
+        suppliers = []
+        for city in cities:
+            base = _stable_int(code, city) % 100000
+            suppliers.extend(_supplier(base + i, code, city) for i in range(per_sector))
+        sectors.append({"NaceCode": code, "Suppliers": suppliers})
+    return {"success": True, "data": sectors}
+
+
+@app.post("/supplier/detail")
+async def supplier_detail(request: Request):
+    error = await _inject("supplier_detail")
+    if error:
+        return error
+
+    supplier_id = str((await request.json()).get("SupplierID"))
+    detail = _supplier(_stable_int(supplier_id) % 100000, "00.00", "Lefkoşa")
+    detail.update({
+        "SupplierID": supplier_id,
+        "Description": "Mock supplier used by the offline benchmark. " * 8,
+        "WorkingHours": "Pazartesi-Cumartesi 08:00-18:00",
+    })
+    return detail
+
+
+# ──────────── Google Geocoding / Nominatim ────────────
+@app.get("/maps/api/geocode/json")
+async def geocode(address: str = ""):
+    error = await _inject("geocode")
+    if error:
+        return error
+
+    lat, lng = _coordinates(address)
+    return {"status": "OK", "results": [{"geometry": {"location": {"lat": lat, "lng": lng}}}]}
+
+
+@app.get("/nominatim/search")
+async def nominatim(q: str = ""):
+    error = await _inject("nominatim")
+    if error:
+        return error
+
+    lat, lng = _coordinates(q)
+    return [{"lat": str(lat), "lon": str(lng)}]
+
+
+# ──────────── Google Routes computeRouteMatrix ────────────
+def _lat_lng(waypoint: Dict):
+    location = waypoint["waypoint"]["location"]["latLng"]
+    return location["latitude"], location["longitude"]
+
+
+def _haversine_km(a, b) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(h))
+
+
+@app.post("/routes/computeRouteMatrix")
+async def routes(request: Request):
+    error = await _inject("routes")
+    if error:
+        return error
+
+    payload = await request.json()
+    rows: List[Dict] = []
+    for o, origin in enumerate(payload.get("origins", [])):
+        for d, destination in enumerate(payload.get("destinations", [])):
+            km = _haversine_km(_lat_lng(origin), _lat_lng(destination)) * 1.3  # roads are not straight
+            rows.append({
+                "originIndex": o,
+                "destinationIndex": d,
+                "distanceMeters": int(km * 1000),
+                "duration": f"{int(km / 40 * 3600)}s",
+            })
+    return rows
+
+
+# ──────────── translators ────────────
+def _translated(text: str, target: str) -> str:
+    return f"{text} [{target}]"
+
+
+@app.get("/translate/m")
+async def google_translate(q: str = "", tl: str = "en"):
+    error = await _inject("google_translate")
+    if error:
+        return error
+    # deep_translator reads the <div class="t0"> of the mobile page
+    return HTMLResponse(f'<html><body><div class="t0">{html.escape(_translated(q, tl))}</div></body></html>')
+
+
+@app.get("/mymemory/get")
+async def mymemory(q: str = "", langpair: str = "tr-TR|en-US"):
+    error = await _inject("mymemory")
+    if error:
+        return error
+    target = langpair.split("|")[-1]
+    return {"responseData": {"translatedText": _translated(q, target)}, "matches": []}
+
+
+# ──────────── control ────────────
+def apply_settings(latency: Dict[str, str] = None, error_rate: Dict[str, float] = None, **options):
+    """
+    latency values are "mean_ms" or "mean_ms:jitter_ms"; "*" applies to every endpoint.
+    """
+    global _rng
+    with _lock:
+        for name, spec in (latency or {}).items():
+            mean, _, jitter = str(spec).partition(":")
+            for endpoint in (ENDPOINTS if name == "*" else (name,)):
+                _settings["latency_ms"][endpoint] = float(mean)
+                _settings["jitter_ms"][endpoint] = float(jitter or 0)
+        for name, rate in (error_rate or {}).items():
+            for endpoint in (ENDPOINTS if name == "*" else (name,)):
+                _settings["error_rate"][endpoint] = float(rate)
+        for key in ("suppliers_per_sector", "address_pool", "seed"):
+            if options.get(key) is not None:
+                _settings[key] = int(options[key])
+        _rng = random.Random(_settings["seed"])
+
+
+@app.post("/_mock/config")
+async def update_config(request: Request):
+    try:
+        apply_settings(**(await request.json()))
+    except (KeyError, TypeError, ValueError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return _settings
+
+
+@app.get("/_mock/stats")
+async def mock_stats():
+    with _lock:
+        return {name: dict(counts) for name, counts in _counts.items()}
+
+
+@app.post("/_mock/reset")
+async def reset_stats():
+    with _lock:
+        for counts in _counts.values():
+            counts.update(calls=0, errors=0)
+    return Response(status_code=204)
+
+
+def _pairs(values: List[str]) -> Dict[str, str]:
+    pairs = {}
+    for value in values or []:
+        name, _, spec = value.partition("=")
+        if name != "*" and name not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint {name!r}, expected one of {', '.join(ENDPOINTS)} or *")
+        pairs[name] = spec
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", action="append", metavar="ENDPOINT=MS[:JITTER_MS]")
+    parser.add_argument("--error-rate", action="append", metavar="ENDPOINT=RATE")
+    parser.add_argument("--suppliers-per-sector", type=int, default=25)
+    parser.add_argument("--address-pool", type=int, default=400,
+                        help="distinct supplier addresses; lower values raise the geocode cache hit ratio")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    apply_settings(_pairs(args.latency), _pairs(args.error_rate), suppliers_per_sector=args.suppliers_per_sector,
+                   address_pool=args.address_pool, seed=args.seed)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
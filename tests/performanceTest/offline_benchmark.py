@@ -0,0 +1,389 @@
+# tests/performanceTest/offline_benchmark.py
+#
+# Reproducible, network-free benchmark of the chat and user endpoints. `run` starts
+# mock_upstreams.py and offline_server.py on free local ports and runs each scenario
+# closed-loop (N concurrent clients, back to back) for a fixed time. It writes p50/p95/p99,
+# RPS, error rate and upstream call counts as JSON. `compare` diffs two result files and
+# exits non-zero on a regression, for checks between commits:
+#
+#   python tests/performanceTest/offline_benchmark.py run --model sentence-transformers/all-MiniLM-L6-v2 \
+#       --chroma-path chroma_database --latency '*=30:10' --latency supplier_list=150 --output base.json
+#   git checkout my-branch
+#   python tests/performanceTest/offline_benchmark.py run ... --output new.json
+#   python tests/performanceTest/offline_benchmark.py compare base.json new.json --tolerance 0.1
+#
+# Scenarios that use MySQL (user_*, favorites_detailed) only run with --with-db; see
+# offline_server.py for the BENCH_DB_* connection variables.
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(HERE, "..", ".."))
+
+EN_QUERIES = ["plumber", "car repair", "hair salon", "electrician", "bakery", "dentist", "restaurant",
+              "furniture maker", "painter", "computer repair", "pharmacy", "tailor", "locksmith"]
+TR_QUERIES = ["tesisatçı", "oto tamirci", "kuaför", "elektrikçi", "fırın", "diş hekimi", "lokanta",
+              "mobilyacı", "boyacı", "bilgisayar tamiri", "eczane", "terzi", "çilingir"]
+NACE_CODES = ["I56.1", "F43.2", "G47.1", "N81.2", "S95.2"]
+CITIES = ["Lefkoşa", "Girne", "Gazimağusa", "Güzelyurt", "İskele"]
+SUPPLIER_IDS = [str(i) for i in range(1000, 1050)]
+USER_IDS = range(1, 21)
+
+
+def _business_request(rng: random.Random) -> dict:
+    return {
+        "naceCode": rng.choice(NACE_CODES),
+        "cities": [{"city": rng.choice(CITIES)}],
+        "latitude": 35.1856 + rng.uniform(-0.05, 0.05),
+        "longitude": 33.3823 + rng.uniform(-0.05, 0.05),
+    }
+
+
+def chat_nace_codes(rng):
+    if rng.random() < 0.5:
+        return "nace_en", "POST", "/chat/get_nace_codes", {"json": {"query": rng.choice(EN_QUERIES), "language": "en"}}
+    return "nace_tr", "POST", "/chat/get_nace_codes", {"json": {"query": rng.choice(TR_QUERIES), "language": "tr"}}
+
+
+def chat_nace_codes_batch(rng):
+    queries = [rng.choice(EN_QUERIES + TR_QUERIES) for _ in range(32)]
+    return "nace_batch", "POST", "/chat/get_nace_codes_batch", {"json": {"queries": queries, "language": "tr"}}
+
+
+def chat_businesses(rng):
+    return "businesses", "POST", "/chat/get_businesses", {"json": _business_request(rng)}
+
+
+def chat_businesses_stream(rng):
+    return "businesses_stream", "POST", "/chat/get_businesses", {"json": _business_request(rng), "params": {"stream": "true"}}
+
+
+def user_mix(rng):
+    # Same weights as favorites_ratings_load_test.py
+    user_id = rng.choice(USER_IDS)
+    supplier_id = rng.choice(SUPPLIER_IDS)
+    now = datetime.now().isoformat()
+    choice = rng.choices(["favourite", "favorites", "is_favorite", "rating", "rankings"], weights=[3, 5, 5, 2, 4])[0]
+    if choice == "favourite":
+        return choice, "POST", "/add-favourite", {"json": {"user_id": user_id, "supplier_id": supplier_id, "screen_opened_at": now,
+                                                           "favorited_at": now, "is_valid_favorite": True}}
+    if choice == "favorites":
+        return choice, "GET", f"/favorites/{user_id}", {}
+    if choice == "is_favorite":
+        return choice, "GET", "/is-favorite", {"params": {"user_id": user_id, "supplier_id": supplier_id}}
+    if choice == "rating":
+        return choice, "POST", "/rating", {"json": {"user_id": user_id, "supplier_id": supplier_id,
+                                                    "rating": rng.randint(1, 5), "rated_at": now}}
+    return choice, "POST", "/rating/rankings", {"json": rng.sample(SUPPLIER_IDS, 10)}
+
+
+def favorites_detailed(rng):
+    return "favorites_detailed", "GET", f"/favorites-detailed/{rng.choice(USER_IDS)}", {}
+
+
+# name -> (request factory, needs MySQL)
+SCENARIOS = {
+    "chat_nace_codes": (chat_nace_codes, False),
+    "chat_nace_codes_batch": (chat_nace_codes_batch, False),
+    "chat_businesses": (chat_businesses, False),
+    "chat_businesses_stream": (chat_businesses_stream, False),
+    "user_mix": (user_mix, True),
+    "favorites_detailed": (favorites_detailed, True),
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(latencies_ms, errors: int, elapsed: float) -> dict:
+    count = len(latencies_ms)
+    if not count:
+        return {"requests": 0, "errors": errors, "error_rate": 1.0 if errors else 0.0, "rps": 0.0}
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4),
+        "rps": round(count / elapsed, 2),
+        "latency_ms": {
+            "mean": round(sum(latencies_ms) / count, 2),
+            "p50": round(percentile(latencies_ms, 50), 2),
+            "p95": round(percentile(latencies_ms, 95), 2),
+            "p99": round(percentile(latencies_ms, 99), 2),
+            "max": round(max(latencies_ms), 2),
+        },
+    }
+
+
+async def run_scenario(app_url: str, factory, concurrency: int, duration: float, warmup: float, seed: int) -> dict:
+    """
+    Closed loop: `concurrency` clients send requests back to back. Requests that start
+    during the first `warmup` seconds are not recorded.
+    """
+    samples = {}  # route name -> ([latency ms], errors)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=app_url, timeout=60, limits=limits) as client:
+        start = time.perf_counter()
+        measure_from = start + warmup
+        stop_at = measure_from + duration
+
+        async def worker(worker_id: int):
+            rng = random.Random(seed * 1000 + worker_id)
+            while True:
+                sent = time.perf_counter()
+                if sent >= stop_at:
+                    return
+                name, method, path, kwargs = factory(rng)
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                if sent < measure_from:
+                    continue
+                latencies, errors = samples.setdefault(name, ([], [0]))
+                latencies.append((time.perf_counter() - sent) * 1000)
+                errors[0] += failed
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - measure_from
+
+    all_latencies = [l for latencies, _ in samples.values() for l in latencies]
+    result = summarize(all_latencies, sum(errors[0] for _, errors in samples.values()), elapsed)
+    if len(samples) > 1:
+        result["routes"] = {name: summarize(latencies, errors[0], elapsed)
+                            for name, (latencies, errors) in sorted(samples.items())}
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(args, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen([sys.executable, *args], cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT)
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float, log_path: str, check=None):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            with open(log_path) as f:
+                raise SystemExit(f"{url} exited during startup:\n{f.read()[-4000:]}")
+        try:
+            response = httpx.get(url, timeout=2)
+            if response.status_code == 200 and (check is None or check(response.json())):
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"{url} not ready after {timeout}s (log: {log_path})")
+
+
+def _search_warm(stats: dict) -> bool:
+    status = stats.get("startup", {}).get("status")
+    if status == "failed":
+        raise SystemExit("the app failed to load the NACE model or index, see its log")
+    return status == "ready"
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _mock_settings(args) -> dict:
+    def pairs(values):
+        return dict(v.split("=", 1) for v in values or [])
+    return {
+        "latency": pairs(args.latency),
+        "error_rate": pairs(args.error_rate),
+        "suppliers_per_sector": args.suppliers_per_sector,
+        "address_pool": args.address_pool,
+        "seed": args.seed,
+    }
+
+
+def run(args):
+    names = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(unknown)}; available: {', '.join(SCENARIOS)}")
+
+    log_dir = tempfile.mkdtemp(prefix="arabul-bench-logs-")
+    processes = []
+    try:
+        mock_url = args.mock_url
+        if not mock_url:
+            port = _free_port()
+            mock_url = f"http://127.0.0.1:{port}"
+            log = os.path.join(log_dir, "mock.log")
+            processes.append(_start([os.path.join(HERE, "mock_upstreams.py"), "--port", str(port)], log))
+            _wait_ready(f"{mock_url}/_mock/stats", processes[-1], 30, log)
+        httpx.post(f"{mock_url}/_mock/config", json=_mock_settings(args)).raise_for_status()
+
+        app_url = args.app_url
+        if not app_url:
+            port = _free_port()
+            app_url = f"http://127.0.0.1:{port}"
+            command = [os.path.join(HERE, "offline_server.py"), "--port", str(port), "--mock-url", mock_url,
+                       "--supplier-cache-backend", args.supplier_cache_backend]
+            if args.model:
+                command += ["--model", args.model]
+            if args.chroma_path:
+                command += ["--chroma-path", args.chroma_path]
+            if not args.with_db:
+                command.append("--skip-db-init")
+            log = os.path.join(log_dir, "app.log")
+            processes.append(_start(command, log))
+            # The model loads and warms up after the server starts listening; /readyz also wants
+            # MySQL, so the startup status in /stats is used instead
+            _wait_ready(f"{app_url}/stats", processes[-1], args.startup_timeout, log, check=_search_warm)
+
+        results = {}
+        for name in names:
+            factory, needs_db = SCENARIOS[name]
+            if needs_db and not args.with_db:
+                results[name] = {"skipped": "needs --with-db"}
+                continue
+
+            httpx.post(f"{mock_url}/_mock/reset").raise_for_status()
+            print(f"{name}: {args.concurrency} clients, {args.warmup}s warm-up + {args.duration}s", flush=True)
+            result = asyncio.run(run_scenario(app_url, factory, args.concurrency, args.duration, args.warmup, args.seed))
+            result["upstream_calls"] = httpx.get(f"{mock_url}/_mock/stats").json()
+            results[name] = result
+            if "latency_ms" in result:
+                latency = result["latency_ms"]
+                print(f"  {result['rps']:8.1f} rps  p50 {latency['p50']:8.1f}  p95 {latency['p95']:8.1f}  "
+                      f"p99 {latency['p99']:8.1f} ms  errors {result['error_rate']:.2%}", flush=True)
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "warmup_s": args.warmup,
+                "supplier_cache_backend": args.supplier_cache_backend,
+                "mock": _mock_settings(args),
+            },
+            "app_stats": httpx.get(f"{app_url}/stats").json(),
+            "scenarios": results,
+        }
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"results written to {args.output} (server logs in {log_dir})")
+
+
+# Metrics compared by `compare`, and whether higher values are better
+COMPARED = {"p50": False, "p95": False, "p99": False, "rps": True}
+
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["scenarios"]
+    with open(args.candidate) as f:
+        candidate = json.load(f)["scenarios"]
+
+    regressions = []
+    print(f"{'scenario':<24}{'metric':<12}{'baseline':>12}{'candidate':>12}{'change':>10}")
+    for name in sorted(set(baseline) | set(candidate)):
+        old, new = baseline.get(name, {}), candidate.get(name, {})
+        if "latency_ms" not in old or "latency_ms" not in new:
+            print(f"{name:<24}{'(not in both runs)':<12}")
+            continue
+
+        for metric, higher_is_better in COMPARED.items():
+            before = old["rps"] if metric == "rps" else old["latency_ms"][metric]
+            after = new["rps"] if metric == "rps" else new["latency_ms"][metric]
+            change = (after - before) / before if before else 0.0
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > args.tolerance else ""
+            if flag:
+                regressions.append(f"{name} {metric}")
+            print(f"{name:<24}{metric:<12}{before:>12.2f}{after:>12.2f}{change:>+10.1%}{flag}")
+
+        if new["error_rate"] - old["error_rate"] > args.error_tolerance:
+            regressions.append(f"{name} error_rate")
+            print(f"{name:<24}{'error_rate':<12}{old['error_rate']:>12.2%}{new['error_rate']:>12.2%}  REGRESSION")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\nno regressions")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark the scenarios against local mock upstreams")
+    run_parser.add_argument("--scenarios", default="all", help=f"comma separated, from: {', '.join(SCENARIOS)}")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--duration", type=float, default=20, help="measured seconds per scenario")
+    run_parser.add_argument("--warmup", type=float, default=5, help="unrecorded seconds before measuring")
+    run_parser.add_argument("--latency", action="append", metavar="ENDPOINT=MS[:JITTER_MS]",
+                            help="mock upstream latency, ENDPOINT from mock_upstreams.ENDPOINTS or *")
+    run_parser.add_argument("--error-rate", action="append", metavar="ENDPOINT=RATE")
+    run_parser.add_argument("--suppliers-per-sector", type=int, default=25)
+    run_parser.add_argument("--address-pool", type=int, default=400)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--model", help="sentence-transformers model for the NACE search")
+    run_parser.add_argument("--chroma-path", help="Chroma directory holding the NACE collections")
+    run_parser.add_argument("--supplier-cache-backend", default="memory", choices=["memory", "sqlite", "redis"])
+    run_parser.add_argument("--with-db", action="store_true", help="also run the MySQL-backed scenarios")
+    run_parser.add_argument("--mock-url", help="use an already running mock_upstreams.py")
+    run_parser.add_argument("--app-url", help="use an already running offline_server.py")
+    run_parser.add_argument("--startup-timeout", type=float, default=300)
+    run_parser.add_argument("--output", default="benchmark_results.json")
+
+    compare_parser = commands.add_parser("compare", help="diff two result files, exit 1 on regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10,
+                                help="allowed relative slowdown of p50/p95/p99 and drop in rps")
+    compare_parser.add_argument("--error-tolerance", type=float, default=0.01,
+                                help="allowed absolute increase of the error rate")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# tests/performanceTest/offline_server.py
+#
+# Runs the backend (main.app) with every external API pointed at mock_upstreams.py, a
+# throwaway cache directory and access logging off. Started by offline_benchmark.py:
+#   python tests/performanceTest/offline_server.py --port 8001 --mock-url http://127.0.0.1:8900 \
+#       --model sentence-transformers/all-MiniLM-L6-v2 --chroma-path chroma_database
+#
+# The user routes need MySQL; BENCH_DB_HOST / BENCH_DB_PORT / BENCH_DB_USER / BENCH_DB_PASSWORD /
+# BENCH_DB_NAME override the connection settings (e.g. a disposable MySQL container in CI).
+# Without a database, pass --skip-db-init so startup does not try to create the tables.
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+_DB_ENV = {
+    "BENCH_DB_HOST": "host",
+    "BENCH_DB_PORT": "port",
+    "BENCH_DB_USER": "user",
+    "BENCH_DB_PASSWORD": "password",
+    "BENCH_DB_NAME": "database",
+}
+
+
+def configure(mock_url: str, cache_dir: str, model: str = None, chroma_path: str = None,
+              supplier_cache_backend: str = "memory", log_level: str = "WARNING"):
+    """
+    Points the application at the mock upstreams. Must run before main (or any service
+    module) is imported, since they read config at import time.
+    """
+    import config
+
+    config.SUPPLIER_LIST_ENDPOINT = f"{mock_url}/supplier/list"
+    config.SUPPLIER_DETAIL_ENDPOINT = f"{mock_url}/supplier/detail"
+    config.GOOGLE_API_KEY = "offline-benchmark"
+    config.CACHE_DB_PATH = os.path.join(cache_dir, "cache.sqlite3")
+    config.SUPPLIER_CACHE_BACKEND = supplier_cache_backend
+    config.LOG_LEVEL = log_level
+    if model:
+        config.MODEL_NAME = model
+    if chroma_path:
+        config.CHROMA_DB_PATH = chroma_path
+
+    # URLs that are module constants rather than config entries
+    from services import distance_duration_service, translation_service
+
+    distance_duration_service.GEOCODE_URL = f"{mock_url}/maps/api/geocode/json"
+    distance_duration_service.NOMINATIM_SEARCH_URL = f"{mock_url}/nominatim/search"
+    distance_duration_service.ROUTES_MATRIX_URL = f"{mock_url}/routes/computeRouteMatrix"
+    def with_base_url(factory, base_url):
+        def make():
+            translator = factory()
+            translator._base_url = base_url
+            return translator
+        return make
+
+    for name, path in (("google_en", "translate/m"), ("google_tr", "translate/m"),
+                       ("mymemory_en", "mymemory/get"), ("mymemory_tr", "mymemory/get")):
+        translation_service.TRANSLATORS[name] = with_base_url(translation_service.TRANSLATORS[name], f"{mock_url}/{path}")
+
+    import user_operations
+
+    for env, key in _DB_ENV.items():
+        if os.getenv(env):
+            user_operations.DB_CONFIG[key] = os.environ[env]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--mock-url", default="http://127.0.0.1:8900")
+    parser.add_argument("--model", help="overrides config.MODEL_NAME")
+    parser.add_argument("--chroma-path", help="overrides config.CHROMA_DB_PATH")
+    parser.add_argument("--supplier-cache-backend", default="memory", choices=["memory", "sqlite", "redis"])
+    parser.add_argument("--cache-dir", help="defaults to a new temporary directory (cold caches)")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--skip-db-init", action="store_true", help="for runs without MySQL (chat scenarios only)")
+    args = parser.parse_args()
+
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="arabul-bench-")
+    configure(args.mock_url.rstrip("/"), cache_dir, args.model, args.chroma_path,
+              args.supplier_cache_backend, args.log_level)
+
+    import uvicorn
+    import main as backend
+
+    if args.skip_db_init:
+        backend.initialize_all_tables = lambda: None
+
+    uvicorn.run(backend.app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
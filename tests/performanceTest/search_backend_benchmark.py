@@ -0,0 +1,74 @@
+# tests/performanceTest/search_backend_benchmark.py
+#
+# Compares the Chroma (HNSW) and NumPy (exact) NACE search backends on latency and recall@k.
+# Queries are stored collection embeddings with a little noise added, so the model is not needed:
+#   python tests/performanceTest/search_backend_benchmark.py --queries 500 --top-k 12
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import chromadb
+from config import CHROMA_DB_PATH, NUMPY_INDEX_PATH
+from services.search_backends import load_or_build_numpy_index
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def timed_queries(backend, queries, top_k):
+    latencies, ids = [], []
+    for q in queries:
+        start = time.perf_counter()
+        raw = backend.query(query_embeddings=[q.tolist()], n_results=top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(raw["ids"][0])
+    return latencies, ids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=12)
+    parser.add_argument("--noise", type=float, default=0.05)
+    args = parser.parse_args()
+
+    chroma_collection = chromadb.PersistentClient(path=CHROMA_DB_PATH).get_collection("nace_codes")
+    numpy_index = load_or_build_numpy_index(chroma_collection, NUMPY_INDEX_PATH)
+
+    rng = np.random.default_rng(42)
+    picks = rng.integers(0, numpy_index.count(), size=args.queries)
+    queries = np.asarray(numpy_index.embeddings[picks]) + rng.normal(scale=args.noise, size=(args.queries, numpy_index.embeddings.shape[1]))
+
+    # warm-up
+    timed_queries(chroma_collection, queries[:10], args.top_k)
+    timed_queries(numpy_index, queries[:10], args.top_k)
+
+    chroma_lat, chroma_ids = timed_queries(chroma_collection, queries, args.top_k)
+    numpy_lat, numpy_ids = timed_queries(numpy_index, queries, args.top_k)
+
+    start = time.perf_counter()
+    numpy_index.query(query_embeddings=queries, n_results=args.top_k)
+    batched_ms = (time.perf_counter() - start) * 1000
+
+    # numpy is exact, so it is the ground truth for Chroma's approximate recall
+    recall = statistics.mean(len(set(c) & set(n)) / len(n) for c, n in zip(chroma_ids, numpy_ids))
+
+    print(f"entries={numpy_index.count()} queries={args.queries} top_k={args.top_k}")
+    for name, lat in (("chroma", chroma_lat), ("numpy", numpy_lat)):
+        print(f"{name:>7}: p50={percentile(lat, 50):.3f} ms  p95={percentile(lat, 95):.3f} ms  "
+              f"p99={percentile(lat, 99):.3f} ms")
+    print(f"numpy batched: {batched_ms:.2f} ms for {args.queries} queries")
+    print(f"chroma recall@{args.top_k} vs exact: {recall:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# tests/performanceTest/supplier_detail_parse_benchmark.py
+#
+# Compares the old supplier-detail parsing (decode, regex cleanup, json.loads) with
+# utils.json_utils.loads_lenient on the raw response bytes, with and without orjson.
+# Recorded response bodies can be passed as a directory of files (one body per file);
+# otherwise synthetic detail payloads are generated, a share of them with stray control characters:
+#   python tests/performanceTest/supplier_detail_parse_benchmark.py --payloads recorded_details/ --rounds 200
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from utils import json_utils
+
+
+def legacy_parse(raw: bytes):
+    raw_text = raw.decode("utf-8")
+    cleaned = re.sub(r'[\x00-\x1f\x7f]', '', raw_text)
+    return json.loads(cleaned)
+
+
+def synthetic_payloads(count: int, dirty_share: float):
+    rng = random.Random(42)
+    payloads = []
+    for i in range(count):
+        detail = {
+            "SupplierID": str(10000 + i),
+            "CompanyName": f"Örnek Tesisat Ltd. Şti. {i}",
+            "Category": "Sıhhi tesisat, ısıtma ve iklimlendirme tesisatı",
+            "Address": f"Atatürk Cad. No:{i} Lefkoşa",
+            "PhoneNumber": "+90 392 000 00 00",
+            "WorkingHours": "Pazartesi-Cumartesi 08:00-18:00",
+            "Website": f"https://example{i}.com",
+            "Email": f"info@example{i}.com",
+            "Description": " ".join(["Kombi, petek ve musluk tamiri; acil servis."] * rng.randint(5, 40)),
+            "Products": [{"Name": f"Ürün {j}", "Price": j * 10} for j in range(rng.randint(5, 30))],
+        }
+        raw = json.dumps(detail, ensure_ascii=False, indent=2).encode("utf-8")
+        if rng.random() < dirty_share:
+            # the upstream occasionally leaves raw tabs / vertical tabs inside strings
+            raw = raw.replace("acil servis".encode("utf-8"), "acil\x0bservis\t".encode("utf-8"), 1)
+        payloads.append(raw)
+    return payloads
+
+
+def load_recorded(directory: str):
+    payloads = []
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), "rb") as f:
+            payloads.append(f.read())
+    return payloads
+
+
+def bench(parse, payloads, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for raw in payloads:
+            parse(raw)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(payloads)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--payloads", help="directory of recorded supplier-detail response bodies")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--dirty-share", type=float, default=0.1)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = load_recorded(args.payloads) if args.payloads else synthetic_payloads(args.count, args.dirty_share)
+    mean_kb = sum(len(p) for p in payloads) / len(payloads) / 1024
+
+    # Same result on every payload before timing anything
+    for raw in payloads:
+        assert json_utils.loads_lenient(raw) == legacy_parse(raw)
+
+    results = {"legacy (str + re.sub + json)": bench(legacy_parse, payloads, args.rounds)}
+    orjson_module = json_utils.orjson
+    if orjson_module is not None:
+        results["loads_lenient (orjson)"] = bench(json_utils.loads_lenient, payloads, args.rounds)
+    json_utils.orjson = None
+    results["loads_lenient (json)"] = bench(json_utils.loads_lenient, payloads, args.rounds)
+    json_utils.orjson = orjson_module
+
+    print(f"payloads={len(payloads)} mean_size={mean_kb:.1f} KB rounds={args.rounds}")
+    baseline = results["legacy (str + re.sub + json)"]
+    for name, us in results.items():
+        print(f"{name:>30}: {us:8.1f} us/payload  ({baseline / us:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
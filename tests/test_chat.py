@@ -0,0 +1,40 @@
+import asyncio
+import threading
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import services.inference_executor as ie
+from config import INFERENCE_RETRY_AFTER
+from routes import chat
+
+
+def test_get_nace_codes_returns_503_with_retry_after_when_inference_is_full(monkeypatch):
+    monkeypatch.setattr(ie, "INFERENCE_WORKERS", 1)
+    monkeypatch.setattr(ie, "INFERENCE_MAX_QUEUE", 0)
+    monkeypatch.setattr(chat, "turkish_index_ready", lambda: False)
+    monkeypatch.setattr(chat, "translate_to_english", lambda query: query)
+    searched = []
+    monkeypatch.setattr(chat, "semantic_search", lambda query: searched.append(query))
+
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/chat")
+
+    # Occupy the only inference slot with a job that waits until the request has been answered
+    started, release = threading.Event(), threading.Event()
+
+    def busy():
+        started.set()
+        release.wait(5)
+
+    holder = threading.Thread(target=lambda: asyncio.run(ie.run_inference(busy)))
+    holder.start()
+    try:
+        assert started.wait(5)
+        response = TestClient(app).post("/chat/get_nace_codes", json={"query": "plumber"})
+    finally:
+        release.set()
+        holder.join()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(INFERENCE_RETRY_AFTER)
+    assert response.json() == {"detail": "Search is busy, please retry"}
+    assert searched == []
@@ -0,0 +1,115 @@
+"""
+Tests for the pooled `get_db_connection` – the MySQL pool itself is replaced
+by a fake so no server is required.
+"""
+import threading
+import pytest
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+import user_operations
+
+
+class _FakeConn:
+    def __init__(self):
+        self.closed = False
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class _FakePool:
+    def __init__(self, conns):
+        self.conns = list(conns)
+
+    def get_connection(self):
+        if not self.conns:
+            raise PoolError("Failed getting connection; pool exhausted")
+        return self.conns.pop(0)
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    def install(conns, slots=2):
+        pool = _FakePool(conns)
+        monkeypatch.setattr(user_operations, "_get_pool", lambda: pool)
+        monkeypatch.setattr(user_operations, "_pool_slots", threading.BoundedSemaphore(slots))
+        monkeypatch.setattr(user_operations, "_pool_stats",
+                            {key: 0 for key in user_operations._pool_stats})
+        return pool
+    return install
+
+
+def test_checkout_and_release_updates_stats(fake_pool):
+    conn = _FakeConn()
+    fake_pool([conn])
+
+    with user_operations.get_db_connection() as c:
+        assert c._connection is conn
+        assert user_operations.get_pool_stats()["in_use"] == 1
+
+    stats = user_operations.get_pool_stats()
+    assert conn.closed
+    assert stats["in_use"] == 0
+    assert stats["checkouts"] == 1
+
+
+def test_checkout_does_not_ping_again(fake_pool):
+    # The pool pings (is_connected) on checkout already; a second ping is a wasted round trip
+    class _CountingConn(_FakeConn):
+        pings = 0
+
+        def ping(self, reconnect=False):
+            self.pings += 1
+
+    conn = _CountingConn()
+    fake_pool([conn])
+
+    with user_operations.get_db_connection():
+        pass
+
+    assert conn.pings == 0
+
+
+def test_exhausted_pool_uses_overflow(fake_pool, monkeypatch):
+    overflow = _FakeConn()
+    fake_pool([])
+    monkeypatch.setattr(user_operations.mysql.connector, "connect", lambda **_: overflow)
+
+    with user_operations.get_db_connection() as c:
+        assert c._connection is overflow
+        assert user_operations.get_pool_stats()["overflow_in_use"] == 1
+
+    stats = user_operations.get_pool_stats()
+    assert stats["overflow_in_use"] == 0
+    assert stats["overflow_total"] == 1
+
+
+def test_checkout_times_out_when_no_slots(fake_pool, monkeypatch):
+    fake_pool([_FakeConn()], slots=1)
+    monkeypatch.setattr(user_operations, "DB_POOL_TIMEOUT", 0.01)
+    user_operations._pool_slots.acquire()
+
+    with pytest.raises(PoolError):
+        with user_operations.get_db_connection():
+            pass
+
+    assert user_operations.get_pool_stats()["timeouts"] == 1
+
+
+def test_failed_checkout_frees_the_slot(fake_pool, monkeypatch):
+    def refused(**_):
+        raise Error("Can't connect to MySQL server")
+
+    fake_pool([], slots=1)
+    monkeypatch.setattr(user_operations.mysql.connector, "connect", refused)
+
+    with pytest.raises(Error):
+        with user_operations.get_db_connection():
+            pass
+
+    assert user_operations._pool_slots.acquire(timeout=0)
+    assert user_operations.get_pool_stats()["in_use"] == 0
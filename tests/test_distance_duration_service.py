@@ -1,6 +1,10 @@
+import asyncio
+import threading
+import httpx
 import pytest
 import requests
 import services.distance_duration_service as es
+from services.cache_store import SQLiteTTLStore
 
 from services.distance_duration_service import (
     get_lat_lng,
@@ -25,6 +29,14 @@ class DummyResponse:
         if self.status_code != 200:
             raise requests.exceptions.RequestException(f"HTTP {self.status_code}")
 
+@pytest.fixture(autouse=True)
+def isolated_geocode_store(tmp_path, monkeypatch):
+    """Each test gets its own empty on-disk geocode cache."""
+    store = SQLiteTTLStore(str(tmp_path / "cache.sqlite3"), table="geocode")
+    monkeypatch.setattr(es, "geocode_store", store)
+    monkeypatch.setattr(es, "route_store", SQLiteTTLStore(str(tmp_path / "cache.sqlite3"), table="route_eta"))
+    return store
+
 # -- get_lat_lng tests ----------------------------------------------------
 
 def test_get_lat_lng_success(monkeypatch):
@@ -58,6 +70,74 @@ def test_get_lat_lng_exception_returns_none(monkeypatch):
 
     monkeypatch.setattr(requests, "get", fake_get)
     assert get_lat_lng("Fail St") is None
+    # transient errors must not be cached
+    assert not es.geocode_store.contains("fail st")
+
+def test_get_lat_lng_served_from_cache(monkeypatch):
+    calls = []
+    data = {
+        "status": "OK",
+        "results": [{"geometry": {"location": {"lat": 10.1, "lng": 20.2}}}]
+    }
+    def fake_get(url, params, timeout):
+        calls.append(params["address"])
+        return DummyResponse(200, data)
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    get_lat_lng("123 Main St")
+    assert get_lat_lng("123, main st") == {"latitude": 10.1, "longitude": 20.2}
+    assert calls == ["123 main st"]
+    assert es.get_geocode_cache_stats()["hits"] == 1
+
+def test_get_lat_lng_negative_result_expires(monkeypatch, isolated_geocode_store):
+    monkeypatch.setattr(requests, "get", lambda url, params, timeout: DummyResponse(200, {"status": "ZERO_RESULTS"}))
+    monkeypatch.setattr(es, "get_location_osm_backup", lambda addr: None)
+    monkeypatch.setattr(es, "GEOCODE_NEGATIVE_TTL", -1)
+
+    assert get_lat_lng("Nowhere") is None
+    found, _ = isolated_geocode_store.get("nowhere")
+    assert not found
+
+@pytest.mark.parametrize("status", ["OVER_QUERY_LIMIT", "REQUEST_DENIED", "UNKNOWN_ERROR"])
+def test_get_lat_lng_google_error_status_is_not_cached(monkeypatch, isolated_geocode_store, status):
+    monkeypatch.setattr(requests, "get", lambda url, params, timeout: DummyResponse(200, {"status": status}))
+    monkeypatch.setattr(es, "get_location_osm_backup", lambda addr: pytest.fail("OSM is only a fallback for ZERO_RESULTS"))
+
+    assert get_lat_lng("Busy St") is None
+    assert not isolated_geocode_store.contains("busy st")
+
+def test_get_lat_lng_osm_failure_is_not_cached(monkeypatch, isolated_geocode_store):
+    def fake_get(url, params=None, headers=None, timeout=None):
+        if url == es.GEOCODE_URL:
+            return DummyResponse(200, {"status": "ZERO_RESULTS"})
+        raise requests.exceptions.RequestException("OSM down")
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    assert get_lat_lng("Nowhere") is None
+    assert not isolated_geocode_store.contains("nowhere")
+
+    # An empty OSM result is a real negative and is cached
+    monkeypatch.setattr(requests, "get", lambda url, params=None, headers=None, timeout=None: DummyResponse(
+        200, {"status": "ZERO_RESULTS"} if url == es.GEOCODE_URL else []))
+    assert get_lat_lng("Nowhere") is None
+    assert isolated_geocode_store.get("nowhere") == (True, None)
+
+def test_get_lat_lng_async_transient_failures_are_not_cached(monkeypatch, isolated_geocode_store):
+    async def over_limit(method, url, **kwargs):
+        return httpx.Response(200, json={"status": "OVER_QUERY_LIMIT"}, request=httpx.Request(method, url))
+
+    monkeypatch.setattr(es.http_client, "request", over_limit)
+    assert asyncio.run(es.get_lat_lng_async("Busy St")) is None
+
+    async def osm_down(method, url, **kwargs):
+        if url == es.GEOCODE_URL:
+            return httpx.Response(200, json={"status": "ZERO_RESULTS"}, request=httpx.Request(method, url))
+        raise httpx.ConnectError("OSM down")
+
+    monkeypatch.setattr(es.http_client, "request", osm_down)
+    assert asyncio.run(es.get_lat_lng_async("Nowhere")) is None
+    assert not isolated_geocode_store.contains("busy st")
+    assert not isolated_geocode_store.contains("nowhere")
 
 # -- get_location_osm_backup tests ----------------------------------------
 
@@ -70,12 +150,13 @@ def test_get_location_osm_backup_success(monkeypatch):
     coords = get_location_osm_backup("Somewhere")
     assert coords == {"latitude": 33.3, "longitude": 44.4}
 
-def test_get_location_osm_backup_exception_returns_none(monkeypatch):
+def test_get_location_osm_backup_exception_propagates(monkeypatch):
     def fake_get(url, headers, timeout):
         raise requests.exceptions.RequestException("error")
 
     monkeypatch.setattr(requests, "get", fake_get)
-    assert get_location_osm_backup("Broken") is None
+    with pytest.raises(requests.exceptions.RequestException):
+        get_location_osm_backup("Broken")
 
 # -- format_duration tests ------------------------------------------------
 
@@ -137,8 +218,8 @@ def test_get_distance_matrix_success(monkeypatch):
 
 def test_process_suppliers_delegates(monkeypatch):
     # stub both helper functions
-    monkeypatch.setattr(es, "get_distance_matrix",
-                        lambda ulat, ulng, sup: [{"foo": "bar"}])
+    monkeypatch.setattr(es, "enrich_sectors",
+                        lambda ulat, ulng, sectors: [[{"foo": "bar"}] for _ in sectors])
     monkeypatch.setattr(es, "sort_suppliers",
                         lambda sup: sup)
 
@@ -150,3 +231,210 @@ def test_process_suppliers_delegates(monkeypatch):
     assert "data" in result
     assert isinstance(result["data"], list)
     assert result["data"][0]["Suppliers"] == [{"foo": "bar"}]
+
+def test_process_suppliers_single_matrix_call_across_sectors(monkeypatch):
+    monkeypatch.setattr(es, "get_lat_lng", lambda addr: {"latitude": 1.0, "longitude": 2.0})
+
+    sent = []
+    def fake_post(url, headers, json, timeout):
+        sent.append(json["destinations"])
+        return DummyResponse(200, [
+            {"destinationIndex": 0, "distanceMeters": 2000, "duration": "300s"},
+            {"destinationIndex": 1, "distanceMeters": 1000, "duration": "120s"},
+        ])
+
+    monkeypatch.setattr(requests, "post", fake_post)
+
+    data = {"data": [
+        {"Suppliers": [{"SupplierID": 1, "Address": "A"}, {"SupplierID": 2, "Address": "B"}]},
+        {"Suppliers": [{"SupplierID": 2, "Address": "B"}]},
+    ]}
+    result = process_suppliers(0.0, 0.0, data)
+
+    # supplier 2 appears in both sectors but is routed once, in one request
+    assert len(sent) == 1 and len(sent[0]) == 2
+    assert [s["SupplierID"] for s in result["data"][0]["Suppliers"]] == [2, 1]
+    assert result["data"][1]["Suppliers"][0]["distance_km"] == pytest.approx(1.0)
+
+def test_route_matrix_is_chunked(monkeypatch):
+    monkeypatch.setattr(es, "ROUTES_MAX_ELEMENTS", 2)
+    monkeypatch.setattr(es, "get_lat_lng", lambda addr: {"latitude": 1.0, "longitude": 2.0})
+
+    sent = []
+    def fake_post(url, headers, json, timeout):
+        sent.append(len(json["destinations"]))
+        return DummyResponse(200, [{"destinationIndex": i, "distanceMeters": 1000, "duration": "60s"}
+                                   for i in range(len(json["destinations"]))])
+
+    monkeypatch.setattr(requests, "post", fake_post)
+
+    out = get_distance_matrix(0.0, 0.0, [{"Address": f"Addr{i}"} for i in range(5)])
+    assert sent == [2, 2, 1]
+    assert all(s["distance_km"] == pytest.approx(1.0) for s in out)
+
+# -- async pipeline tests --------------------------------------------------
+
+def _fake_async_request(payload, status_code=200):
+    async def fake_request(method, url, **kwargs):
+        return httpx.Response(status_code, json=payload, request=httpx.Request(method, url))
+    return fake_request
+
+def test_get_lat_lng_async_success(monkeypatch):
+    data = {
+        "status": "OK",
+        "results": [{"geometry": {"location": {"lat": 10.1, "lng": 20.2}}}]
+    }
+    monkeypatch.setattr(es.http_client, "request", _fake_async_request(data))
+
+    coords = asyncio.run(es.get_lat_lng_async("123 Main St"))
+    assert coords == {"latitude": 10.1, "longitude": 20.2}
+
+def test_get_distance_matrix_async_success(monkeypatch):
+    async def fake_lat_lng(addr):
+        return {"latitude": 1.0, "longitude": 2.0}
+
+    monkeypatch.setattr(es, "get_lat_lng_async", fake_lat_lng)
+    rows = [
+        {"destinationIndex": 0, "distanceMeters": 1500, "duration": "3600s"},
+        {"destinationIndex": 1, "distanceMeters":  500, "duration": "300s"}
+    ]
+    monkeypatch.setattr(es.http_client, "request", _fake_async_request(rows))
+
+    out = asyncio.run(es.get_distance_matrix_async(10.0, 20.0, [{"Address": "Addr1"}, {"Address": "Addr2"}]))
+    assert out[0]["distance_km"] == pytest.approx(1.5)
+    assert out[1]["duration"] == "5 dakika"
+
+def test_process_suppliers_async_sorts(monkeypatch):
+    async def fake_enrich(ulat, ulng, sectors):
+        return [[{"name": "far", "distance_km": 9}, {"name": "near", "distance_km": 1}]]
+
+    monkeypatch.setattr(es, "enrich_sectors_async", fake_enrich)
+    result = asyncio.run(es.process_suppliers_async(0.0, 0.0, [{"Suppliers": [{"id": 1}]}]))
+    assert [s["name"] for s in result["data"][0]["Suppliers"]] == ["near", "far"]
+
+# -- pre-ranking tests -----------------------------------------------------
+
+def test_get_distance_matrix_routes_only_nearest(monkeypatch):
+    monkeypatch.setattr(es, "ROUTES_TOP_K", 2)
+    coords = {
+        "Near": {"latitude": 35.19, "longitude": 33.38},
+        "Mid": {"latitude": 35.25, "longitude": 33.40},
+        "Far": {"latitude": 35.34, "longitude": 33.32},
+    }
+    monkeypatch.setattr(es, "get_lat_lng", lambda addr: coords[addr])
+
+    sent = []
+    def fake_post(url, headers, json, timeout):
+        sent.append(json["destinations"])
+        return DummyResponse(200, [
+            {"destinationIndex": 0, "distanceMeters": 1000, "duration": "120s"},
+            {"destinationIndex": 1, "distanceMeters": 9000, "duration": "900s"},
+        ])
+
+    monkeypatch.setattr(requests, "post", fake_post)
+
+    suppliers = [{"Address": "Far"}, {"Address": "Near"}, {"Address": "Mid"}]
+    out = get_distance_matrix(35.1856, 33.3823, suppliers)
+    by_addr = {s["Address"]: s for s in out}
+
+    assert len(sent[0]) == 2
+    assert by_addr["Near"]["distance_km"] == pytest.approx(1.0)
+    assert by_addr["Mid"]["distance_km"] == pytest.approx(9.0)
+    assert by_addr["Far"]["distance_estimated"] is True
+    assert by_addr["Far"]["distance_km"] == pytest.approx(18.1, abs=0.1)
+    assert "distance_estimated" not in by_addr["Near"]
+
+# -- route cache tests -----------------------------------------------------
+
+def test_routes_served_from_cache_for_nearby_users(monkeypatch):
+    monkeypatch.setattr(es, "get_lat_lng", lambda addr: {"latitude": 35.2, "longitude": 33.4})
+
+    sent = []
+    def fake_post(url, headers, json, timeout):
+        sent.append(len(json["destinations"]))
+        return DummyResponse(200, [{"destinationIndex": 0, "distanceMeters": 3000, "duration": "240s"}])
+
+    monkeypatch.setattr(requests, "post", fake_post)
+
+    first = get_distance_matrix(35.18560, 33.38230, [{"Address": "A"}])
+    # a few metres away, same geohash cell
+    second = get_distance_matrix(35.18565, 33.38235, [{"Address": "A"}])
+
+    assert sent == [1]
+    assert second[0]["distance_km"] == first[0]["distance_km"] == pytest.approx(3.0)
+    assert second[0]["duration"] == "4 dakika"
+    assert es.get_route_cache_stats()["hits"] == 1
+
+def test_async_pipeline_keeps_cache_io_off_the_loop(monkeypatch, isolated_geocode_store):
+    class RecordingStore:
+        def __init__(self, store):
+            self.store = store
+            self.calls = []
+
+        def __getattr__(self, name):
+            method = getattr(self.store, name)
+            def call(*args, **kwargs):
+                self.calls.append((name, threading.current_thread() is threading.main_thread()))
+                return method(*args, **kwargs)
+            return call
+
+    isolated_geocode_store.set("addr1", {"latitude": 1.0, "longitude": 2.0})
+    geocodes, routes = RecordingStore(isolated_geocode_store), RecordingStore(es.route_store)
+    monkeypatch.setattr(es, "geocode_store", geocodes)
+    monkeypatch.setattr(es, "route_store", routes)
+    data = {"status": "OK", "results": [{"geometry": {"location": {"lat": 1.5, "lng": 2.5}}}]}
+    rows = [
+        {"destinationIndex": 0, "distanceMeters": 1500, "duration": "3600s"},
+        {"destinationIndex": 1, "distanceMeters":  500, "duration": "300s"}
+    ]
+
+    async def fake_request(method, url, **kwargs):
+        payload = data if method == "GET" else rows
+        return httpx.Response(200, json=payload, request=httpx.Request(method, url))
+
+    monkeypatch.setattr(es.http_client, "request", fake_request)
+    asyncio.run(es.get_distance_matrix_async(10.0, 20.0, [{"Address": "Addr1"}, {"Address": "Addr2"}]))
+
+    assert [name for name, _ in geocodes.calls] == ["get_many", "get", "set"]
+    assert routes.calls == [("get_many", False), ("set_many", False)]
+    assert not any(on_loop for _, on_loop in geocodes.calls)
+    assert routes.store.stats()["writes"] == 2
+
+# -- streaming tests -------------------------------------------------------
+
+async def _collect(events):
+    return [event async for event in events]
+
+def test_process_suppliers_events_order_and_final_payload(monkeypatch):
+    coords = {
+        "Near": {"latitude": 35.19, "longitude": 33.38},
+        "Far": {"latitude": 35.34, "longitude": 33.32},
+    }
+
+    async def fake_lat_lng(addr):
+        return coords.get(addr)
+
+    monkeypatch.setattr(es, "get_lat_lng_async", fake_lat_lng)
+    rows = [
+        {"destinationIndex": 0, "distanceMeters": 9000, "duration": "900s"},
+        {"destinationIndex": 1, "distanceMeters": 2000, "duration": "300s"},
+    ]
+    monkeypatch.setattr(es.http_client, "request", _fake_async_request(rows))
+
+    sectors = [{"Suppliers": [
+        {"SupplierID": 1, "Address": "Far"},
+        {"SupplierID": 2, "Address": "Near"},
+        {"SupplierID": 3, "Address": "Nowhere"},
+    ]}]
+    events = asyncio.run(_collect(es.process_suppliers_events(35.18, 33.36, sectors)))
+    kinds = [e["event"] for e in events]
+
+    assert kinds[-1] == "sorted"
+    assert kinds.count("unresolved") == 1
+    estimates = [e for e in events if e["event"] == "distance" and e["distance_estimated"]]
+    routed = [e for e in events if e["event"] == "distance" and not e["distance_estimated"]]
+    assert len(estimates) == 2 and len(routed) == 2
+
+    final = events[-1]["data"]["data"][0]["Suppliers"]
+    assert [s["SupplierID"] for s in final] == [2, 1]
+    assert final[0]["distance_km"] == pytest.approx(2.0)
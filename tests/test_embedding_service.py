@@ -0,0 +1,118 @@
+import threading
+import time
+import numpy as np
+import pytest
+from services.embedding_service import BatchingEncoder, EmbeddingCache, normalize_query
+
+
+class CountingModel:
+    """Returns a vector derived from the text length; records every encode call."""
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    def encode(self, texts):
+        self.calls.append(texts)
+        if isinstance(texts, str):
+            return np.array([len(texts), 1.0])
+        return np.array([[len(t), 1.0] for t in texts])
+
+
+def test_normalize_query():
+    assert normalize_query("  I am   Hungry ") == "i am hungry"
+
+
+def test_cache_hit_skips_encode():
+    model = CountingModel()
+    encoder = BatchingEncoder(model, window_ms=0)
+
+    first = encoder.encode("I am hungry")
+    second = encoder.encode("i am  HUNGRY")
+
+    assert np.array_equal(first, second)
+    assert model.calls == ["I am hungry"]
+    assert encoder.cache.stats()["hits"] == 1
+
+
+def test_cache_evicts_by_bytes():
+    cache = EmbeddingCache(max_entries=100, max_bytes=2 * (8 + 1))
+    cache.put("a", np.zeros(2))
+    cache.put("b", np.zeros(2))
+    cache.put("c", np.zeros(2))
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_concurrent_requests_are_batched():
+    model = CountingModel()
+    encoder = BatchingEncoder(model, window_ms=50)
+    queries = ["leak", "leaking roof", "broken tile", "leak"]
+    results = {}
+
+    def worker(q, i):
+        results[i] = encoder.encode(q)
+
+    threads = [threading.Thread(target=worker, args=(q, i)) for i, q in enumerate(queries)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # one forward pass, duplicates encoded once
+    assert len(model.calls) == 1
+    assert sorted(model.calls[0]) == ["broken tile", "leak", "leaking roof"]
+    assert results[1][0] == len("leaking roof")
+    assert np.array_equal(results[0], results[3])
+
+
+def test_encode_many_dedupes_and_uses_cache():
+    model = CountingModel()
+    encoder = BatchingEncoder(model, window_ms=0)
+    encoder.encode("leak")
+
+    vectors = encoder.encode_many(["leak", "roof", "Roof"])
+
+    assert model.calls == ["leak", "roof"]
+    assert [v[0] for v in vectors] == [4, 4, 4]
+
+
+def test_encode_error_propagates():
+    class BrokenModel:
+        def encode(self, texts):
+            raise RuntimeError("boom")
+
+    encoder = BatchingEncoder(BrokenModel(), window_ms=0)
+    with pytest.raises(RuntimeError):
+        encoder.encode("anything")
+
+
+def test_leader_returns_after_its_own_batch_and_hands_over():
+    started = threading.Event()
+    release = threading.Event()
+    encoded_on = []
+
+    class SlowModel:
+        def encode(self, texts):
+            encoded_on.append((texts, threading.current_thread().name))
+            started.set()
+            release.wait(2)
+            return np.array([[1.0, 0.0]] * len(texts)) if isinstance(texts, list) else np.array([1.0, 0.0])
+
+    encoder = BatchingEncoder(SlowModel(), window_ms=0)
+    leader = threading.Thread(target=encoder.encode, args=("first",), name="leader")
+    leader.start()
+    assert started.wait(2)
+
+    follower = threading.Thread(target=encoder.encode, args=("second",), name="follower")
+    follower.start()
+    time.sleep(0.05)  # queued behind the running batch
+    release.set()
+
+    leader.join(2)
+    follower.join(2)
+    assert not leader.is_alive() and not follower.is_alive()
+    # the leader did not encode the follower's query; the promoted follower did
+    assert encoded_on == [("first", "leader"), ("second", "follower")]
+    assert encoder.stats()["pending"] == 0 and not encoder._leader_active
@@ -0,0 +1,86 @@
+import json
+import numpy as np
+import pytest
+import sentence_transformers
+from services import encoder_backends
+from services.encoder_backends import load_encoder_model, topk_agreement
+from services.search_backends import NumpyCollection
+
+
+class DummyModel:
+    """Encodes query "qN" as stored vector N, optionally with noise."""
+    def __init__(self, vectors, noise=0.0):
+        self.vectors = vectors
+        self.rng = np.random.default_rng(1)
+        self.noise = noise
+
+    def encode(self, queries, batch_size=32):
+        picked = np.stack([self.vectors[int(q[1:])] for q in queries])
+        return picked + self.noise * self.rng.normal(size=picked.shape)
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(40, 16)).astype(np.float32)
+
+
+@pytest.fixture
+def collection(vectors):
+    return NumpyCollection(vectors, [f"C{i}" for i in range(40)], [f"doc{i}" for i in range(40)], [{}] * 40)
+
+
+def test_identical_encoders_agree_fully(vectors, collection):
+    queries = [f"q{i}" for i in range(40)]
+    report = topk_agreement(DummyModel(vectors), DummyModel(vectors), collection, queries, top_k=3, batch_size=16)
+
+    assert report["queries"] == 40
+    assert report["topk_agreement"] == 1.0
+    assert report["top1_agreement"] == 1.0
+    assert report["query_cosine_min"] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_noisy_encoder_lowers_agreement(vectors, collection):
+    queries = [f"q{i}" for i in range(40)]
+    report = topk_agreement(DummyModel(vectors), DummyModel(vectors, noise=2.0), collection, queries, top_k=3)
+
+    assert report["topk_agreement"] < 1.0
+    assert report["query_cosine_mean"] < 0.9
+
+
+@pytest.fixture
+def fake_models(monkeypatch, tmp_path):
+    loaded = []
+    monkeypatch.setattr(sentence_transformers, "SentenceTransformer", lambda name: loaded.append(("torch", name)) or "torch-model")
+    monkeypatch.setattr(encoder_backends, "_load_onnx", lambda model_dir, file_name: loaded.append(("onnx", file_name)) or "onnx-model")
+    (tmp_path / "onnx").mkdir()
+    (tmp_path / "onnx" / "model.onnx").write_bytes(b"")
+    return loaded, tmp_path
+
+
+def write_report(model_dir, agreement, model="m"):
+    (model_dir / "agreement_onnx.json").write_text(json.dumps({"model": model, "topk_agreement": agreement}))
+
+
+def test_onnx_backend_used_after_passing_check(fake_models):
+    loaded, model_dir = fake_models
+    write_report(model_dir, 0.99)
+
+    assert load_encoder_model("m", backend="onnx", model_dir=str(model_dir)) == "onnx-model"
+    assert loaded == [("onnx", "onnx/model.onnx")]
+
+
+@pytest.mark.parametrize("report", [None, 0.5, "other-model"])
+def test_onnx_backend_falls_back_to_torch(fake_models, report):
+    loaded, model_dir = fake_models
+    if report == "other-model":
+        write_report(model_dir, 0.99, model="other-model")
+    elif report is not None:
+        write_report(model_dir, report)
+
+    assert load_encoder_model("m", backend="onnx", model_dir=str(model_dir)) == "torch-model"
+    assert loaded == [("torch", "m")]
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        load_encoder_model("m", backend="tensorrt")
@@ -1,8 +1,21 @@
+import asyncio
+import threading
+import time
+import httpx
 import pytest
 import requests
+from services import http_client
+from services import external_api_service as eas
+from services.cache_store import (
+    MemoryTTLStore,
+    RedisTTLStore,
+    SQLiteTTLStore,
+    StaleWhileRevalidateCache,
+    purge_all_expired,
+)
 from services.external_api_service import (
     fetch_suppliers,
-    fetch_suppliers_cached   # we’ll clear its LRU cache each run
+    fetch_suppliers_async,
 )
 from config import SUPPLIER_LIST_ENDPOINT
 
@@ -27,11 +40,12 @@ class DummyResponse:
 
 # ──────────── fixtures ────────────
 @pytest.fixture(autouse=True)
-def clear_cache():
-    """Ensure each test starts with an empty LRU cache."""
-    fetch_suppliers_cached.cache_clear()
-    yield
-    fetch_suppliers_cached.cache_clear()
+def clear_cache(monkeypatch):
+    """Ensure each test starts with an empty, in-memory supplier cache."""
+    cache = StaleWhileRevalidateCache(MemoryTTLStore(), ttl=60, stale_ttl=600, negative_ttl=30)
+    monkeypatch.setattr(eas, "supplier_cache", cache)
+    monkeypatch.setattr(eas, "supplier_detail_store", MemoryTTLStore())
+    return cache
 
 
 # ──────────── tests ────────────
@@ -61,3 +75,197 @@ def test_fetch_suppliers_failure(monkeypatch):
     out = fetch_suppliers(["A"], [{"City": "X"}])
     # When an HTTPError is raised, external_api_service now returns {"data": []}
     assert out == {"data": []}
+
+
+def test_fetch_suppliers_async_success_is_cached(monkeypatch):
+    calls = []
+
+    async def fake_request(method, url, **kwargs):
+        calls.append(kwargs["json"])
+        return httpx.Response(200, json={"data": [1]}, request=httpx.Request(method, url))
+
+    monkeypatch.setattr(http_client, "request", fake_request)
+
+    first = asyncio.run(fetch_suppliers_async(["A"], [{"City": "X"}]))
+    second = asyncio.run(fetch_suppliers_async(["A"], [{"City": "X"}]))
+    assert first == second == {"data": [1]}
+    assert len(calls) == 1
+
+
+def test_fetch_suppliers_async_failure_expires(monkeypatch, clear_cache):
+    async def fake_request(method, url, **kwargs):
+        return httpx.Response(500, json={"error": "down"}, request=httpx.Request(method, url))
+
+    monkeypatch.setattr(http_client, "request", fake_request)
+    clear_cache.negative_ttl = 0.05
+
+    out = asyncio.run(fetch_suppliers_async(["A"], [{"City": "X"}]))
+    assert out == {"data": []}
+    assert clear_cache.lookup("A__X")[0] == "negative"
+
+    time.sleep(0.06)
+    assert clear_cache.lookup("A__X")[0] == "miss"
+
+
+def test_fetch_suppliers_async_reads_the_cache_off_the_loop(monkeypatch, clear_cache):
+    threads = []
+    lookup = clear_cache.lookup
+
+    def recording_lookup(key):
+        threads.append(threading.current_thread() is threading.main_thread())
+        return lookup(key)
+
+    monkeypatch.setattr(clear_cache, "lookup", recording_lookup)
+    clear_cache.put("A__X", {"data": [1]})
+
+    assert asyncio.run(fetch_suppliers_async(["A"], [{"City": "X"}])) == {"data": [1]}
+    assert threads == [False]
+
+
+def test_cache_hit_returns_copy(monkeypatch):
+    monkeypatch.setattr(requests, "post", lambda url, json, timeout: DummyResponse(200, {"data": [{"id": 1}]}))
+
+    first = fetch_suppliers(["A"], [{"City": "X"}])
+    first["data"][0]["distance_km"] = 3.0
+    assert fetch_suppliers(["A"], [{"City": "X"}]) == {"data": [{"id": 1}]}
+
+
+def test_stale_entry_served_and_refreshed(monkeypatch, clear_cache):
+    responses = iter([{"data": ["old"]}, {"data": ["new"]}])
+    monkeypatch.setattr(requests, "post", lambda url, json, timeout: DummyResponse(200, next(responses)))
+
+    class InlineThread:
+        def __init__(self, target, args, daemon):
+            self.target, self.args = target, args
+
+        def start(self):
+            self.target(*self.args)
+
+    monkeypatch.setattr(eas.threading, "Thread", InlineThread)
+
+    assert fetch_suppliers(["A"], [{"City": "X"}]) == {"data": ["old"]}
+    found, entry = clear_cache.store.get("A__X")
+    clear_cache.store.set("A__X", {**entry, "fresh_until": time.time() - 1}, ttl=600)
+
+    assert fetch_suppliers(["A"], [{"City": "X"}]) == {"data": ["old"]}  # stale, refresh started
+    assert clear_cache.lookup("A__X") == ("fresh", {"data": ["new"]})
+    assert clear_cache.stats()["refreshes"] == 1
+
+
+def test_error_does_not_replace_stale_entry(monkeypatch, clear_cache):
+    clear_cache.put("A__X", {"data": ["old"]})
+    monkeypatch.setattr(requests, "post", lambda url, json, timeout: DummyResponse(500, {}))
+
+    eas._refresh_supplier_list("A__X")
+    assert clear_cache.lookup("A__X") == ("fresh", {"data": ["old"]})
+
+
+class FakeRedis:
+    """Local stand-in for the redis-py calls RedisTTLStore makes."""
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is None or (value[1] is not None and value[1] <= time.time()):
+            return None
+        return value[0]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, time.time() + ex if ex else None)
+
+    def exists(self, key):
+        return int(self.get(key) is not None)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        return [k for k in list(self.data) if k.startswith(prefix)]
+
+
+def test_redis_store_interface():
+    store = RedisTTLStore(FakeRedis(), namespace="supplier_list")
+    store.set("k", {"data": [1]}, ttl=60)
+
+    assert store.get("k") == (True, {"data": [1]})
+    assert store.get("other") == (False, None)
+    assert store.contains("k")
+    assert store.stats()["writes"] == 1 and store.stats()["hit_ratio"] == 0.5
+
+    store.clear()
+    assert not store.contains("k")
+
+
+def test_sqlite_store_purge_and_in_memory_stats(tmp_path, monkeypatch):
+    store = SQLiteTTLStore(str(tmp_path / "cache.sqlite3"), table="route_eta")
+    store.set("old", 1, ttl=-1)
+    store.set("new", 2, ttl=60)
+    store.set("forever", 3)
+
+    assert purge_all_expired() >= 1
+    assert store.stats()["entries"] == 2 and store.stats()["purged"] == 1 and store.stats()["writes"] == 3
+    assert store.get("new") == (True, 2)
+
+    # stats() is answered from counters, without touching the database
+    monkeypatch.setattr(store, "_connection", lambda: pytest.fail("stats() queried SQLite"))
+    assert store.stats()["hits"] == 1
+
+
+# ──────────── supplier details ────────────
+def test_fetch_supplier_details_async_parallel_and_cached(monkeypatch):
+    in_flight, peak, calls = 0, 0, []
+
+    async def fake_request(method, url, **kwargs):
+        nonlocal in_flight, peak
+        calls.append(kwargs["json"]["SupplierID"])
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        sid = kwargs["json"]["SupplierID"]
+        body = '{"SupplierID": "%s", "CompanyName": "Co\n %s"}' % (sid, sid)  # raw control character
+        return httpx.Response(200, text=body, request=httpx.Request(method, url))
+
+    monkeypatch.setattr(http_client, "request", fake_request)
+
+    ids = [str(i) for i in range(6)]
+    details = asyncio.run(eas.fetch_supplier_details_async(ids, budget=5, concurrency=3))
+    assert set(details) == set(ids)
+    assert details["4"]["CompanyName"] == "Co 4"
+    assert peak == 3
+
+    asyncio.run(eas.fetch_supplier_details_async(ids, budget=5, concurrency=3))
+    assert len(calls) == 6  # second call served from the detail cache
+
+
+def test_fetch_supplier_details_async_budget_returns_partial(monkeypatch):
+    async def fake_request(method, url, **kwargs):
+        if kwargs["json"]["SupplierID"] == "slow":
+            await asyncio.sleep(1)
+        return httpx.Response(200, json={"CompanyName": kwargs["json"]["SupplierID"]},
+                              request=httpx.Request(method, url))
+
+    monkeypatch.setattr(http_client, "request", fake_request)
+
+    start = time.time()
+    details = asyncio.run(eas.fetch_supplier_details_async(["fast", "slow"], budget=0.1))
+    assert time.time() - start < 0.9
+    assert details == {"fast": {"CompanyName": "fast"}, "slow": None}
+
+
+def test_fetch_supplier_detail_failure_not_cached(monkeypatch):
+    responses = iter([DummyResponse(500, {}), DummyResponse(200, {})])
+
+    def fake_post(url, json, headers, timeout):
+        response = next(responses)
+        response.content = b'{"CompanyName": "Co"}'
+        return response
+
+    monkeypatch.setattr(requests, "post", fake_post)
+
+    assert eas.fetch_supplier_detail_by_id("7") is None
+    assert eas.fetch_supplier_detail_by_id("7") == {"CompanyName": "Co"}
+    assert eas.fetch_supplier_detail_by_id("7") == {"CompanyName": "Co"}
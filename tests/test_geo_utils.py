@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from utils.geo_utils import haversine_km, nearest_indices, geohash
+
+
+def test_haversine_known_distance():
+    # Lefkoşa -> Girne is roughly 17-18 km as the crow flies
+    d = haversine_km(35.1856, 33.3823, [35.3364], [33.3199])
+    assert d[0] == pytest.approx(17.6, abs=0.5)
+
+
+def test_haversine_zero_distance():
+    assert haversine_km(35.0, 33.0, [35.0], [33.0])[0] == pytest.approx(0.0)
+
+
+def test_nearest_indices_orders_nearest_first():
+    distances = np.array([5.0, 1.0, 3.0, 0.5])
+    assert nearest_indices(distances, 2).tolist() == [3, 1]
+    assert nearest_indices(distances, 10).tolist() == [3, 1, 2, 0]
+
+
+def test_geohash_reference_value():
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_geohash_precision_prefix():
+    assert geohash(35.1856, 33.3823, 8).startswith(geohash(35.1856, 33.3823, 6))
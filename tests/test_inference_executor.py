@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+import pytest
+import services.inference_executor as ie
+
+
+def test_run_inference_returns_result_off_loop():
+    loop_thread = threading.get_ident()
+
+    def work(x):
+        return x * 2, threading.get_ident()
+
+    value, worker_thread = asyncio.run(ie.run_inference(work, 21))
+    assert value == 42
+    assert worker_thread != loop_thread
+    assert ie.get_inference_stats()["submitted"] == 0
+
+
+def test_run_inference_rejects_when_queue_full(monkeypatch):
+    monkeypatch.setattr(ie, "INFERENCE_WORKERS", 1)
+    monkeypatch.setattr(ie, "INFERENCE_MAX_QUEUE", 0)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.ensure_future(ie.run_inference(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ie.InferenceQueueFull):
+            await ie.run_inference(lambda: None)
+        release.set()
+        await busy
+
+    rejected_before = ie.get_inference_stats()["rejected"]
+    asyncio.run(scenario())
+    assert ie.get_inference_stats()["rejected"] == rejected_before + 1
+
+
+def test_run_inference_propagates_errors():
+    def boom():
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        asyncio.run(ie.run_inference(boom))
+    assert ie.get_inference_stats()["submitted"] == 0
+
+
+def test_cancelled_caller_keeps_the_job_accounted_until_it_ends():
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    async def scenario():
+        task = asyncio.ensure_future(ie.run_inference(work))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The job is still running on a worker, so it still takes a slot
+        assert ie.get_inference_stats()["submitted"] == 1
+
+    asyncio.run(scenario())
+    release.set()
+
+    deadline = time.time() + 5
+    while ie.get_inference_stats()["submitted"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert ie.get_inference_stats()["submitted"] == 0
@@ -0,0 +1,28 @@
+import pytest
+from utils import json_utils
+
+
+def test_loads_valid_bytes_and_text():
+    assert json_utils.loads(b'{"a": "\xc3\xa7"}') == {"a": "ç"}
+    assert json_utils.loads_lenient('{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_loads_lenient_strips_control_characters_on_failure():
+    raw = b'{"CompanyName": "Usta\x0b Ltd", "Address": "Line 1\nLine 2"}'
+    with pytest.raises(ValueError):
+        json_utils.loads(raw)
+    assert json_utils.loads_lenient(raw) == {"CompanyName": "Usta Ltd", "Address": "Line 1Line 2"}
+
+
+def test_loads_lenient_keeps_escaped_sequences():
+    assert json_utils.loads_lenient(b'{"a": "x\\ny"}') == {"a": "x\ny"}
+
+
+def test_loads_lenient_without_orjson(monkeypatch):
+    monkeypatch.setattr(json_utils, "orjson", None)
+    assert json_utils.loads_lenient(b'{"a": "b\x01"}') == {"a": "b"}
+
+
+def test_loads_lenient_invalid_raises():
+    with pytest.raises(ValueError):
+        json_utils.loads_lenient(b'{"a": ')
@@ -0,0 +1,35 @@
+import pytest
+from utils.language_utils import detect_language
+
+
+@pytest.mark.parametrize("query", [
+    "Acıktım",
+    "musluğum su sızdırıyor",
+    "arabam bozuldu tamir lazim",
+    "elektrik ustasi ariyorum",
+])
+def test_detects_turkish(query):
+    assert detect_language(query) == "tr"
+
+
+@pytest.mark.parametrize("query", [
+    "I am hungry",
+    "I need someone to fix my faucet",
+    "My car broke down on the road",
+])
+def test_detects_english(query):
+    assert detect_language(query) == "en"
+
+
+def test_no_signal_is_unknown():
+    assert detect_language("pizza") == "unknown"
+
+
+@pytest.mark.parametrize("query", ["de", "su", "mu", "da vinci", "sushi su", "casa de papel"])
+def test_ambiguous_short_words_alone_are_not_turkish(query):
+    assert detect_language(query) != "tr"
+
+
+@pytest.mark.parametrize("query", ["su lazim", "musluk su aksiyor", "bir usta ariyorum de"])
+def test_ambiguous_words_count_next_to_turkish_signal(query):
+    assert detect_language(query) == "tr"
@@ -0,0 +1,100 @@
+import io
+import json
+import logging
+import queue
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from utils import log_utils
+from utils.log_utils import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    RequestIdFilter,
+    RequestIdMiddleware,
+    SamplingFilter,
+    request_id_var,
+)
+
+
+def make_record(level=logging.INFO, msg="hello", **extra):
+    record = logging.LogRecord("test", level, __file__, 1, msg, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_request_id_and_extras():
+    token = request_id_var.set("abc123")
+    try:
+        record = make_record(supplier_id="42", duration_ms=12.5)
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["request_id"] == "abc123"
+    assert entry["msg"] == "hello"
+    assert entry["supplier_id"] == "42" and entry["duration_ms"] == 12.5
+    assert "args" not in entry and "levelno" not in entry
+
+
+def test_sampling_filter_never_drops_warnings():
+    sampler = SamplingFilter(0.0)
+    assert not sampler.filter(make_record(logging.INFO))
+    assert sampler.filter(make_record(logging.WARNING))
+    assert sampler.filter(make_record(logging.ERROR))
+    assert SamplingFilter(1.0).filter(make_record(logging.DEBUG))
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(make_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_middleware_sets_request_id_and_logs_access():
+    stream = io.StringIO()
+    handler = log_utils.setup_logging(level="INFO", json_format=True, sample_rate=1.0, stream=stream)
+
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/ping")
+    def ping():
+        logging.getLogger("test.route").info("inside", extra={"step": 1})
+        return {"ok": True}
+
+    try:
+        client = TestClient(app)
+        given = client.get("/ping", headers={"X-Request-ID": "req-1"})
+        generated = client.get("/ping", headers={"X-Request-ID": "bad id\n"})
+    finally:
+        log_utils.stop_logging()
+        logging.getLogger().removeHandler(handler)
+
+    assert given.headers["x-request-id"] == "req-1"
+    assert generated.headers["x-request-id"] not in ("-", "bad id\n")
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    inside = [l for l in lines if l["msg"] == "inside"]
+    access = [l for l in lines if l["logger"] == "access"]
+    assert inside[0]["request_id"] == "req-1" and inside[0]["step"] == 1
+    assert access[0]["request_id"] == "req-1"
+    assert access[0]["path"] == "/ping" and access[0]["status"] == 200
+    assert access[1]["request_id"] == generated.headers["x-request-id"]
+
+
+def test_chatty_library_loggers_are_quieted():
+    stream = io.StringIO()
+    handler = log_utils.setup_logging(level="INFO", json_format=True, sample_rate=1.0, stream=stream)
+    try:
+        for name in ("httpx", "httpcore", "uvicorn.access"):
+            logging.getLogger(name).info("per-request line")
+        logging.getLogger("httpx").warning("upstream trouble")
+        logging.getLogger("access").info("request")
+    finally:
+        log_utils.stop_logging()
+        logging.getLogger().removeHandler(handler)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(l["logger"], l["msg"]) for l in lines] == [("httpx", "upstream trouble"), ("access", "request")]
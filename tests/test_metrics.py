@@ -0,0 +1,83 @@
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from utils import metrics
+from utils.metrics import Histogram, MetricsMiddleware
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("test_duration_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        h.observe(value, stage="a")
+
+    data = h.snapshot()[("a",)]
+    assert data["buckets"] == [1, 2]
+    assert data["count"] == 3
+    assert round(data["sum"], 2) == 5.55
+
+    text = "\n".join(h.render())
+    assert 'test_duration_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_duration_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'test_duration_seconds_count{stage="a"} 3' in text
+
+
+def test_timer_decorates_sync_and_async_and_tracks_in_flight():
+    h = Histogram("test_duration_seconds", "test", ("stage",))
+    seen_in_flight = []
+
+    @h.time(stage="sync")
+    def work():
+        seen_in_flight.append(h._in_flight[("sync",)])
+        return 1
+
+    @h.time(stage="async")
+    async def async_work():
+        await asyncio.sleep(0)
+        return 2
+
+    assert work() == 1
+    assert asyncio.run(async_work()) == 2
+    with h.time(stage="sync"):
+        pass
+
+    snapshot = h.snapshot()
+    assert snapshot[("sync",)]["count"] == 2
+    assert snapshot[("async",)]["count"] == 1
+    assert seen_in_flight == [1]
+    assert h._in_flight == {("sync",): 0, ("async",): 0}
+
+
+def test_timer_records_failures():
+    h = Histogram("test_duration_seconds", "test", ("stage",))
+    try:
+        with h.time(stage="x"):
+            raise ValueError()
+    except ValueError:
+        pass
+    assert h.snapshot()[("x",)]["count"] == 1
+
+
+def test_render_includes_registered_stats(monkeypatch):
+    monkeypatch.setattr(metrics, "_collectors", {})
+    metrics.register_stats("test_cache", lambda: {"hit_ratio": 0.75, "name": "x", "nested": {"calls": 3}})
+
+    text = metrics.render_prometheus()
+    assert "test_cache_hit_ratio 0.75" in text
+    assert "test_cache_nested_calls 3" in text
+    assert "test_cache_name" not in text
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: str):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+
+    data = metrics.REQUEST_LATENCY.snapshot()
+    assert data[("GET", "/items/{item_id}", "200")]["count"] == 2
@@ -0,0 +1,126 @@
+import json
+import threading
+import numpy as np
+import pytest
+from services.search_backends import NumpyCollection, load_or_build_numpy_index
+
+
+class FakeChroma:
+    """Mimics the parts of a Chroma collection the exporter uses."""
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def get(self, include):
+        n = len(self.embeddings)
+        return {
+            "ids": [f"C{i}" for i in range(n)],
+            "embeddings": self.embeddings,
+            "documents": [f"doc{i}" for i in range(n)],
+            "metadatas": [{"category": f"cat{i}"} for i in range(n)],
+        }
+
+    def count(self):
+        return len(self.embeddings)
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(50, 16)).astype(np.float32)
+
+
+def test_query_matches_brute_force(vectors):
+    index = NumpyCollection.from_chroma(FakeChroma(vectors))
+    query = vectors[7] + 0.01
+
+    raw = index.query(query_embeddings=[query.tolist()], n_results=5)
+
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    sims = normed @ (query / np.linalg.norm(query))
+    expected = [f"C{i}" for i in np.argsort(-sims)[:5]]
+    assert raw["ids"][0] == expected
+    assert raw["ids"][0][0] == "C7"
+    assert raw["distances"][0] == pytest.approx(sorted(1 - sims)[:5], abs=1e-5)
+    assert raw["metadatas"][0][0] == {"category": "cat7"}
+
+
+def test_batched_queries(vectors):
+    index = NumpyCollection.from_chroma(FakeChroma(vectors))
+    raw = index.query(query_embeddings=vectors[[3, 9]], n_results=2)
+    assert [row[0] for row in raw["ids"]] == ["C3", "C9"]
+
+
+def test_n_results_larger_than_index(vectors):
+    index = NumpyCollection.from_chroma(FakeChroma(vectors[:3]))
+    raw = index.query(query_embeddings=[vectors[0]], n_results=12)
+    assert len(raw["ids"][0]) == 3
+
+
+def test_load_or_build_roundtrip(vectors, tmp_path):
+    chroma = FakeChroma(vectors)
+    built = load_or_build_numpy_index(chroma, str(tmp_path))
+    assert isinstance(built.embeddings, np.memmap)
+
+    # stale index (entry count changed) is rebuilt
+    chroma.embeddings = vectors[:10]
+    rebuilt = load_or_build_numpy_index(chroma, str(tmp_path))
+    assert rebuilt.count() == 10
+
+
+def test_failed_export_keeps_the_live_index(vectors, tmp_path, monkeypatch):
+    directory = tmp_path / "index"
+    load_or_build_numpy_index(FakeChroma(vectors), str(directory))
+
+    def broken_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(json, "dump", broken_dump)
+    with pytest.raises(OSError):
+        NumpyCollection.from_chroma(FakeChroma(vectors[:10])).save(str(directory))
+
+    # The link still points at the complete previous export, and no staging directory is left behind
+    assert NumpyCollection.load(str(directory)).count() == 50
+    assert not [p.name for p in tmp_path.iterdir() if "staging" in p.name]
+
+
+def test_concurrent_saves_all_succeed_and_readers_never_fail(vectors, tmp_path):
+    directory = str(tmp_path / "index")
+    NumpyCollection.from_chroma(FakeChroma(vectors[:5])).save(directory)
+    exports = [NumpyCollection.from_chroma(FakeChroma(vectors[:n])) for n in (10, 20, 30, 40)]
+    start = threading.Barrier(len(exports) + 1)
+    errors, seen = [], set()
+    saving = True
+
+    def save(index):
+        start.wait()
+        try:
+            index.save(directory)
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        start.wait()
+        while saving:
+            try:
+                index = NumpyCollection.load(directory)
+                # Embeddings and records always come from the same export
+                assert len(index.embeddings) == index.count()
+                seen.add(index.count())
+            except Exception as e:
+                errors.append(e)
+
+    writers = [threading.Thread(target=save, args=(index,)) for index in exports]
+    reader = threading.Thread(target=read)
+    for t in writers + [reader]:
+        t.start()
+    for t in writers:
+        t.join()
+    saving = False
+    reader.join()
+
+    assert errors == []
+    assert NumpyCollection.load(directory).count() in (10, 20, 30, 40)
+    assert seen <= {5, 10, 20, 30, 40}
+    # Old exports are pruned, the linked one is kept
+    versions = [p.name for p in tmp_path.iterdir() if p.name.startswith("index-v")]
+    assert len(versions) <= 3
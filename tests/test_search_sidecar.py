@@ -0,0 +1,120 @@
+import threading
+import time
+import httpx
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from services import chromadb_service, search_client, search_sidecar
+from services.inference_executor import InferenceQueueFull
+
+HIT = {"id": "1", "distance": 0.2, "document": "Plumbing", "metadata": {"category": "Plumbing"}}
+
+
+@pytest.fixture()
+def sidecar(monkeypatch):
+    calls = []
+
+    def fake(name):
+        def search(query_or_queries, top_k=3, **kwargs):
+            calls.append((name, query_or_queries, top_k, kwargs))
+            if isinstance(query_or_queries, list):
+                return [([HIT], "ok") for _ in query_or_queries]
+            return [HIT], "ok"
+        return search
+
+    for name in ("semantic_search", "semantic_search_batch", "semantic_search_turkish", "semantic_search_turkish_batch"):
+        monkeypatch.setattr(search_sidecar, name, fake(name))
+
+    # The worker side talks to the sidecar app in-process
+    search_client.set_sidecar_url("http://sidecar")
+    monkeypatch.setattr(search_client, "_get_client", lambda: TestClient(search_sidecar.app))
+    yield calls
+    search_client.set_sidecar_url(None)
+
+
+def test_client_mode_forwards_single_and_batch_searches(sidecar):
+    assert chromadb_service.semantic_search("plumber", 2) == ([HIT], "ok")
+    assert sidecar[-1] == ("semantic_search", "plumber", 2, {"score_threshold": 0.88})
+
+    assert chromadb_service.semantic_search_batch(["plumber", "bakery"]) == [([HIT], "ok"), ([HIT], "ok")]
+    assert sidecar[-1][0] == "semantic_search_batch"
+
+    assert chromadb_service.semantic_search_turkish("tesisatçı") == ([HIT], "ok")
+    assert sidecar[-1] == ("semantic_search_turkish", "tesisatçı", 3, {})
+
+    chromadb_service.semantic_search_turkish_batch(["tesisatçı", "fırın"])
+    assert sidecar[-1][0] == "semantic_search_turkish_batch"
+
+
+def test_explicit_model_stays_in_process(sidecar):
+    class DummyModel:
+        def encode(self, texts, **kwargs):
+            return np.ones((len(texts), 3)) if isinstance(texts, list) else np.ones(3)
+
+    class DummyCollection:
+        def query(self, query_embeddings, n_results):
+            return {"ids": [[]], "distances": [[]], "documents": [[]], "metadatas": [[]]}
+
+    assert chromadb_service.semantic_search("plumber", _model=DummyModel(), _collection=DummyCollection()) == ([], "no_hits")
+    assert sidecar == []
+
+
+def test_busy_sidecar_raises_inference_queue_full(sidecar, monkeypatch):
+    async def full(*args, **kwargs):
+        raise InferenceQueueFull()
+
+    monkeypatch.setattr(search_sidecar, "run_inference", full)
+    with pytest.raises(InferenceQueueFull):
+        chromadb_service.semantic_search("plumber")
+
+
+def test_status_comes_from_the_sidecar(sidecar, monkeypatch):
+    monkeypatch.setattr(search_sidecar, "search_status", lambda: {"model": True, "index": True, "warm": True})
+    monkeypatch.setattr(search_sidecar, "turkish_index_ready", lambda: True)
+    monkeypatch.setattr(chromadb_service, "_tr_index_ready", False)
+
+    assert chromadb_service.search_status() == {"model": True, "index": True, "warm": True}
+    assert chromadb_service.turkish_index_ready() is True
+    assert chromadb_service.load_search_resources() == {}
+
+
+def test_unreachable_sidecar_is_not_ready():
+    search_client.set_sidecar_url("unix:/nonexistent/arabul-search.sock")
+    try:
+        assert chromadb_service.search_status() == {"model": False, "index": False, "warm": False}
+    finally:
+        search_client.set_sidecar_url(None)
+
+
+def test_split_url():
+    assert search_client.split_url("unix:/run/arabul/search.sock") == ("http://search-sidecar", "/run/arabul/search.sock")
+    assert search_client.split_url("http://127.0.0.1:8765/") == ("http://127.0.0.1:8765", None)
+
+
+def test_turkish_index_check_never_waits_for_the_sidecar(monkeypatch):
+    class SlowClient:
+        def __init__(self):
+            self.threads = []
+
+        def get(self, path):
+            self.threads.append(threading.current_thread().name)
+            time.sleep(0.3)
+            return httpx.Response(200, json={"model": True, "index": True, "warm": True, "turkish_index": True},
+                                  request=httpx.Request("GET", "http://sidecar/status"))
+
+    client = SlowClient()
+    search_client.set_sidecar_url("http://sidecar")
+    monkeypatch.setattr(search_client, "_get_client", lambda: client)
+    monkeypatch.setattr(chromadb_service, "_tr_index_ready", False)
+    try:
+        start = time.perf_counter()
+        assert chromadb_service.turkish_index_ready() is False
+        assert time.perf_counter() - start < 0.1
+
+        deadline = time.time() + 2
+        while not chromadb_service.turkish_index_ready() and time.time() < deadline:
+            time.sleep(0.02)
+        assert chromadb_service.turkish_index_ready() is True
+        assert client.threads == ["sidecar-status"]
+    finally:
+        search_client.set_sidecar_url(None)
@@ -1,6 +1,6 @@
 import pytest
 import numpy as np
-from services.chromadb_service import semantic_search
+from services.chromadb_service import semantic_search, semantic_search_batch
 
 # ───────── Dummy stand-ins ──────────
 class DummyModel:
@@ -22,6 +22,30 @@ class DummyCollection:
         return self.faux_result
 
 
+class DummyBatchModel:
+    """Encodes each query to a distinct vector; records how it was called."""
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, queries):
+        self.calls.append(queries)
+        if isinstance(queries, str):
+            return np.array([float(len(queries)), 0.0])
+        return np.array([[float(len(q)), 0.0] for q in queries])
+
+
+class DummyBatchCollection:
+    """Returns one prepared row per query embedding, in a single .query() call."""
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def query(self, *, query_embeddings, n_results):
+        self.calls += 1
+        assert len(query_embeddings) == len(self.rows)
+        return {key: [row[key] for row in self.rows] for key in ("ids", "distances", "documents", "metadatas")}
+
+
 # ───────── Fixtures ──────────
 @pytest.fixture
 def good_raw():
@@ -100,3 +124,49 @@ def test_semantic_search_no_hits(empty_raw):
 
     assert status == "no_hits"
     assert results == []
+
+
+def test_semantic_search_batch_single_query_call(good_raw, over_thresh_raw, empty_raw):
+    model = DummyBatchModel()
+    rows = [{key: raw[key][0] for key in raw} for raw in (good_raw, over_thresh_raw, empty_raw)]
+    coll = DummyBatchCollection(rows)
+
+    outcomes = semantic_search_batch(
+        ["plumber", "xyz", "nothing here"],
+        top_k=2,
+        _model=model,
+        _collection=coll,
+    )
+
+    assert coll.calls == 1
+    assert len(model.calls) == 1 and isinstance(model.calls[0], list)
+    assert [status for _, status in outcomes] == ["ok", "threshold", "no_hits"]
+    assert [r["id"] for r in outcomes[0][0]] == ["A", "B"]
+
+
+def test_semantic_search_batch_empty():
+    assert semantic_search_batch([], _model=DummyBatchModel(), _collection=DummyBatchCollection([])) == []
+
+
+def test_turkish_index_flag_is_set_by_startup_only(monkeypatch):
+    from services import chromadb_service
+
+    class CountingCollection(DummyBatchCollection):
+        def count(self):
+            return 3
+
+    def no_chroma(*args, **kwargs):
+        raise AssertionError("turkish_index_ready must not touch Chroma")
+
+    monkeypatch.setattr(chromadb_service, "_tr_index_ready", False)
+    monkeypatch.setattr(chromadb_service, "get_tr_collection", no_chroma)
+    assert chromadb_service.turkish_index_ready() is False
+
+    monkeypatch.setattr(chromadb_service, "get_model", lambda: DummyBatchModel())
+    monkeypatch.setattr(chromadb_service, "get_search_collection", lambda: CountingCollection([{"ids": [], "distances": [], "documents": [], "metadatas": []}]))
+    monkeypatch.setattr(chromadb_service, "get_tr_collection", lambda: CountingCollection([{"ids": [], "distances": [], "documents": [], "metadatas": []}]))
+    monkeypatch.setattr(chromadb_service, "get_multilingual_model", lambda: DummyBatchModel())
+    monkeypatch.setattr(chromadb_service, "_ready", False)
+    chromadb_service.load_search_resources()
+
+    assert chromadb_service.turkish_index_ready() is True
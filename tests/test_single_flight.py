@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_sync_callers_share_one_call():
+    flight = SingleFlight("test", copy_result=dict)
+    calls = []
+    started = threading.Event()
+
+    def slow_lookup(key):
+        calls.append(key)
+        started.set()
+        time.sleep(0.1)
+        return {"key": key}
+
+    results = []
+    def caller():
+        results.append(flight.do("k", slow_lookup, "k"))
+
+    threads = [threading.Thread(target=caller) for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["k"]
+    assert results == [{"key": "k"}] * 5
+    assert len({id(r) for r in results}) == 5  # waiters got copies
+    assert flight.stats() == {"calls": 5, "executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_sync_error_reaches_waiters_and_is_not_kept():
+    flight = SingleFlight("test")
+    started = threading.Event()
+
+    def failing(_):
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    errors = []
+    def caller():
+        try:
+            flight.do("k", failing, "k")
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait()
+    waiter = threading.Thread(target=caller)
+    waiter.start()
+    leader.join()
+    waiter.join()
+
+    assert len(errors) == 2
+    assert flight.do("k", lambda k: "ok", "k") == "ok"
+
+
+def test_async_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def lookup(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return key.upper()
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.do_async("a", lookup, "a") for _ in range(3)),
+            flight.do_async("b", lookup, "b"),
+        )
+
+    assert asyncio.run(run()) == ["A", "A", "A", "B"]
+    assert sorted(calls) == ["a", "b"]
+    assert flight.stats()["coalesced"] == 2
+
+
+def test_async_waiter_survives_leader_error():
+    flight = SingleFlight("test")
+
+    async def failing(_):
+        await asyncio.sleep(0.01)
+        raise ValueError("bad")
+
+    async def run():
+        return await asyncio.gather(
+            flight.do_async("k", failing, "k"),
+            flight.do_async("k", failing, "k"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.stats()["executions"] == 1
+
+
+def test_cancelled_async_leader_does_not_cancel_waiters():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def lookup(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return key.upper()
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do_async("k", lookup, "k"))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do_async("k", lookup, "k"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await waiter
+        # The flight's task finished and was cleaned up, so the next call starts a new one
+        assert await flight.do_async("k", lookup, "k") == "K"
+        return leader, result
+
+    leader, result = asyncio.run(run())
+    assert leader.cancelled()
+    assert result == "K"
+    assert calls == ["k", "k"]
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from fastapi.testclient import TestClient
+import main
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_importing_main_does_not_load_torch_or_chroma():
+    code = (
+        "import sys, main; "
+        "print('loaded:' + ','.join(m for m in ('torch', 'chromadb', 'sentence_transformers', 'onnxruntime') if m in sys.modules))"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip().splitlines()[-1] == "loaded:"
+
+
+def test_healthz_is_always_ok():
+    response = TestClient(main.app).get("/healthz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_readyz_reports_each_check(monkeypatch):
+    monkeypatch.setattr(main, "search_status", lambda: {"model": True, "index": True, "warm": False})
+    monkeypatch.setattr(main, "ping_db", lambda: True)
+    client = TestClient(main.app)
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["checks"] == {"model": True, "index": True, "warm": False, "mysql": True}
+
+    monkeypatch.setattr(main, "search_status", lambda: {"model": True, "index": True, "warm": True})
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+
+
+def test_lifespan_loads_search_in_background_and_survives_db_errors(monkeypatch):
+    def broken_db():
+        raise RuntimeError("database down")
+
+    def slow_load():
+        time.sleep(0.2)
+        return {"model_s": 0.1, "index_s": 0.05, "warmup_s": 0.05}
+
+    monkeypatch.setattr(main, "initialize_all_tables", broken_db)
+    monkeypatch.setattr(main, "load_search_resources", slow_load)
+    monkeypatch.setattr(main, "_startup", {"status": "starting", "budget_s": 30.0})
+
+    with TestClient(main.app) as client:
+        # Startup did not wait for the model
+        assert client.get("/healthz").status_code == 200
+        assert main.get_startup_stats()["status"] == "starting"
+
+        deadline = time.time() + 5
+        while main.get_startup_stats()["status"] == "starting" and time.time() < deadline:
+            time.sleep(0.02)
+
+        stats = client.get("/stats").json()["startup"]
+        assert stats["status"] == "ready"
+        assert stats["model_s"] == 0.1
+        assert stats["ready_s"] >= stats["import_s"]
+
+
+def test_slow_model_load_leaves_the_loop_code_free(monkeypatch):
+    from services import chromadb_service
+
+    loading = threading.Event()
+
+    def slow_load(model_name):
+        loading.set()
+        time.sleep(1.0)
+        return object()
+
+    monkeypatch.setattr(chromadb_service, "load_encoder_model", slow_load)
+    monkeypatch.setattr(chromadb_service, "_model", None)
+    loader = threading.Thread(target=chromadb_service.get_model)
+    loader.start()
+    assert loading.wait(2)
+
+    start = time.perf_counter()
+    assert chromadb_service._load_lock.acquire(timeout=0.2)
+    chromadb_service._load_lock.release()
+    chromadb_service.turkish_index_ready()
+    assert TestClient(main.app).get("/healthz").status_code == 200
+    assert time.perf_counter() - start < 0.5
+
+    loader.join()
+    assert chromadb_service._model is not None
@@ -0,0 +1,122 @@
+import threading
+import time
+import pytest
+import services.translation_service as ts
+from services.cache_store import SQLiteTTLStore
+
+
+class FakeTranslator:
+    def __init__(self, prefix, fail=False):
+        self.prefix = prefix
+        self.fail = fail
+        self.calls = []
+
+    def translate(self, text):
+        self.calls.append(text)
+        if self.fail:
+            raise RuntimeError("translator down")
+        return f"{self.prefix}{text}"
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(ts, "translation_store",
+                        SQLiteTTLStore(str(tmp_path / "cache.sqlite3"), table="translation"))
+    translators = {
+        "mymemory_en": FakeTranslator("en:"),
+        "google_en": FakeTranslator("gen:"),
+        "google_tr": FakeTranslator("tr:"),
+        "mymemory_tr": FakeTranslator("mtr:"),
+    }
+    for name, fake in translators.items():
+        monkeypatch.setitem(ts.TRANSLATORS, name, lambda fake=fake: fake)
+    monkeypatch.setattr(ts, "_local", threading.local())
+    return translators
+
+
+def test_translate_to_english_is_cached(isolated):
+    assert ts.translate_to_english("acıktım") == "en:acıktım"
+    assert ts.translate_to_english("acıktım") == "en:acıktım"
+    assert isolated["mymemory_en"].calls == ["acıktım"]
+
+
+def test_translate_to_english_fallback_and_failure_not_cached(isolated):
+    isolated["mymemory_en"].fail = True
+    isolated["google_en"].fail = True
+
+    assert ts.translate_to_english("musluk") == "musluk"
+    assert not ts.translation_store.contains("en:musluk")
+
+    isolated["google_en"].fail = False
+    assert ts.translate_to_english("musluk") == "gen:musluk"
+
+
+def test_nace_table_serves_descriptions_without_remote_calls(isolated):
+    result = ts.preload_nace_translations(['"Restaurants"', "Plumbing"])
+    assert result == {"descriptions": 2, "missing": 2, "translated": 2}
+
+    calls_before = len(isolated["google_tr"].calls)
+    assert ts.translate_nace_description("Restaurants") == "tr:Restaurants"
+    assert ts.translate_nace_description("Plumbing") == "tr:Plumbing"
+    assert len(isolated["google_tr"].calls) == calls_before
+
+    # a second preload has nothing left to translate
+    assert ts.preload_nace_translations(["Plumbing"])["missing"] == 0
+
+
+def test_query_translation_does_not_expire_the_nace_table(isolated, monkeypatch):
+    # A user query with the same text lands in the expiring query cache first
+    monkeypatch.setattr(ts, "TRANSLATION_CACHE_TTL", 0.05)
+    assert ts.translate_to_turkish("Plumbing") == "tr:Plumbing"
+    assert ts.preload_nace_translations(["Plumbing"])["missing"] == 1
+
+    time.sleep(0.06)
+    calls_before = len(isolated["google_tr"].calls)
+    assert ts.translate_nace_description("Plumbing") == "tr:Plumbing"
+    assert len(isolated["google_tr"].calls) == calls_before
+
+
+def test_translate_many_to_english_dedupes_and_uses_cache(isolated):
+    ts.translate_to_english("musluk")
+
+    result = ts.translate_many_to_english(["acıktım", "musluk", " acıktım ", "kombi"])
+
+    assert result == ["en:acıktım", "en:musluk", "en:acıktım", "en:kombi"]
+    assert sorted(isolated["mymemory_en"].calls) == ["acıktım", "kombi", "musluk"]
+
+
+def test_translate_many_to_english_failures_keep_original(isolated):
+    isolated["mymemory_en"].fail = True
+    isolated["google_en"].fail = True
+
+    assert ts.translate_many_to_english(["musluk"]) == ["musluk"]
+    assert not ts.translation_store.contains("en:musluk")
+
+
+def test_each_thread_gets_its_own_translator(monkeypatch):
+    monkeypatch.setitem(ts.TRANSLATORS, "mymemory_en", lambda: FakeTranslator("en:"))
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(ts._translator("mymemory_en"))) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(t) for t in seen}) == 3
+    assert ts._translator("mymemory_en") is ts._translator("mymemory_en")
+
+
+class RacyTranslator:
+    """Keeps the query on the instance like deep_translator, so a shared instance mixes up inputs"""
+
+    def translate(self, text):
+        self._query = text
+        time.sleep(0.01)
+        return f"en:{self._query}"
+
+
+def test_translate_many_keeps_each_output_with_its_input(monkeypatch):
+    monkeypatch.setitem(ts.TRANSLATORS, "mymemory_en", RacyTranslator)
+    queries = [f"sorgu {i}" for i in range(16)]
+
+    assert ts.translate_many_to_english(queries) == [f"en:{q}" for q in queries]
@@ -86,3 +86,43 @@ def test_rating_endpoints(client):
     ranks = client.post("/rating/rankings",
                         json=["SUP123"]).json()
     assert ranks[0]["average_rating"] == 4.5
+
+
+def test_favorites_detailed_uses_fallback_for_missing(client, monkeypatch):
+    from routes import user as user_routes
+
+    async def fake_details(ids):
+        return {"SUP123": None}
+
+    monkeypatch.setattr(user_routes, "fetch_supplier_details_async", fake_details)
+
+    data = client.get("/favorites-detailed/42").json()["data"]
+    assert data[0]["SupplierID"] == "SUP123"
+    assert data[0]["Category"] == "Bilinmeyen"
+
+
+def test_db_calls_run_off_the_event_loop(client, monkeypatch):
+    import asyncio
+    from routes import user as user_routes
+
+    on_loop = []
+
+    def record(*_):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return {"message": "ok", "success": True}
+
+    for name in ("toggle_favorite", "submit_rating", "calculate_bulk_average_ratings"):
+        monkeypatch.setattr(user_routes, name, record)
+    monkeypatch.setattr(user_routes, "get_popular_suppliers", lambda: record() and [])
+
+    client.post("/add-favourite", json={"user_id": 42, "supplier_id": "SUP123", "screen_opened_at": "t",
+                                        "favorited_at": "t", "is_valid_favorite": True})
+    client.get("/popular-suppliers")
+    client.post("/rating", json={"user_id": 42, "supplier_id": "SUP123", "rating": 5, "rated_at": "t"})
+    client.post("/rating/rankings", json=["SUP123"])
+
+    assert on_loop == [False] * 4
@@ -21,6 +21,8 @@ class _Cursor:
             # single-row result for get_user_rating
             self._result = [(4,)]
         elif "FROM RATINGS" in sql_clean and "AVG(RATING)" in sql_clean:
+            self._result = [("SUP123", 4.5, 2)]
+        elif "FROM SUPPLIER_RATING_STATS" in sql_clean and "AVERAGE_RATING" in sql_clean:
             # multi-row result for calculate_bulk_average_ratings
             self._result = [("SUP123", 4.5, 2)]
         else:
@@ -66,3 +68,189 @@ def test_bulk_average_ratings():
     res = user_operations.calculate_bulk_average_ratings(["SUP123"])
     assert res == [{"supplier_id": "SUP123", "average_rating": 4.5,
                     "count": 2}]
+
+
+class _RatingsCursor:
+    """Records statements; answers the existing-rating lookup and the totals queries"""
+
+    def __init__(self, existing=None, totals=(), stored=()):
+        self.statements = []
+        self._existing, self._totals, self._stored = existing, list(totals), list(stored)
+        self._result = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((" ".join(sql.split()), params))
+        sql_clean = sql.strip().upper()
+        if sql_clean.startswith("SELECT ID, RATING FROM RATINGS"):
+            self._result = [self._existing] if self._existing else []
+        elif "GROUP BY TRIM(SUPPLIER_ID)" in sql_clean:
+            self._result = self._totals
+        elif sql_clean.startswith("SELECT SUPPLIER_ID, RATING_SUM"):
+            self._result = self._stored
+        else:
+            self._result = []
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+def _use_cursor(monkeypatch, cursor):
+    @contextmanager
+    def conn_ctx():
+        yield SimpleNamespace(cursor=lambda: cursor, commit=lambda: None, rollback=lambda: None)
+
+    monkeypatch.setattr(user_operations, "get_db_connection", conn_ctx)
+
+
+def _stats_updates(cursor):
+    return [params for sql, params in cursor.statements if sql.startswith("INSERT INTO supplier_rating_stats")]
+
+
+def test_submit_rating_updates_stats_for_new_and_changed_ratings(monkeypatch):
+    data = user_operations.RatingData(user_id=42, supplier_id=" SUP123 ", rating=5, rated_at="now")
+
+    cursor = _RatingsCursor()
+    _use_cursor(monkeypatch, cursor)
+    assert user_operations.submit_rating(data)["success"] is True
+    assert _stats_updates(cursor) == [("SUP123", 5, 1)]
+
+    # Changing a 2 into a 5 moves the sum by 3 and leaves the count alone
+    cursor = _RatingsCursor(existing=(7, 2))
+    _use_cursor(monkeypatch, cursor)
+    user_operations.submit_rating(data)
+    assert _stats_updates(cursor) == [("SUP123", 3, 0)]
+
+    # Re-submitting the same rating does not touch the aggregate
+    cursor = _RatingsCursor(existing=(7, 5))
+    _use_cursor(monkeypatch, cursor)
+    user_operations.submit_rating(data)
+    assert _stats_updates(cursor) == []
+
+
+def test_check_rating_stats_reports_mismatches(monkeypatch):
+    cursor = _RatingsCursor(
+        totals=[("SUP1", 9, 2), ("SUP2", 4, 1)],
+        stored=[("SUP1", 9, 2), ("SUP2", 3, 1), ("SUP3", 5, 1)],
+    )
+    _use_cursor(monkeypatch, cursor)
+
+    assert user_operations.check_rating_stats() == [
+        {"supplier_id": "SUP2", "expected_sum": 4, "expected_count": 1, "stored_sum": 3, "stored_count": 1},
+        {"supplier_id": "SUP3", "expected_sum": 0, "expected_count": 0, "stored_sum": 5, "stored_count": 1},
+    ]
+
+
+class _FavoritesCursor(_RatingsCursor):
+    """Answers the favorites lookups; `deleted` is the rowcount of the general_favorites delete"""
+
+    def __init__(self, existing=None, deleted=0, counts=()):
+        super().__init__(existing=existing)
+        self._deleted, self._counts = deleted, list(counts)
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        sql_clean = sql.strip().upper()
+        self.rowcount = self._deleted if sql_clean.startswith("DELETE FROM GENERAL_FAVORITES") else 0
+        if sql_clean.startswith("SELECT ID FROM USER_FAVORITES"):
+            self._result = [self._existing] if self._existing else []
+        elif "FROM SUPPLIER_FAVORITE_COUNTS" in sql_clean:
+            self._result = self._counts
+
+
+def _count_updates(cursor):
+    return [params for sql, params in cursor.statements if sql.startswith("INSERT INTO supplier_favorite_counts")]
+
+
+def test_toggle_favorite_maintains_counters(monkeypatch):
+    user_operations._popularity_cache.clear()
+
+    cursor = _FavoritesCursor()
+    _use_cursor(monkeypatch, cursor)
+    user_operations.toggle_favorite(42, "SUP1", "now", "then", True)
+    assert _count_updates(cursor) == [("SUP1", 1, 1)]
+
+    # Not a valid favorite: not in general_favorites, so not counted
+    cursor = _FavoritesCursor()
+    _use_cursor(monkeypatch, cursor)
+    user_operations.toggle_favorite(42, "SUP1", "now", "then", False)
+    assert _count_updates(cursor) == []
+
+    cursor = _FavoritesCursor(existing=(3,), deleted=1)
+    _use_cursor(monkeypatch, cursor)
+    assert user_operations.toggle_favorite(42, "SUP1", "now", "then", True)["message"] == "Favorite removed"
+    assert _count_updates(cursor) == [("SUP1", -1, -1)]
+
+    cursor = _FavoritesCursor(existing=(3,), deleted=0)
+    _use_cursor(monkeypatch, cursor)
+    user_operations.toggle_favorite(42, "SUP1", "now", "then", True)
+    assert _count_updates(cursor) == []
+
+
+def test_favorite_counts_are_cached_and_invalidated_by_toggle(monkeypatch):
+    user_operations._popularity_cache.clear()
+    cursor = _FavoritesCursor(counts=[("SUP1", 7)])
+    _use_cursor(monkeypatch, cursor)
+
+    assert user_operations.get_favorite_counts(["SUP1", "SUP2"]) == {"SUP1": 7, "SUP2": 0}
+    assert user_operations.get_favorite_counts(["SUP2", "SUP1"]) == {"SUP1": 7, "SUP2": 0}
+    assert user_operations.get_popular_suppliers() == [{"supplier_id": "SUP1", "count": 7}]
+    user_operations.get_popular_suppliers()
+    lookups = [sql for sql, _ in cursor.statements if "supplier_favorite_counts" in sql]
+    assert len(lookups) == 2
+
+    user_operations.toggle_favorite(42, "SUP1", "now", "then", True)
+    user_operations.get_favorite_counts(["SUP1", "SUP2"])
+    user_operations.get_popular_suppliers()
+    lookups = [params for sql, params in cursor.statements if sql.startswith("SELECT supplier_id, favorite_count")]
+    # SUP2 is still cached; SUP1 and the top list were invalidated
+    assert lookups[-2:] == [["SUP1"], (user_operations.POPULAR_SUPPLIERS_LIMIT,)]
+
+
+class _CaseInsensitiveCountsCursor(_FavoritesCursor):
+    """Answers the counter lookup like MySQL's IN on a case-insensitive collation"""
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        if sql.startswith("SELECT supplier_id, favorite_count"):
+            requested = {p.lower() for p in params}
+            self._result = [row for row in self._counts if row[0].lower() in requested]
+
+
+def test_favorite_counts_match_ids_the_way_mysql_does(monkeypatch):
+    user_operations._popularity_cache.clear()
+    cursor = _CaseInsensitiveCountsCursor(counts=[("SUP1", 7)])
+    _use_cursor(monkeypatch, cursor)
+
+    # A leading-space spelling first, then a mixed-case one: both find the trimmed row
+    assert user_operations.get_favorite_counts([" SUP1", "sup1"]) == {" SUP1": 7, "sup1": 7}
+    assert user_operations.get_favorite_counts(["Sup1 "]) == {"Sup1 ": 7}
+    lookups = [params for sql, params in cursor.statements if sql.startswith("SELECT supplier_id, favorite_count")]
+    assert lookups == [["SUP1", "sup1"]]
+
+    # Counters are written under the trimmed id, and a toggle under another spelling
+    # invalidates the same cache entry
+    user_operations.toggle_favorite(42, " Sup1 ", "now", "then", True)
+    assert _count_updates(cursor) == [("Sup1", 1, 1)]
+    user_operations.get_favorite_counts(["sup1"])
+    lookups = [params for sql, params in cursor.statements if sql.startswith("SELECT supplier_id, favorite_count")]
+    assert len(lookups) == 2
+
+
+def test_timed_connection_records_query_latency():
+    from utils.metrics import STAGE_LATENCY
+
+    conn = user_operations._TimedConnection(_Conn())
+    cursor = conn.cursor()
+    cursor.execute("SELECT supplier_id, AVG(rating), COUNT(*) FROM ratings WHERE supplier_id IN (%s)", ("SUP123",))
+
+    assert cursor.fetchall() == [("SUP123", 4.5, 2)]
+    assert STAGE_LATENCY.snapshot()[("mysql", "select ratings")]["count"] >= 1
+    assert user_operations._query_label("UPDATE users SET email = %s") == "update users"
+    assert user_operations._query_label("CREATE TABLE IF NOT EXISTS favorites (id INT)") == "create favorites"
@@ -1,5 +1,7 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
+from mysql.connector.pooling import MySQLConnectionPool
 from argon2 import PasswordHasher
 from fastapi import HTTPException
 from pydantic import BaseModel
@@ -8,7 +10,25 @@ from contextlib import contextmanager
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 import os
-from typing import List
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List
+from config import (
+    DB_POOL_SIZE,
+    DB_POOL_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    POPULAR_SUPPLIERS_LIMIT,
+    POPULARITY_CACHE_TTL,
+    POPULARITY_CACHE_MAX_ENTRIES,
+)
+from services.cache_store import MemoryTTLStore
+from utils.log_utils import get_logger
+from utils.metrics import timed
+
+
+logger = get_logger(__name__)
 
 # MySQL Connection Configuration
 DB_CONFIG = {
@@ -19,6 +39,10 @@ DB_CONFIG = {
     'database': 'app_database'
 }
 
+# Popularity ranking: favorite counters per supplier, read through a per-process cache.
+# toggle_favorite invalidates its own worker's entries; other workers catch up within the TTL.
+_popularity_cache = MemoryTTLStore(max_entries=POPULARITY_CACHE_MAX_ENTRIES)
+
 ph = PasswordHasher()
 
 
@@ -202,14 +226,15 @@ def google_register_or_login(token: str, platform: str = "android"):
 
 
 def submit_rating(data: RatingData):
-    """Insert or update a user's rating for a supplier"""
+    """Insert or update a user's rating for a supplier, keeping supplier_rating_stats in step"""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
 
-            # Check if user has already rated this supplier
+            # Check if user has already rated this supplier (row locked until commit, so two
+            # concurrent updates cannot both apply their delta against the same old rating)
             cursor.execute(
-                "SELECT id FROM ratings WHERE user_id = %s AND supplier_id = %s",
+                "SELECT id, rating FROM ratings WHERE user_id = %s AND supplier_id = %s FOR UPDATE",
                 (data.user_id, data.supplier_id)
             )
             existing = cursor.fetchone()
@@ -220,24 +245,30 @@ def submit_rating(data: RatingData):
                     "UPDATE ratings SET rating = %s, rated_at = %s WHERE user_id = %s AND supplier_id = %s",
                     (data.rating, data.rated_at, data.user_id, data.supplier_id)
                 )
+                sum_delta, count_delta = data.rating - existing[1], 0
             else:
                 # Insert new rating
                 cursor.execute(
                     "INSERT INTO ratings (user_id, supplier_id, rating, rated_at) VALUES (%s, %s, %s, %s)",
                     (data.user_id, data.supplier_id, data.rating, data.rated_at)
                 )
+                sum_delta, count_delta = data.rating, 1
+
+            # Same transaction as the rating itself, so the aggregate never drifts
+            if sum_delta or count_delta:
+                _apply_rating_stats_delta(cursor, data.supplier_id, sum_delta, count_delta)
 
             conn.commit()
 
         return {"message": "Rating submitted successfully", "success": True}
     except Exception as e:
-        print(f"Rating submission error: {str(e)}")
+        logger.exception("submit_rating failed", extra={"user_id": data.user_id, "supplier_id": data.supplier_id})
         return {"message": "Rating submission failed", "error": str(e), "success": False}
 
 
 def get_user_rating(user_id: int, supplier_id: str):
     """Fetch user's rating for a supplier"""
-    print(f"Getting user rating for user_id={user_id}, supplier_id={supplier_id}")
+    logger.debug("get_user_rating", extra={"user_id": user_id, "supplier_id": supplier_id})
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -252,37 +283,34 @@ def get_user_rating(user_id: int, supplier_id: str):
         else:
             raise HTTPException(status_code=404, detail="No rating found")
     except Exception as e:
-        print(f"[ERROR] get_user_rating failed: {str(e)}")
+        if not (isinstance(e, HTTPException) and e.status_code == 404):
+            logger.exception("get_user_rating failed", extra={"user_id": user_id, "supplier_id": supplier_id})
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 def calculate_bulk_average_ratings(supplier_ids: List[str]):
     try:
         if not supplier_ids:
-            print("🚫 [RANKING-BACKEND] supplier_ids listesi boş.")
             return []
 
-        print(f"📥 [RANKING-BACKEND] Gelen supplier_ids: {supplier_ids}")
+        logger.debug("calculate_bulk_average_ratings request", extra={"supplier_ids": supplier_ids})
 
         with get_db_connection() as conn:
             cursor = conn.cursor()
 
             format_strings = ','.join(['%s'] * len(supplier_ids))
 
+            # Primary-key lookups on the aggregate instead of scanning ratings
             query = f"""
-                SELECT supplier_id, AVG(rating) as average_rating, COUNT(*) as total_ratings
-                FROM ratings
-                WHERE TRIM(supplier_id) IN ({format_strings})
-                GROUP BY supplier_id
+                SELECT supplier_id, average_rating, rating_count
+                FROM supplier_rating_stats
+                WHERE supplier_id IN ({format_strings}) AND rating_count > 0
                 ORDER BY average_rating DESC
             """
-            print(f"🧠 [RANKING-BACKEND] SQL Sorgusu: {query}")
             cursor.execute(query, supplier_ids)
             results = cursor.fetchall()
 
-        print("📊 [RANKING-BACKEND] Sorgu sonuçları:")
-        for row in results:
-            print(f" - {row[0]}: avg={row[1]}, count={row[2]}")
+        logger.debug("calculate_bulk_average_ratings rows", extra={"rows": results})
 
         return [
             {
@@ -293,25 +321,224 @@ def calculate_bulk_average_ratings(supplier_ids: List[str]):
             for row in results
         ]
     except Exception as e:
-        print(f"❌ [RANKING-BACKEND] Hata: {str(e)}")
+        logger.exception("calculate_bulk_average_ratings failed")
         raise HTTPException(status_code=500, detail="Rating calculation failed")
 
 
+def _apply_rating_stats_delta(cursor, supplier_id: str, sum_delta: int, count_delta: int):
+    """Add a rating change to supplier_rating_stats (keyed by the trimmed supplier id)"""
+    cursor.execute(
+        """
+        INSERT INTO supplier_rating_stats (supplier_id, rating_sum, rating_count)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            rating_sum = rating_sum + VALUES(rating_sum),
+            rating_count = rating_count + VALUES(rating_count)
+        """,
+        (supplier_id.strip(), sum_delta, count_delta)
+    )
+
+
+_RATING_TOTALS_SQL = """
+    SELECT TRIM(supplier_id), SUM(rating), COUNT(*)
+    FROM ratings
+    GROUP BY TRIM(supplier_id)
+"""
+
+
+def rebuild_rating_stats():
+    """Recompute supplier_rating_stats from the ratings table (backfill / repair)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # One transaction: readers see the old or the new aggregate, and the
+        # INSERT ... SELECT holds submit_rating off until the rebuild commits
+        cursor.execute("DELETE FROM supplier_rating_stats")
+        cursor.execute(
+            "INSERT INTO supplier_rating_stats (supplier_id, rating_sum, rating_count) " + _RATING_TOTALS_SQL
+        )
+        rebuilt = cursor.rowcount
+        conn.commit()
+    logger.info("supplier_rating_stats rebuilt", extra={"suppliers": rebuilt})
+    return rebuilt
+
+
+def check_rating_stats():
+    """Compare supplier_rating_stats with totals computed from ratings; returns the mismatches"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_RATING_TOTALS_SQL)
+        expected = {row[0]: (int(row[1]), int(row[2])) for row in cursor.fetchall()}
+        cursor.execute("SELECT supplier_id, rating_sum, rating_count FROM supplier_rating_stats")
+        stored = {row[0]: (int(row[1]), int(row[2])) for row in cursor.fetchall()}
+
+    mismatches = []
+    for supplier_id in sorted(set(expected) | set(stored)):
+        want = expected.get(supplier_id, (0, 0))
+        got = stored.get(supplier_id, (0, 0))
+        if want != got:
+            mismatches.append({
+                "supplier_id": supplier_id,
+                "expected_sum": want[0], "expected_count": want[1],
+                "stored_sum": got[0], "stored_count": got[1],
+            })
+    if mismatches:
+        logger.warning("supplier_rating_stats out of step", extra={"mismatches": len(mismatches)})
+    return mismatches
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW)
+_pool_stats = {
+    "checkouts": 0,
+    "in_use": 0,
+    "overflow_in_use": 0,
+    "overflow_total": 0,
+    "timeouts": 0,
+    "wait_time_total_ms": 0.0,
+    "wait_time_max_ms": 0.0,
+}
+
+
+def _get_pool():
+    """Create the shared MySQL connection pool on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = MySQLConnectionPool(
+                    pool_name="arabul_pool",
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    **DB_CONFIG
+                )
+    return _pool
+
+
+def _checkout_connection():
+    """Take a connection from the pool, falling back to an overflow connection"""
+    start = time.perf_counter()
+    if not _pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+        with _pool_lock:
+            _pool_stats["timeouts"] += 1
+        raise PoolError(f"Timed out after {DB_POOL_TIMEOUT}s waiting for a database connection")
+
+    # No ping of our own: the pool already checks is_connected() (a ping) on every checkout and
+    # reconnects stale sockets, handing the connection back to the pool if that fails
+    try:
+        try:
+            connection = _get_pool().get_connection()
+            is_overflow = False
+        except PoolError:
+            # All pooled connections are busy, open a temporary one
+            connection = mysql.connector.connect(**DB_CONFIG)
+            is_overflow = True
+    except Exception:
+        _pool_slots.release()
+        raise
+
+    wait_ms = (time.perf_counter() - start) * 1000
+    with _pool_lock:
+        _pool_stats["checkouts"] += 1
+        _pool_stats["in_use"] += 1
+        _pool_stats["wait_time_total_ms"] += wait_ms
+        _pool_stats["wait_time_max_ms"] = max(_pool_stats["wait_time_max_ms"], wait_ms)
+        if is_overflow:
+            _pool_stats["overflow_in_use"] += 1
+            _pool_stats["overflow_total"] += 1
+
+    return connection, is_overflow
+
+
+def _release_connection(connection, is_overflow: bool):
+    """Return a pooled connection to the pool (or close an overflow one)"""
+    try:
+        # close() on a pooled connection hands it back to the pool
+        connection.close()
+    except Error as e:
+        logger.warning("database connection release failed", extra={"error": str(e)})
+    finally:
+        with _pool_lock:
+            _pool_stats["in_use"] -= 1
+            if is_overflow:
+                _pool_stats["overflow_in_use"] -= 1
+        _pool_slots.release()
+
+
+def get_pool_stats():
+    """Snapshot of connection pool metrics"""
+    with _pool_lock:
+        stats = dict(_pool_stats)
+    stats["pool_size"] = DB_POOL_SIZE
+    stats["max_overflow"] = DB_POOL_MAX_OVERFLOW
+    stats["wait_time_avg_ms"] = (
+        stats["wait_time_total_ms"] / stats["checkouts"] if stats["checkouts"] else 0.0
+    )
+    return stats
+
+
+_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def _query_label(sql: str) -> str:
+    """Metric label for a statement: verb and first table, e.g. "select ratings" """
+    words = sql.split(None, 1)
+    verb = words[0].lower() if words else ""
+    table = _TABLE_RE.search(sql)
+    return f"{verb} {table.group(1).lower()}" if table else verb
+
+
+class _TimedCursor:
+    """Cursor wrapper recording the duration of every statement in the mysql stage metrics"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, *args, **kwargs):
+        with timed("mysql", _query_label(operation)):
+            return self._cursor.execute(operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        with timed("mysql", _query_label(operation)):
+            return self._cursor.executemany(operation, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _TimedConnection:
+    """Connection wrapper handing out _TimedCursor instances"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return _TimedCursor(self._connection.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections"""
+    """Context manager for pooled database connections"""
     connection = None
+    is_overflow = False
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        yield connection
+        connection, is_overflow = _checkout_connection()
+        yield _TimedConnection(connection)
     except Error as e:
-        print(f"Database connection error: {str(e)}")
+        logger.error("database error", extra={"error": str(e)})
         if connection:
             connection.rollback()
         raise
     finally:
-        if connection and connection.is_connected():
-            connection.close()
+        if connection:
+            _release_connection(connection, is_overflow)
 
 
 def init_db():
@@ -416,8 +643,6 @@ def init_fav_table():
 def toggle_favorite(user_id: int, supplier_id: str, favorited_at: str, screen_opened_at: str, is_valid_favorite: bool):
     """Toggle favorite status for a supplier"""
     try:
-        print(f"TOGGLING FAVORITE: user_id={user_id}, supplier_id={supplier_id}, is_valid_favorite={is_valid_favorite}")
-
         # Ensure supplier_id is always treated as a string
         supplier_id_str = str(supplier_id)
 
@@ -431,8 +656,6 @@ def toggle_favorite(user_id: int, supplier_id: str, favorited_at: str, screen_op
             )
             existing = cursor.fetchone()
 
-            print(f"Existing favorite check result: {existing}")
-
             if existing:
                 # Remove from both tables
                 cursor.execute(
@@ -443,10 +666,12 @@ def toggle_favorite(user_id: int, supplier_id: str, favorited_at: str, screen_op
                     "DELETE FROM general_favorites WHERE user_id = %s AND supplier_id = %s",
                     (user_id, supplier_id_str)
                 )
+                # Only favorites that reached general_favorites were counted
+                if cursor.rowcount > 0:
+                    _apply_favorite_count_delta(cursor, supplier_id_str, -cursor.rowcount)
 
                 conn.commit()
                 message = "Favorite removed"
-                print(f"Deleted favorite for user_id={user_id}, supplier_id={supplier_id_str}")
             else:
                 # Add to tables
                 cursor.execute(
@@ -459,15 +684,19 @@ def toggle_favorite(user_id: int, supplier_id: str, favorited_at: str, screen_op
                         "INSERT INTO general_favorites (user_id, supplier_id) VALUES (%s, %s)",
                         (user_id, supplier_id_str)
                     )
+                    _apply_favorite_count_delta(cursor, supplier_id_str, 1)
 
                 conn.commit()
                 message = "Favorite added"
-                print(
-                    f"Added favorite for user_id={user_id}, supplier_id={supplier_id_str}, is_valid={is_valid_favorite}")
+
+        _invalidate_popularity(supplier_id_str)
+
+        logger.info("toggle_favorite", extra={"user_id": user_id, "supplier_id": supplier_id_str,
+                                              "action": message, "is_valid_favorite": is_valid_favorite})
 
         return {"message": message, "success": True}
     except Exception as e:
-        print(f"Database error in toggle_favorite: {str(e)}")
+        logger.exception("toggle_favorite failed", extra={"user_id": user_id, "supplier_id": supplier_id})
         return {"message": "Error occurred", "error": str(e), "success": False}
 
 
@@ -476,13 +705,12 @@ def get_user_favorites(user_id: int):
     """Get favorites for a specific user"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        print(f"[DEBUG] user_id: {user_id}")  # Kullanıcı ID log
         cursor.execute(
             "SELECT supplier_id FROM user_favorites WHERE user_id = %s",
             (user_id,)
         )
         favorites = cursor.fetchall()
-        print(f"[DEBUG] Fetched favorites: {favorites}")  # Gelen veriyi yazdır
+        logger.debug("get_user_favorites", extra={"user_id": user_id, "favorites": favorites})
 
     return [favorite[0] for favorite in favorites]
 
@@ -574,33 +802,125 @@ def get_user_complaints(user_id: int):
     ]
 
 
+def _apply_favorite_count_delta(cursor, supplier_id: str, delta: int):
+    """Add a favorite change to supplier_favorite_counts (keyed by the trimmed supplier id)"""
+    cursor.execute(
+        """
+        INSERT INTO supplier_favorite_counts (supplier_id, favorite_count)
+        VALUES (%s, GREATEST(%s, 0))
+        ON DUPLICATE KEY UPDATE favorite_count = GREATEST(favorite_count + %s, 0)
+        """,
+        (_favorite_key(supplier_id), delta, delta)
+    )
+
+
+def _favorite_key(supplier_id) -> str:
+    """supplier_favorite_counts key: the trimmed id, as in supplier_rating_stats"""
+    return str(supplier_id).strip()
+
+
+def _favorite_cache_key(supplier_id) -> str:
+    # The table's collation is case-insensitive: ids that differ only in case share one row
+    return f"count:{_favorite_key(supplier_id).lower()}"
+
+
+def _invalidate_popularity(supplier_id: str):
+    _popularity_cache.delete("top")
+    _popularity_cache.delete(_favorite_cache_key(supplier_id))
+
+
 def get_popular_suppliers():
-    """Get list of popular suppliers based on favorite count"""
+    """Get the POPULAR_SUPPLIERS_LIMIT most favorited suppliers"""
+    found, cached = _popularity_cache.get("top")
+    if found:
+        return cached
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
 
-            # Get count of each supplier_id in general favorites
+            # Top of the favorite_count index instead of grouping general_favorites
             cursor.execute("""
-                SELECT supplier_id, COUNT(*) as favorite_count
-                FROM general_favorites
-                GROUP BY supplier_id
+                SELECT supplier_id, favorite_count
+                FROM supplier_favorite_counts
+                WHERE favorite_count > 0
                 ORDER BY favorite_count DESC
-            """)
+                LIMIT %s
+            """, (POPULAR_SUPPLIERS_LIMIT,))
 
             popular_suppliers = cursor.fetchall()
 
-            # Debug logs
-            print("--- POPULAR SUPPLIERS ---")
-            for row in popular_suppliers:
-                print(f"Supplier ID: {row[0]}  |  Count: {row[1]}")
+            logger.debug("get_popular_suppliers rows", extra={"rows": popular_suppliers})
 
         # Return supplier_id and count objects
-        return [{"supplier_id": row[0], "count": row[1]} for row in popular_suppliers]
+        result = [{"supplier_id": row[0], "count": row[1]} for row in popular_suppliers]
     except Exception as e:
-        print(f"Popular suppliers error: {str(e)}")
+        logger.exception("get_popular_suppliers failed")
         return []
 
+    _popularity_cache.set("top", result, ttl=POPULARITY_CACHE_TTL)
+    return result
+
+
+def get_favorite_counts(supplier_ids: List[str]) -> Dict[str, int]:
+    """Favorite counts of the given suppliers (0 for suppliers nobody favorited), keyed as given"""
+    counts = {}
+    missing = {}
+    for supplier_id in dict.fromkeys(supplier_ids):
+        key = _favorite_cache_key(supplier_id)
+        found, count = _popularity_cache.get(key)
+        if found:
+            counts[supplier_id] = count
+        else:
+            missing.setdefault(key, []).append(supplier_id)
+    if not missing:
+        return counts
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # Every requested spelling, trimmed the way the counters are written
+            lookup = list(dict.fromkeys(_favorite_key(sid) for ids in missing.values() for sid in ids))
+            format_strings = ','.join(['%s'] * len(lookup))
+            cursor.execute(
+                f"SELECT supplier_id, favorite_count FROM supplier_favorite_counts WHERE supplier_id IN ({format_strings})",
+                lookup
+            )
+            # IN matched case-insensitively, so the stored spelling may differ from the requested one
+            rows = {_favorite_cache_key(supplier_id): count for supplier_id, count in cursor.fetchall()}
+    except Exception:
+        logger.exception("get_favorite_counts failed")
+        return counts
+
+    for key, ids in missing.items():
+        count = int(rows.get(key, 0))
+        _popularity_cache.set(key, count, ttl=POPULARITY_CACHE_TTL)
+        for supplier_id in ids:
+            counts[supplier_id] = count
+    return counts
+
+
+def rebuild_favorite_counts():
+    """Recompute supplier_favorite_counts from general_favorites (backfill / repair)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM supplier_favorite_counts")
+        cursor.execute("""
+            INSERT INTO supplier_favorite_counts (supplier_id, favorite_count)
+            SELECT TRIM(supplier_id), COUNT(*) FROM general_favorites GROUP BY TRIM(supplier_id)
+        """)
+        rebuilt = cursor.rowcount
+        conn.commit()
+    _popularity_cache.clear()
+    logger.info("supplier_favorite_counts rebuilt", extra={"suppliers": rebuilt})
+    return rebuilt
+
+
+def get_popularity_cache_stats():
+    stats = _popularity_cache.stats()
+    stats["ttl"] = POPULARITY_CACHE_TTL
+    return stats
+
 
 def update_profile(old_email: str, old_password: str, new_email: str = None, new_password: str = None):
     """Update user's email and/or password"""
@@ -706,6 +1026,20 @@ def init_supplier_table():
         conn.commit()
 
 
+def ping_db() -> bool:
+    """Readiness check: can a connection be checked out and answer a trivial query"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+        return True
+    except Exception as e:
+        logger.warning("database ping failed", extra={"error": str(e)})
+        return False
+
+
 # Call this function to initialize all tables
 def initialize_all_tables():
     """Initialize all database tables"""
@@ -714,6 +1048,8 @@ def initialize_all_tables():
     init_complaint_table()  # Complaints table  
     init_supplier_table()  # Suppliers table
     init_rank_table()  # Ratings table
+    init_rating_stats_table()  # Per-supplier rating aggregates
+    init_favorite_counts_table()  # Per-supplier favorite counters
 
 
 def init_rank_table():
@@ -734,3 +1070,65 @@ def init_rank_table():
         conn.commit()
 
 
+def init_rating_stats_table():
+    """Initialize supplier_rating_stats and backfill it once from existing ratings"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS supplier_rating_stats (
+                supplier_id VARCHAR(255) NOT NULL PRIMARY KEY,
+                rating_sum BIGINT NOT NULL DEFAULT 0,
+                rating_count INT NOT NULL DEFAULT 0,
+                average_rating DOUBLE AS (IF(rating_count = 0, 0, rating_sum / rating_count)) STORED
+            )
+        ''')
+        conn.commit()
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM supplier_rating_stats), EXISTS(SELECT 1 FROM ratings)")
+        has_stats, has_ratings = cursor.fetchone()
+
+    if has_ratings and not has_stats:
+        rebuild_rating_stats()
+
+
+def init_favorite_counts_table():
+    """Initialize supplier_favorite_counts and backfill it once from existing favorites"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS supplier_favorite_counts (
+                supplier_id VARCHAR(255) NOT NULL PRIMARY KEY,
+                favorite_count INT NOT NULL DEFAULT 0,
+                INDEX idx_favorite_count (favorite_count)
+            )
+        ''')
+        conn.commit()
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM supplier_favorite_counts), EXISTS(SELECT 1 FROM general_favorites)")
+        has_counts, has_favorites = cursor.fetchone()
+
+    if has_favorites and not has_counts:
+        rebuild_favorite_counts()
+
+
+if __name__ == "__main__":
+    # python user_operations.py --rebuild-rating-stats   recompute supplier_rating_stats from ratings
+    # python user_operations.py --check-rating-stats     list suppliers whose aggregate is out of step
+    # python user_operations.py --rebuild-favorite-counts recompute supplier_favorite_counts from general_favorites
+    import argparse
+    import json
+    from utils.log_utils import setup_logging
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rebuild-rating-stats", action="store_true")
+    parser.add_argument("--check-rating-stats", action="store_true")
+    parser.add_argument("--rebuild-favorite-counts", action="store_true")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.rebuild_favorite_counts:
+        print(f"Rebuilt favorite counts for {rebuild_favorite_counts()} suppliers")
+    if args.rebuild_rating_stats:
+        print(f"Rebuilt rating stats for {rebuild_rating_stats()} suppliers")
+    if args.check_rating_stats:
+        mismatches = check_rating_stats()
+        print(json.dumps(mismatches, indent=2, ensure_ascii=False))
+        raise SystemExit(1 if mismatches else 0)
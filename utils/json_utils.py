@@ -0,0 +1,33 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson  # optional, several times faster than json on supplier payloads
+except ImportError:
+    orjson = None
+
+# ASCII control characters (0x00-0x1f and DEL), invalid inside JSON strings
+_CONTROL_BYTES = bytes(range(0x20)) + b"\x7f"
+
+
+def loads(raw: Union[bytes, str]) -> Any:
+    """
+    Strict JSON parse of bytes or text, with orjson when it is installed.
+    Raises ValueError (json.JSONDecodeError) on invalid input.
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def loads_lenient(raw: Union[bytes, str]) -> Any:
+    """
+    Like loads, but if the strict parse fails the control characters are dropped and the
+    parse is retried. Valid payloads are parsed without being copied first.
+    """
+    try:
+        return loads(raw)
+    except ValueError:
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        return loads(raw.translate(None, _CONTROL_BYTES))
@@ -0,0 +1,48 @@
+import re
+
+TURKISH_CHARS = set("çğıöşüÇĞİÖŞÜ")
+
+# Frequent Turkish words (ASCII-folded forms too, users often type without Turkish letters)
+TURKISH_WORDS = {
+    "icin", "için", "ile", "benim", "bana", "cok", "çok", "lazim", "lazım", "istiyorum",
+    "ariyorum", "arıyorum", "bozuldu", "tamir", "acil", "nerede", "yakin", "yakın",
+    "usta", "evde", "evim", "araba", "arabam", "yemek", "acikti", "acıktım", "aciktim",
+    "musluk", "elektrik", "boya", "temizlik", "kuafor", "kuaför", "doktor", "eczane",
+}
+
+# Short Turkish words that are also English or Latin-script words ("de", "su", "mu"...):
+# they only count once the query has a distinctive Turkish signal as well
+AMBIGUOUS_TURKISH_WORDS = {
+    "ve", "bir", "bu", "da", "de", "ki", "mi", "mu", "mü", "ben", "var", "yok", "su",
+}
+
+# Present continuous / first-person endings, e.g. "sızdırıyor", "ariyorum", "geliyoruz"
+_TURKISH_SUFFIX_RE = re.compile(r"(iyor|ıyor|uyor|üyor)(um|sun|uz|lar)?$")
+
+ENGLISH_WORDS = {
+    "the", "a", "an", "and", "i", "my", "is", "am", "are", "to", "for", "of", "in", "on",
+    "need", "want", "someone", "fix", "broken", "looking", "help", "there", "with", "me",
+}
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def detect_language(text: str) -> str:
+    """
+    Lightweight Turkish/English detector for short search queries.
+    Returns "tr", "en", or "unknown" when there is no signal either way.
+    """
+    if any(ch in TURKISH_CHARS for ch in text):
+        return "tr"
+
+    tokens = [t.lower() for t in _TOKEN_RE.findall(text)]
+    tr_score = sum(1 for t in tokens if t in TURKISH_WORDS or _TURKISH_SUFFIX_RE.search(t))
+    if tr_score:
+        tr_score += sum(1 for t in tokens if t in AMBIGUOUS_TURKISH_WORDS)
+    en_score = sum(1 for t in tokens if t in ENGLISH_WORDS)
+
+    if tr_score > en_score:
+        return "tr"
+    if en_score > tr_score:
+        return "en"
+    return "unknown"
@@ -0,0 +1,264 @@
+import asyncio
+import functools
+import math
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Latency buckets in seconds, from cache-speed lookups to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with fixed labels. Also tracks how many timed calls
+    are currently in flight per label set (see `time`).
+    """
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [bucket counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._in_flight: Dict[Tuple[str, ...], int] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def _enter(self, key: Tuple[str, ...]):
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def _exit(self, key: Tuple[str, ...]):
+        with self._lock:
+            self._in_flight[key] -= 1
+
+    def time(self, **labels) -> "Timer":
+        return Timer(self, labels)
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict]:
+        """
+        {label values: {"count", "sum", "buckets": cumulative counts}} per label set.
+        """
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        result = {}
+        for key, values in series.items():
+            cumulative, running = [], 0
+            for count in values[:len(self.buckets)]:
+                running += count
+                cumulative.append(running)
+            result[key] = {"count": values[-1], "sum": values[-2], "buckets": cumulative}
+        return result
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, data in sorted(self.snapshot().items()):
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets + (math.inf,), data["buckets"] + [data["count"]]):
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(data['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {data['count']}")
+
+        with self._lock:
+            in_flight = dict(self._in_flight)
+        if in_flight:
+            gauge = self.name.replace("_duration_seconds", "") + "_in_flight"
+            lines.append(f"# HELP {gauge} Calls currently in progress")
+            lines.append(f"# TYPE {gauge} gauge")
+            for key, value in sorted(in_flight.items()):
+                lines.append(f"{gauge}{_format_labels(dict(zip(self.labelnames, key)))} {value}")
+        return lines
+
+
+class Timer:
+    """
+    Times a block (`with`) or every call of a function or coroutine function (decorator)
+    into a Histogram, counting it as in flight meanwhile.
+    """
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self._key = histogram._key(labels)
+        self._start = None
+
+    def __enter__(self):
+        self.histogram._enter(self._key)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self._start, **self.labels)
+        self.histogram._exit(self._key)
+        return False
+
+    def __call__(self, fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with Timer(self.histogram, self.labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Timer(self.histogram, self.labels):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+_histograms: Dict[str, Histogram] = {}
+_collectors: Dict[str, Callable[[], Dict]] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    """
+    Named Histogram shared by every module that asks for the same name.
+    """
+    with _registry_lock:
+        existing = _histograms.get(name)
+        if existing is None:
+            existing = _histograms[name] = Histogram(name, help_text, labelnames, buckets)
+        return existing
+
+
+def register_stats(prefix: str, stats_fn: Callable[[], Dict]):
+    """
+    Exposes the numeric fields of an existing get_*_stats() dict as gauges named
+    `<prefix>_<field>`; nested dicts become `<prefix>_<key>_<field>`.
+    """
+    with _registry_lock:
+        _collectors[prefix] = stats_fn
+
+
+# Where a request spends its time: one series per stage (and operation within the stage)
+STAGE_LATENCY = histogram(
+    "arabul_stage_duration_seconds",
+    "Duration of backend stages: translation, encode, chroma_query, supplier_api, geocode, route_matrix, mysql",
+    ("stage", "operation"),
+)
+
+REQUEST_LATENCY = histogram(
+    "arabul_http_request_duration_seconds",
+    "HTTP request duration by route template",
+    ("method", "route", "status"),
+)
+
+
+def timed(stage: str, operation: str = "") -> Timer:
+    """
+    Shared timing hook for the services, as a context manager or a decorator:
+
+        with timed("chroma_query"): ...
+
+        @timed("supplier_api", "detail")
+        async def _request_supplier_detail_async(...): ...
+    """
+    return STAGE_LATENCY.time(stage=stage, operation=operation)
+
+
+def _flatten(prefix: str, stats: Dict) -> Iterable[Tuple[str, float]]:
+    for key, value in stats.items():
+        name = f"{prefix}_{_NAME_RE.sub('_', str(key))}"
+        if isinstance(value, dict):
+            yield from _flatten(name, value)
+        elif isinstance(value, (int, float)) and not (isinstance(value, float) and math.isnan(value)):
+            yield name, value
+
+
+def render_prometheus() -> str:
+    """
+    All histograms and registered stats in the Prometheus text exposition format.
+    """
+    with _registry_lock:
+        histograms = list(_histograms.values())
+        collectors = list(_collectors.items())
+
+    lines = []
+    for h in histograms:
+        lines.extend(h.render())
+
+    for prefix, stats_fn in collectors:
+        try:
+            stats = stats_fn()
+        except Exception:
+            continue
+        for name, value in _flatten(prefix, stats):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the duration of every HTTP request, labelled with the
+    matched route template rather than the raw path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            )